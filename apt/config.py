@@ -18,8 +18,87 @@ class Config:
 
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+
+    # Parent-document mode: small children are embedded, their parent sections feed the LLM
+    CHILD_CHUNK_SIZE = 400
+    CHILD_CHUNK_OVERLAP = 50
+    PARENT_CHUNK_SIZE = 2000
+    PARENT_CHUNK_OVERLAP = 0
+    PARENT_STORE_FILE = "parents.sqlite"
+
+    # Near-duplicate chunks (reprints, boilerplate) are embedded once
+    DEDUP_THRESHOLD = 0.85
+    DEDUP_NUM_PERM = 64
+    DEDUP_BANDS = 16
+    DEDUP_SHINGLE_SIZE = 5
+    DEDUP_REPORT_OVERLAP = 0.8
+
     RETRIEVAL_K = 5
 
+    # Groups, techniques and years named in a question become a metadata filter;
+    # fewer hits than this falls back to searching the whole corpus
+    AUTO_FILTER = False
+    AUTO_FILTER_MIN_RESULTS = 3
+
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    RRF_K = 60
+    HYBRID_FETCH_K = 20
+
+    METADATA_INDEX_FILE = "metadata_index.json"
+    IOC_INDEX_FILE = "ioc_index.json"
+    ANALYTICS_DB_FILE = "analytics.sqlite"
+
+    # Two-stage retrieval: reports first, then chunks of the selected reports only
+    REPORT_STAGE_K = 8
+    REPORT_MAX_CHUNKS = 2
+    REPORT_PREVIEW_CHARS = 500
+
+    PROFILE_MEDOIDS = 3
+    PROFILE_MIN_CHUNKS = 3
+    PROFILE_CENTROID_WEIGHT = 0.5
+    PROFILE_TOP_N = 5
+
+    SHARD_SEARCH_WORKERS = 8
+
+    FACET_MAX_QUERIES = 6
+    FACET_MIN_CHARS = 25
+    FACET_FETCH_K = 20
+
+    ANSWER_CACHE_THRESHOLD = 0.95
+    ANSWER_CACHE_TTL = 3600
+    ANSWER_CACHE_SIZE = 256
+
+    # Context tokens for retrieved reports; the prompt template and answer need headroom in num_ctx
+    CONTEXT_TOKEN_BUDGET = 3000
+    CHARS_PER_TOKEN = 4
+    STITCH_ADJACENT_CHUNKS = True
+
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_FETCH_K = 30
+    RERANK_TOP_N = 5
+    RERANK_BATCH_SIZE = 32
+    RERANK_CACHE_SIZE = 10000
+
+    OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_MAX_CONNECTIONS = 16
+
+    # Matches Ollama's own OLLAMA_NUM_PARALLEL so queued requests wait here, where priority applies
+    LLM_MAX_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+    LLM_INTERACTIVE_QUEUE_DEADLINE = 120.0
+    LLM_BATCH_QUEUE_DEADLINE = None
+    LLM_QUEUE_METRICS_WINDOW = 1000
+
+    BULK_CONCURRENCY = 4
+    BULK_EMBED_BATCH_SIZE = 64
+
+    SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+    SERVICE_BATCH_WINDOW_MS = 5
+    SERVICE_MAX_BATCH_SIZE = 32
+    SERVICE_LATENCY_WINDOW = 1000
+
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
     LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "apt-rag")
     LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "true")
@@ -1,12 +1,15 @@
 from apt.ingest.loader import PDFLoader, load_pdfs
-from apt.ingest.chunker import DocumentChunker, chunk_documents
-from apt.ingest.metadata import extract_apt_mentions, extract_technique_mentions
+from apt.ingest.chunker import DocumentChunker, chunk_documents, chunk_parent_documents
+from apt.ingest.metadata import extract_apt_mentions, extract_iocs, extract_technique_mentions, refang
 
 __all__ = [
     "PDFLoader",
     "load_pdfs",
     "DocumentChunker",
     "chunk_documents",
+    "chunk_parent_documents",
     "extract_apt_mentions",
     "extract_technique_mentions",
+    "extract_iocs",
+    "refang",
 ]
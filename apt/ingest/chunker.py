@@ -1,32 +1,55 @@
-from typing import List
+import hashlib
+from collections import defaultdict
+from typing import List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from loguru import logger
 from apt.config import Config
-from apt.ingest.metadata import extract_apt_mentions, extract_technique_mentions
+from apt.ingest.metadata import extract_apt_mentions, extract_iocs, extract_technique_mentions
 
 class DocumentChunker:
     def __init__(
         self,
         chunk_size: int = Config.CHUNK_SIZE,
         chunk_overlap: int = Config.CHUNK_OVERLAP,
+        parent_chunk_size: Optional[int] = None,
+        parent_chunk_overlap: int = Config.PARENT_CHUNK_OVERLAP,
     ):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""],
-        )
+        self.text_splitter = _splitter(chunk_size, chunk_overlap)
+        self.parent_splitter = _splitter(parent_chunk_size, parent_chunk_overlap) if parent_chunk_size else None
 
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         logger.info(f"Chunking {len(documents)} documents")
 
         chunks = self.text_splitter.split_documents(documents)
+        assign_chunk_ids(chunks)
 
         logger.success(f"Created {len(chunks)} chunks from {len(documents)} documents")
 
         return chunks
 
+    def chunk_with_parents(self, documents: List[Document]) -> Tuple[List[Document], List[Document]]:
+        if self.parent_splitter is None:
+            raise ValueError("DocumentChunker was created without parent_chunk_size")
+
+        logger.info(f"Chunking {len(documents)} documents into parent sections and child chunks")
+
+        parents = self.parent_splitter.split_documents(documents)
+        assign_chunk_ids(parents, key="parent_id", prefix="p")
+
+        children = []
+        for parent in parents:
+            for child in self.text_splitter.split_documents([parent]):
+                # Offsets stay relative to the page so stitching still lines children up
+                child.metadata["start_index"] += parent.metadata.get("start_index", 0)
+                child.metadata.pop("parent_index", None)
+                children.append(child)
+        assign_chunk_ids(children)
+
+        logger.success(f"Created {len(children)} child chunks under {len(parents)} parents from {len(documents)} documents")
+
+        return children, parents
+
     def enrich_metadata(self, chunks: List[Document]) -> List[Document]:
         logger.info("Enriching chunks with custom metadata")
 
@@ -39,8 +62,38 @@ class DocumentChunker:
             if techniques:
                 chunk.metadata["techniques_mentioned"] = ", ".join(sorted(techniques))
 
+            iocs = extract_iocs(chunk.page_content)
+            if iocs:
+                chunk.metadata["iocs"] = ", ".join(sorted(set().union(*iocs.values())))
+
         return chunks
 
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,
+    )
+
+def assign_chunk_ids(chunks: List[Document], key: str = "chunk_id", prefix: str = "") -> List[Document]:
+    # Stable IDs let side indexes (BM25, metadata postings) refer to the same
+    # chunks as Chroma across re-embeds of the same pickle.
+    counters = defaultdict(int)
+    index_key = key.replace("_id", "_index")
+
+    for chunk in chunks:
+        source = str(chunk.metadata.get("source") or chunk.metadata.get("filename", "unknown"))
+        index = counters[source]
+        counters[source] += 1
+
+        source_hash = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        chunk.metadata[key] = f"{source_hash}:{prefix}{index}"
+        chunk.metadata[index_key] = index
+
+    return chunks
+
 def chunk_documents(documents: List[Document], chunk_size: int = None, chunk_overlap: int = None) -> List[Document]:
     chunker = DocumentChunker(
         chunk_size=chunk_size or Config.CHUNK_SIZE,
@@ -48,3 +101,19 @@ def chunk_documents(documents: List[Document], chunk_size: int = None, chunk_ove
     )
     chunks = chunker.chunk_documents(documents)
     return chunker.enrich_metadata(chunks)
+
+def chunk_parent_documents(
+    documents: List[Document],
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    parent_chunk_size: int = None,
+    parent_chunk_overlap: int = None,
+) -> Tuple[List[Document], List[Document]]:
+    chunker = DocumentChunker(
+        chunk_size=chunk_size or Config.CHILD_CHUNK_SIZE,
+        chunk_overlap=chunk_overlap if chunk_overlap is not None else Config.CHILD_CHUNK_OVERLAP,
+        parent_chunk_size=parent_chunk_size or Config.PARENT_CHUNK_SIZE,
+        parent_chunk_overlap=parent_chunk_overlap if parent_chunk_overlap is not None else Config.PARENT_CHUNK_OVERLAP,
+    )
+    children, parents = chunker.chunk_with_parents(documents)
+    return chunker.enrich_metadata(children), parents
@@ -0,0 +1,169 @@
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+from apt.config import Config
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Comma-joined tag fields are unioned into the representative so filters still find it
+MERGED_FIELDS = ("apt_groups_mentioned", "techniques_mentioned", "iocs")
+
+def _shingles(text: str, size: int) -> List[int]:
+    words = re.sub(r"[^\w]+", " ", text.lower()).split()
+    if len(words) <= size:
+        return [zlib.crc32(" ".join(words).encode("utf-8"))]
+    return [zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)]
+
+def minhash_signatures(
+    texts: List[str],
+    num_perm: int = Config.DEDUP_NUM_PERM,
+    shingle_size: int = Config.DEDUP_SHINGLE_SIZE,
+    seed: int = 1,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = np.asarray(_shingles(text, shingle_size), dtype=np.uint64)[:, None]
+        # uint64 wrap-around is part of the hash family, as in datasketch
+        with np.errstate(over="ignore"):
+            signatures[i] = (((hashes * a + b) % MERSENNE_PRIME) & MAX_HASH).min(axis=0)
+
+    return signatures
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def cluster_signatures(
+    signatures: np.ndarray,
+    threshold: float = Config.DEDUP_THRESHOLD,
+    bands: int = Config.DEDUP_BANDS,
+) -> List[int]:
+    # LSH banding finds candidates; each is checked against the first member of its bucket only,
+    # so a boilerplate page repeated thousands of times stays linear
+    parent = list(range(len(signatures)))
+    rows = signatures.shape[1] // bands
+
+    for band in range(bands):
+        buckets: Dict[bytes, int] = {}
+        for i, signature in enumerate(signatures):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            j = buckets.setdefault(key, i)
+            if j == i:
+                continue
+
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j and np.mean(signatures[i] == signatures[j]) >= threshold:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    return [_find(parent, i) for i in range(len(signatures))]
+
+def _merge_tags(values: List[Any]) -> str:
+    tags = {tag.strip() for value in values if value for tag in str(value).split(",") if tag.strip()}
+    return ", ".join(sorted(tags))
+
+def _representative(chunks: List[Document], members: List[int]) -> int:
+    # Prefer the earliest publication, reprints usually come later
+    return min(members, key=lambda i: (chunks[i].metadata.get("year") or 9999, i))
+
+def _duplicate_reports(
+    chunks: List[Document], clusters: Dict[int, List[int]], representatives: Dict[int, int], overlap: float
+) -> Dict[str, str]:
+    # A report is a reprint when most of its chunks were collapsed into chunks of one other report
+    totals = Counter(chunk.metadata.get("filename") for chunk in chunks)
+    collapsed: Dict[str, Counter] = defaultdict(Counter)
+    for root, members in clusters.items():
+        original = chunks[representatives[root]].metadata.get("filename")
+        for i in members:
+            filename = chunks[i].metadata.get("filename")
+            if filename != original:
+                collapsed[filename][original] += 1
+
+    duplicates = {}
+    for filename, originals in collapsed.items():
+        original, count = originals.most_common(1)[0]
+        if count / totals[filename] >= overlap:
+            duplicates[filename] = original
+    return duplicates
+
+def duplicate_sources(metadata: Dict[str, Any]) -> List[Tuple[str, Optional[int]]]:
+    sources = [f for f in str(metadata.get("duplicate_sources") or "").split(", ") if f]
+    years = str(metadata.get("duplicate_years") or "").split(", ")
+    years += [""] * (len(sources) - len(years))
+    return [(source, int(year) if year.isdigit() else None) for source, year in zip(sources, years)]
+
+def deduplicate_chunks(
+    chunks: List[Document],
+    threshold: float = Config.DEDUP_THRESHOLD,
+    num_perm: int = Config.DEDUP_NUM_PERM,
+    bands: int = Config.DEDUP_BANDS,
+    shingle_size: int = Config.DEDUP_SHINGLE_SIZE,
+    report_overlap: float = Config.DEDUP_REPORT_OVERLAP,
+) -> Tuple[List[Document], Dict[str, Any]]:
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+    logger.info(f"Deduplicating {len(chunks)} chunks (MinHash, threshold {threshold})")
+
+    signatures = minhash_signatures([chunk.page_content for chunk in chunks], num_perm, shingle_size)
+    roots = cluster_signatures(signatures, threshold, bands)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i, root in enumerate(roots):
+        clusters[root].append(i)
+
+    kept, representatives = [], {}
+    for root, members in clusters.items():
+        keep = _representative(chunks, members)
+        representatives[root] = keep
+        if len(members) > 1:
+            chunk = chunks[keep]
+            duplicates = [chunks[i] for i in members if i != keep]
+            chunk.metadata["duplicate_count"] = len(members)
+            chunk.metadata["duplicate_chunk_ids"] = ", ".join(str(d.metadata.get("chunk_id")) for d in duplicates)
+            sources: Dict[str, Any] = {}
+            for d in duplicates:
+                filename = str(d.metadata.get("filename"))
+                if filename != str(chunk.metadata.get("filename")):
+                    sources.setdefault(filename, d.metadata.get("year"))
+            chunk.metadata["duplicate_sources"] = ", ".join(sorted(sources))
+            # Parallel to duplicate_sources, so indexes can date reports that lost every chunk
+            chunk.metadata["duplicate_years"] = ", ".join(
+                "" if sources[f] is None else str(sources[f]) for f in sorted(sources)
+            )
+            for field in MERGED_FIELDS:
+                merged = _merge_tags([chunks[i].metadata.get(field) for i in members])
+                if merged:
+                    chunk.metadata[field] = merged
+        kept.append(keep)
+
+    unique = [chunks[i] for i in sorted(kept)]
+    duplicate_clusters = {root: members for root, members in clusters.items() if len(members) > 1}
+    kept_set = set(kept)
+    removed = [i for members in duplicate_clusters.values() for i in members if i not in kept_set]
+
+    stats = {
+        "input_chunks": len(chunks),
+        "output_chunks": len(unique),
+        "removed_chunks": len(removed),
+        "duplicate_clusters": len(duplicate_clusters),
+        "removed_chars": sum(len(chunks[i].page_content) for i in removed),
+        "duplicate_reports": _duplicate_reports(chunks, duplicate_clusters, representatives, report_overlap),
+    }
+
+    logger.success(
+        f"Kept {stats['output_chunks']} of {stats['input_chunks']} chunks: "
+        f"{stats['removed_chunks']} near-duplicates in {stats['duplicate_clusters']} clusters, "
+        f"{len(stats['duplicate_reports'])} reports are reprints of another"
+    )
+    return unique, stats
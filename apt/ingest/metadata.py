@@ -1,5 +1,5 @@
 import re
-from typing import Set
+from typing import Dict, Optional, Set
 
 APT_PATTERNS = [
     r'\bAPT\s*\d+\b',
@@ -21,3 +21,64 @@ def extract_apt_mentions(text: str) -> Set[str]:
 def extract_technique_mentions(text: str) -> Set[str]:
     techniques = set(re.findall(TECHNIQUE_PATTERN, text))
     return techniques
+
+# Reports defang indicators so they cannot be clicked; undo that before matching
+DEFANG_REPLACEMENTS = [
+    (re.compile(r'\bhxxp(s?)', re.IGNORECASE), r'http\1'),
+    (re.compile(r'\bfxp\b', re.IGNORECASE), 'ftp'),
+    (re.compile(r'\[\s*(?:\.|dot)\s*\]|\(\s*(?:\.|dot)\s*\)|\{\s*(?:\.|dot)\s*\}', re.IGNORECASE), '.'),
+    (re.compile(r'\[\s*:\s*\]'), ':'),
+    (re.compile(r'\[\s*@\s*\]|\[at\]', re.IGNORECASE), '@'),
+    (re.compile(r'\[://\]'), '://'),
+]
+
+IOC_PATTERNS = {
+    "url": r'\b(?:https?|ftp)://[^\s<>"\'`]+',
+    "email": r'\b[\w.+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,24}\b',
+    "ipv4": r'\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b',
+    "sha256": r'\b[a-f0-9]{64}\b',
+    "sha1": r'\b[a-f0-9]{40}\b',
+    "md5": r'\b[a-f0-9]{32}\b',
+    "domain": r'\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}\b',
+}
+
+# Dotted names in reports are far more often files than hosts
+FILE_EXTENSIONS = {
+    "bat", "bin", "cab", "cmd", "cpl", "dat", "dll", "doc", "docm", "docx", "elf", "exe", "gif", "hta",
+    "htm", "html", "ini", "iso", "jar", "jpg", "js", "json", "lnk", "log", "msi", "pdf", "php", "png",
+    "ps1", "py", "rar", "rtf", "scr", "sh", "sys", "tmp", "txt", "vbs", "xls", "xlsm", "xlsx", "xml", "zip",
+}
+
+def refang(text: str) -> str:
+    for pattern, replacement in DEFANG_REPLACEMENTS:
+        text = pattern.sub(replacement, text)
+    return text
+
+def normalize_ioc(value: str) -> str:
+    # Lookups are case-insensitive; trailing punctuation comes from the sentence
+    return refang(value).strip().rstrip('.,;:)]}>').lower()
+
+def ioc_type(value: str) -> Optional[str]:
+    value = normalize_ioc(value)
+    for name, pattern in IOC_PATTERNS.items():
+        if re.fullmatch(pattern, value, re.IGNORECASE) and _plausible(name, value):
+            return name
+    return None
+
+def _plausible(name: str, value: str) -> bool:
+    if name == "domain":
+        return value.rsplit(".", 1)[-1] not in FILE_EXTENSIONS
+    return True
+
+def extract_iocs(text: str) -> Dict[str, Set[str]]:
+    text = refang(text)
+    iocs: Dict[str, Set[str]] = {}
+
+    for name, pattern in IOC_PATTERNS.items():
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            value = normalize_ioc(match.group(0))
+            # Hosts inside URLs and emails are kept too, hunters often paste just the host
+            if _plausible(name, value):
+                iocs.setdefault(name, set()).add(value)
+
+    return iocs
@@ -1,3 +1,15 @@
+from apt.retrieval.cache import SemanticAnswerCache
 from apt.retrieval.chain import RAGChain, create_rag_chain
+from apt.retrieval.context import ContextPacker
+from apt.retrieval.rerank import CrossEncoderReranker
+from apt.retrieval.scheduler import LLMScheduler, QueueTimeoutError
 
-__all__ = ["RAGChain", "create_rag_chain"]
+__all__ = [
+    "ContextPacker",
+    "CrossEncoderReranker",
+    "LLMScheduler",
+    "QueueTimeoutError",
+    "RAGChain",
+    "SemanticAnswerCache",
+    "create_rag_chain",
+]
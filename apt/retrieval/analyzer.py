@@ -0,0 +1,66 @@
+import re
+from typing import Any, Dict, List, Optional
+from apt.ingest.metadata import extract_apt_mentions, extract_technique_mentions
+from apt.store.metadata_index import normalize_value
+
+# A leading hyphen means an identifier such as CVE-2021-44228, not a year
+YEAR_START = r"(?<![-\w])((?:19|20)\d{2})"
+YEAR = YEAR_START + r"(?![-\w])"
+# Bare four-digit numbers are often ports, key sizes or sample counts, so a year needs a preposition
+YEAR_CONTEXT = r"\b(?:in|from|during|throughout|around)\s+"
+YEAR_RANGE = re.compile(
+    rf"\bbetween\s+{YEAR}\s+and\s+{YEAR}"
+    rf"|{YEAR_CONTEXT}{YEAR_START}\s*(?:-|–|to|through|until)\s*((?:19|20)\d{{2}})(?![-\w])",
+    re.IGNORECASE,
+)
+YEAR_BOUND = re.compile(rf"\b(since|after|before|until|prior to)\s+{YEAR}", re.IGNORECASE)
+YEAR_MENTION = re.compile(YEAR_CONTEXT + YEAR, re.IGNORECASE)
+
+BOUND_OPERATORS = {"since": "$gte", "after": "$gt", "before": "$lt", "until": "$lte", "prior to": "$lt"}
+
+def _year_clauses(question: str) -> List[Dict[str, Any]]:
+    # Chroma allows exactly one operator per expression, so every bound is its own clause
+    match = YEAR_RANGE.search(question)
+    if match:
+        low, high = sorted(int(year) for year in match.groups() if year)
+        return [{"year": {"$gte": low}}, {"year": {"$lte": high}}]
+
+    bounds = [{"year": {BOUND_OPERATORS[word.lower()]: int(year)}} for word, year in YEAR_BOUND.findall(question)]
+    if bounds:
+        return bounds
+
+    years = sorted({int(year) for year in YEAR_MENTION.findall(question)})
+    if years:
+        return [{"year": {"$in": years}}]
+
+    return []
+
+def _known(metadata_index, field: str, values: List[str]) -> List[str]:
+    # Names the corpus never mentions would only empty the result set
+    return [value for value in values if normalize_value(field, value) in metadata_index.postings[field]]
+
+def analyze_question(question: str, metadata_index=None) -> Optional[Dict[str, Any]]:
+    clauses = []
+
+    # Group and technique metadata are comma-joined strings in Chroma,
+    # so they can only be pushed down through the posting lists
+    if metadata_index is not None:
+        groups = _known(metadata_index, "apt_groups_mentioned", sorted(extract_apt_mentions(question)))
+        if groups:
+            clauses.append({"apt_groups_mentioned": {"$in": groups}})
+
+        techniques = _known(metadata_index, "techniques_mentioned", sorted(extract_technique_mentions(question)))
+        if techniques:
+            clauses.append({"techniques_mentioned": {"$in": techniques}})
+
+    years = _year_clauses(question)
+    if metadata_index is not None and len(years) == 1 and "$in" in years[0]["year"]:
+        known = [y for y in years[0]["year"]["$in"] if str(y) in metadata_index.postings["year"]]
+        years = [{"year": {"$in": known}}] if known else []
+    clauses.extend(years)
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from apt.config import Config
+from apt.retrieval.context import ContextPacker, relevance_weights
+from apt.store.metadata_index import field_values
+
+# Static instructions first so Ollama can reuse the cached prompt prefix
+ATTRIBUTION_PROMPT = """Based on the following threat intelligence reports, analyze the observed activity and provide threat actor attribution.
+
+Provide a structured attribution analysis with:
+1. Most Likely Threat Actor(s) - with confidence level (High/Medium/Low)
+2. Matching TTPs - specific techniques that match
+3. Similar Campaigns - past campaigns with similar patterns
+4. Key Indicators - what makes this attribution likely
+5. Alternative Possibilities - other groups that could match
+
+Format your response clearly with sections.
+
+Context from similar reports:
+{context}
+
+Observed Activity:
+{description}
+"""
+
+ATTRIBUTION_PREFIX = ATTRIBUTION_PROMPT.split("{context}")[0]
+
+def build_attribution_prompt(
+    description: str,
+    docs: List[Document],
+    packer: ContextPacker,
+) -> Tuple[str, Dict[str, Any]]:
+    context, stats = packer.pack(docs)
+    prompt = ATTRIBUTION_PROMPT.format(description=description, context=context)
+
+    return prompt, {**stats, "prompt_tokens": packer.count_tokens(prompt)}
+
+def _incidence(values: List[List[str]]) -> Tuple[List[str], np.ndarray]:
+    vocabulary = sorted({value for row in values for value in row})
+    columns = {value: i for i, value in enumerate(vocabulary)}
+
+    matrix = np.zeros((len(values), len(vocabulary)))
+    for row, row_values in enumerate(values):
+        for value in row_values:
+            matrix[row, columns[value]] = 1.0
+    return vocabulary, matrix
+
+def score_actors(
+    docs: List[Document],
+    scores: Optional[Sequence[float]] = None,
+    top_n: Optional[int] = Config.PROFILE_TOP_N,
+    evidence: int = 3,
+    techniques: int = 5,
+) -> List[Dict[str, Any]]:
+    if not docs:
+        return []
+
+    weights = np.asarray(relevance_weights(docs, scores))
+    actors, mentions = _incidence(
+        [field_values("apt_groups_mentioned", doc.metadata.get("apt_groups_mentioned")) for doc in docs]
+    )
+    if not actors:
+        return []
+    technique_ids, technique_mentions = _incidence(
+        [field_values("techniques_mentioned", doc.metadata.get("techniques_mentioned")) for doc in docs]
+    )
+
+    # A chunk naming five groups is weaker evidence for each of them than one naming a single group
+    per_actor = mentions / np.maximum(mentions.sum(axis=1, keepdims=True), 1)
+    contributions = per_actor * weights[:, None]
+    actor_scores = contributions.sum(axis=0)
+    total = actor_scores.sum()
+
+    actor_techniques = contributions.T @ technique_mentions
+
+    ranking = []
+    for a in np.argsort(-actor_scores)[:top_n]:
+        if actor_scores[a] <= 0:
+            break
+
+        supporting = np.flatnonzero(contributions[:, a] > 0)
+        supporting = supporting[np.argsort(-contributions[supporting, a])]
+        top_techniques = [t for t in np.argsort(-actor_techniques[a])[:techniques] if actor_techniques[a, t] > 0]
+
+        ranking.append({
+            "actor": actors[a],
+            "score": float(actor_scores[a]),
+            "share": float(actor_scores[a] / total) if total > 0 else 0.0,
+            "chunks": int(mentions[:, a].sum()),
+            "techniques": [(technique_ids[t], float(actor_techniques[a, t])) for t in top_techniques],
+            "evidence": [docs[i] for i in supporting[:evidence]],
+        })
+
+    return ranking
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from langchain_core.documents import Document
+from langchain_core.runnables.config import run_in_executor
+from loguru import logger
+from apt.config import Config
+from apt.retrieval.scheduler import BATCH
+
+def question_id(question: str, metadata_filter: Optional[Dict[str, Any]] = None) -> str:
+    key = json.dumps({"question": question, "filter": metadata_filter}, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def load_questions(path: Path, default_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    records = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            if not record.get("question"):
+                raise ValueError(f"{path}:{line_number} has no question")
+
+            record.setdefault("filter", default_filter)
+            record.setdefault("id", question_id(record["question"], record["filter"]))
+            records.append(record)
+
+    ids = [record["id"] for record in records]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate question ids in {path}")
+
+    return records
+
+def completed_ids(path: Path) -> Set[str]:
+    path = Path(path)
+    if not path.exists():
+        return set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    done, valid = set(), []
+    for line in lines:
+        try:
+            done.add(json.loads(line)["id"])
+        except (json.JSONDecodeError, KeyError):
+            # A crash mid-write leaves a truncated last line
+            continue
+        valid.append(line if line.endswith("\n") else line + "\n")
+
+    if len(valid) != len(lines) or (lines and not lines[-1].endswith("\n")):
+        logger.warning(f"Dropping {len(lines) - len(valid)} incomplete lines from {path}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(valid)
+
+    return done
+
+def serialize_sources(docs: List[Document]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "filename": doc.metadata.get("filename"),
+            "year": doc.metadata.get("year"),
+            "chunk_id": doc.metadata.get("chunk_id"),
+        }
+        for doc in docs
+    ]
+
+def serialize_result(record: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": record["id"],
+        "question": record["question"],
+        "filter": record.get("filter"),
+        "filter_fallback": result.get("filter_fallback", False),
+        "answer": result["answer"],
+        "sources": serialize_sources(result["source_documents"]),
+        "timings": result.get("timings"),
+        "usage": result.get("usage"),
+        "cached": result.get("cached", False),
+    }
+
+async def run_bulk(
+    rag_chain,
+    records: List[Dict[str, Any]],
+    output_path: Path,
+    concurrency: int = Config.BULK_CONCURRENCY,
+    embed_batch_size: int = Config.BULK_EMBED_BATCH_SIZE,
+) -> Dict[str, Any]:
+    if concurrency < 1:
+        raise ValueError("Concurrency must be positive")
+
+    start = time.perf_counter()
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    done = completed_ids(output_path)
+    pending = [record for record in records if record["id"] not in done]
+    logger.info(f"{len(pending)} questions to answer, {len(records) - len(pending)} already in {output_path}")
+
+    embeddings: List[Optional[List[float]]] = [None] * len(pending)
+    for offset in range(0, len(pending), embed_batch_size):
+        batch = [record["question"] for record in pending[offset:offset + embed_batch_size]]
+        vectors = await run_in_executor(None, rag_chain.embed_questions, batch)
+        if vectors is None:
+            break
+        embeddings[offset:offset + len(vectors)] = vectors
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"total": len(records), "skipped": len(records) - len(pending), "completed": 0, "failed": 0}
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def answer(record: Dict[str, Any], embedding: Optional[List[float]]) -> None:
+            async with semaphore:
+                try:
+                    # Batch priority so interactive questions sharing the scheduler jump the queue
+                    if record.get("filter"):
+                        result = await rag_chain.aquery_with_filter(
+                            record["question"], record["filter"], embedding, priority=BATCH
+                        )
+                    else:
+                        result = await rag_chain.aquery(record["question"], embedding, priority=BATCH)
+                except Exception as e:
+                    # Not written, so a rerun retries it
+                    stats["failed"] += 1
+                    logger.error(f"Question {record['id']} failed: {e}")
+                    return
+
+            out.write(json.dumps(serialize_result(record, result), default=str) + "\n")
+            out.flush()
+            stats["completed"] += 1
+            logger.info(f"[{stats['completed'] + stats['skipped']}/{stats['total']}] {record['id']} answered")
+
+        await asyncio.gather(*(answer(record, embedding) for record, embedding in zip(pending, embeddings)))
+
+    stats["elapsed_s"] = time.perf_counter() - start
+    return stats
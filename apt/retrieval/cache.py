@@ -0,0 +1,115 @@
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from apt.config import Config
+
+def filter_key(metadata_filter: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(metadata_filter or {}, sort_keys=True, default=str)
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        threshold: float = Config.ANSWER_CACHE_THRESHOLD,
+        ttl: Optional[float] = Config.ANSWER_CACHE_TTL,
+        max_size: int = Config.ANSWER_CACHE_SIZE,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("Similarity threshold must be in (0, 1]")
+        if max_size < 1:
+            raise ValueError("Cache size must be positive")
+
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl is not None and now - entry["created_at"] > self.ttl
+
+    def _check_version(self, version: Optional[str]) -> None:
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Collection changed ({self.version} -> {version}), dropping {len(self)} cached answers")
+            self._entries.clear()
+            self.version = version
+
+    def lookup(
+        self,
+        embedding: List[float],
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        self._check_version(version)
+
+        now = time.time()
+        for entry_id in [i for i, entry in self._entries.items() if self._expired(entry, now)]:
+            del self._entries[entry_id]
+
+        key = filter_key(metadata_filter)
+        candidates = [(i, entry) for i, entry in self._entries.items() if entry["filter_key"] == key]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        query = _normalize(embedding)
+        matrix = np.stack([entry["embedding"] for _, entry in candidates])
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        entry_id, entry = candidates[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return copy.copy(entry["result"]), float(similarities[best])
+
+    def store(
+        self,
+        embedding: List[float],
+        result: Dict[str, Any],
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        self._check_version(version)
+
+        self._entries[self._next_id] = {
+            "embedding": _normalize(embedding),
+            "filter_key": filter_key(metadata_filter),
+            "result": dict(result),
+            "created_at": time.time(),
+        }
+        self._next_id += 1
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self.version = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -1,14 +1,30 @@
-from typing import List, Dict, Any
+import time
+from functools import partial
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple
+from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import VectorStore, VectorStoreRetriever
+from langchain_chroma import Chroma
 from langchain_ollama import OllamaLLM
 from loguru import logger
 from apt.config import Config
+from apt.retrieval.analyzer import analyze_question
+from apt.retrieval.cache import SemanticAnswerCache
+from apt.retrieval.context import ContextPacker
+from apt.retrieval.llm import LLMClientManager, ollama_kwargs
+from apt.retrieval.rerank import CrossEncoderReranker
+from apt.retrieval.scheduler import INTERACTIVE, LLMScheduler, get_llm_scheduler
+from apt.retrieval.stitch import expand_to_parents, stitch_adjacent_chunks
+from apt.store.chroma import HybridRetriever, ShardedRetriever, TwoStageRetriever, collection_version
+from apt.store.metadata_index import candidate_where
 
-APT_ATTRIBUTION_TEMPLATE = """You are an expert threat intelligence analyst specializing in APT (Advanced Persistent Threat) group attribution and analysis.
+# Everything that does not depend on the question comes first, so Ollama can
+# reuse the cached prompt prefix across questions
+APT_SYSTEM_PREFIX = """You are an expert threat intelligence analyst specializing in APT (Advanced Persistent Threat) group attribution and analysis.
 
-Based on the following threat intelligence reports, answer the user's question. Focus on:
+Based on the threat intelligence reports below, answer the user's question. Focus on:
 - APT group names and aliases
 - Tactics, Techniques, and Procedures (TTPs)
 - MITRE ATT&CK techniques (e.g., T1566.001)
@@ -16,11 +32,6 @@ Based on the following threat intelligence reports, answer the user's question.
 - Campaign names and timelines
 - Attribution confidence
 
-Context from reports:
-{context}
-
-Question: {question}
-
 Provide a detailed answer with:
 1. Direct answer to the question
 2. Supporting evidence from the reports
@@ -28,87 +39,639 @@ Provide a detailed answer with:
 4. Attribution confidence level (High/Medium/Low)
 
 If you cannot find relevant information, say "I don't have enough information in the available reports to answer this question."
+"""
+
+APT_ATTRIBUTION_TEMPLATE = APT_SYSTEM_PREFIX + """
+Context from reports:
+{context}
+
+Question: {question}
 
 Answer:"""
 
+PREFIX_SENTINEL = "\x00"
+
+# embed_ms is None when the retriever does not expose a separate embedding step
+TIMING_KEYS = ("embed_ms", "search_ms", "rerank_ms", "format_ms", "queue_ms", "llm_ttft_ms", "llm_total_ms", "total_ms")
+
 class RAGChain:
-    def __init__(self, retriever, llm_model: str = "gemma3n:e4b"):
+    def __init__(
+        self,
+        retriever,
+        llm_model: str = "gemma3n:e4b",
+        metadata_index=None,
+        llm=None,
+        cache: Optional[SemanticAnswerCache] = None,
+        context_budget: int = Config.CONTEXT_TOKEN_BUDGET,
+        stitch: bool = Config.STITCH_ADJACENT_CHUNKS,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rerank_fetch_k: int = Config.RERANK_FETCH_K,
+        rerank_top_n: int = Config.RERANK_TOP_N,
+        llm_manager: Optional[LLMClientManager] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        parent_store=None,
+        auto_filter: bool = Config.AUTO_FILTER,
+        auto_filter_min_results: int = Config.AUTO_FILTER_MIN_RESULTS,
+    ):
         self.retriever = retriever
+        self.auto_filter = auto_filter
+        self.auto_filter_min_results = auto_filter_min_results
+        self.parent_store = parent_store
+        self.stitch = stitch
+        self.reranker = reranker
+        self.rerank_fetch_k = rerank_fetch_k
+        self.rerank_top_n = rerank_top_n
+        self.metadata_index = metadata_index
+        self.cache = cache
 
-        logger.info(f"Initializing LLM: {llm_model}")
-        self.llm = OllamaLLM(model=llm_model)
+        self.llm_model = llm_model
+        self.llm_manager = llm_manager
+        if llm is None and llm_manager is not None:
+            llm = llm_manager.get(llm_model)
+        elif llm is None:
+            logger.info(f"Initializing LLM: {llm_model}")
+            llm = OllamaLLM(model=llm_model, **ollama_kwargs())
+        self.llm = llm
+        # Shared by default so every chain in the process queues for the same Ollama slots
+        self.scheduler = scheduler or get_llm_scheduler()
 
         self.prompt = ChatPromptTemplate.from_template(APT_ATTRIBUTION_TEMPLATE)
+        self.packer = ContextPacker(budget=context_budget)
 
-        self.chain = (
-            {"context": self.retriever | self._format_docs, "question": RunnablePassthrough()}
-            | self.prompt
-            | self.llm
-            | StrOutputParser()
-        )
+        # Retrieval stays outside the LCEL graph so it runs once per question
+        # and the same documents feed both the prompt and source_documents
+        self.chain = self.prompt | self.llm | StrOutputParser()
+
+    @property
+    def prompt_prefix(self) -> str:
+        return static_prompt_prefix(self.prompt)
+
+    def warm_up(self, background: bool = False):
+        if self.llm_manager is None:
+            raise ValueError("Warm-up requires an LLMClientManager")
+        return self.llm_manager.warm_up(self.llm_model, self.prompt_prefix, background=background)
 
     def _format_docs(self, docs: List) -> str:
-        formatted = []
-        for i, doc in enumerate(docs, 1):
-            source = doc.metadata.get("filename", "Unknown")
-            year = doc.metadata.get("year", "N/A")
-            content = doc.page_content[:500]
+        return self.packer.pack(docs)[0]
 
-            formatted.append(f"[Report {i}] Source: {source} (Year: {year})\n{content}...\n")
+    def _build_context(
+        self, question: str, docs: List[Document], timings: Dict[str, Any], usage: Dict[str, Any]
+    ) -> Tuple[str, List[Document]]:
+        start = time.perf_counter()
+        context, stats = self.packer.pack(docs)
+        # Sources dropped for lack of budget never reach the LLM, so they are not reported either
+        packed = [docs[entry["index"]] for entry in stats["documents"]]
+        prompt_tokens = self.packer.count_tokens(self.prompt.format(context=context, question=question))
 
-        return "\n---\n".join(formatted)
+        usage.update({
+            "prompt_tokens": prompt_tokens,
+            "context_tokens": stats["context_tokens"],
+            "context_budget": stats["budget"],
+            "truncated_sources": stats["truncated"],
+            "dropped_sources": stats["dropped"],
+        })
+        logger.info(
+            f"Packed {len(docs) - stats['dropped']}/{len(docs)} sources into {stats['context_tokens']} "
+            f"context tokens ({prompt_tokens} prompt tokens, {stats['truncated']} trimmed)"
+        )
+        timings["format_ms"] = _elapsed_ms(start)
+        return context, packed
 
-    def query(self, question: str) -> Dict[str, Any]:
-        logger.info(f"Processing query: {question}")
+    def _search(
+        self,
+        question: str,
+        timings: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        **search_kwargs,
+    ) -> List[Document]:
+        split = bool(search_kwargs) or _is_similarity_retriever(self.retriever)
+        if not search_kwargs and split:
+            search_kwargs = dict(self.retriever.search_kwargs)
+
+        # Hybrid, sharded and custom retrievers are timed as a single step
+        if not split:
+            start = time.perf_counter()
+            docs = self.retriever.invoke(question)
+            timings["search_ms"] = _elapsed_ms(start)
+            return docs
+
+        search_kwargs = self._fetch_kwargs(search_kwargs)
+        vectorstore = self.retriever.vectorstore
+        if isinstance(vectorstore, VectorStore) and vectorstore.embeddings is not None:
+            if embedding is None:
+                embedding = self._embed_question(question, timings)
+
+            start = time.perf_counter()
+            docs = vectorstore.similarity_search_by_vector(embedding, **search_kwargs)
+            timings["search_ms"] = _elapsed_ms(start)
+            return docs
+
+        start = time.perf_counter()
+        docs = vectorstore.similarity_search(query=question, **search_kwargs)
+        timings["search_ms"] = _elapsed_ms(start)
+        return docs
+
+    async def _asearch(
+        self,
+        question: str,
+        timings: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        **search_kwargs,
+    ) -> List[Document]:
+        split = bool(search_kwargs) or _is_similarity_retriever(self.retriever)
+        if not search_kwargs and split:
+            search_kwargs = dict(self.retriever.search_kwargs)
+
+        if not split:
+            start = time.perf_counter()
+            docs = await self.retriever.ainvoke(question)
+            timings["search_ms"] = _elapsed_ms(start)
+            return docs
+
+        search_kwargs = self._fetch_kwargs(search_kwargs)
+        vectorstore = self.retriever.vectorstore
+        if isinstance(vectorstore, VectorStore) and vectorstore.embeddings is not None:
+            if embedding is None:
+                embedding = await self._aembed_question(question, timings)
+
+            start = time.perf_counter()
+            docs = await vectorstore.asimilarity_search_by_vector(embedding, **search_kwargs)
+            timings["search_ms"] = _elapsed_ms(start)
+            return docs
+
+        start = time.perf_counter()
+        docs = await run_in_executor(None, partial(vectorstore.similarity_search, query=question, **search_kwargs))
+        timings["search_ms"] = _elapsed_ms(start)
+        return docs
+
+    def _fetch_kwargs(self, search_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Over-fetch so the reranker has candidates to choose from
+        if self.reranker is not None:
+            search_kwargs = {**search_kwargs, "k": max(search_kwargs.get("k", Config.RETRIEVAL_K), self.rerank_fetch_k)}
+        return search_kwargs
+
+    def _rerank(self, question: str, docs: List[Document], timings: Dict[str, Any]) -> List[Document]:
+        start = time.perf_counter()
+        docs = self.reranker.rerank(question, docs, top_n=self.rerank_top_n)
+        timings["rerank_ms"] = _elapsed_ms(start)
+        return docs
+
+    def _query_embeddings(self):
+        vectorstore = getattr(self.retriever, "vectorstore", None)
+        if isinstance(vectorstore, VectorStore) and vectorstore.embeddings is not None:
+            return vectorstore.embeddings
+
+        manager = getattr(self.retriever, "manager", None)
+        return getattr(manager, "embeddings", None)
+
+    def _embed_question(self, question: str, timings: Dict[str, Any]) -> Optional[List[float]]:
+        embeddings = self._query_embeddings()
+        if embeddings is None:
+            return None
+
+        start = time.perf_counter()
+        embedding = embeddings.embed_query(question)
+        timings["embed_ms"] = _elapsed_ms(start)
+        return embedding
+
+    async def _aembed_question(self, question: str, timings: Dict[str, Any]) -> Optional[List[float]]:
+        embeddings = self._query_embeddings()
+        if embeddings is None:
+            return None
+
+        start = time.perf_counter()
+        embedding = await embeddings.aembed_query(question)
+        timings["embed_ms"] = _elapsed_ms(start)
+        return embedding
+
+    def _collection_version(self) -> Optional[str]:
+        manager = getattr(self.retriever, "manager", None)
+        if manager is not None:
+            return manager.get_collection_version()
+
+        vectorstore = getattr(self.retriever, "vectorstore", None)
+        if isinstance(vectorstore, Chroma):
+            return collection_version([vectorstore])
+
+        return None
+
+    def _cache_hit(
+        self,
+        question: str,
+        embedding: Optional[List[float]],
+        metadata_filter: Optional[Dict[str, Any]],
+        version: Optional[str],
+        timings: Dict[str, Any],
+        query_start: float,
+    ) -> Optional[Dict[str, Any]]:
+        if embedding is None:
+            return None
+
+        hit = self.cache.lookup(embedding, metadata_filter, version)
+        if hit is None:
+            return None
+
+        cached, similarity = hit
+        timings["total_ms"] = _elapsed_ms(query_start)
+        logger.success(f"Answer cache hit (similarity {similarity:.3f}) for: {cached['question']}")
+        _log_timings(timings)
+
+        return {**cached, "question": question, "timings": timings, "cached": True, "cache_similarity": similarity}
+
+    def _cache_store(
+        self,
+        embedding: Optional[List[float]],
+        result: Dict[str, Any],
+        metadata_filter: Optional[Dict[str, Any]],
+        version: Optional[str],
+    ) -> None:
+        if self.cache is not None and embedding is not None:
+            self.cache.store(embedding, result, metadata_filter, version)
+
+    def _resolve_filter(self, metadata_filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.metadata_index is None:
+            return metadata_filter
+
+        candidates, residual = self.metadata_index.resolve_filter(metadata_filter)
+        if candidates is None:
+            return metadata_filter
+
+        logger.info(f"Metadata prefilter matched {len(candidates)} chunks")
+        if not candidates:
+            return None
+
+        return candidate_where(candidates, residual)
+
+    def _infer_filter(
+        self, question: str, metadata_filter: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        # Hybrid, sharded and two-stage retrievers keep their own search path
+        if metadata_filter or not self.auto_filter or not _is_similarity_retriever(self.retriever):
+            return metadata_filter, False
+
+        inferred = analyze_question(question, self.metadata_index)
+        if inferred is None:
+            return None, False
 
-        docs = self.retriever.invoke(question)
-        logger.info(f"Retrieved {len(docs)} relevant documents")
+        logger.info(f"Inferred metadata filter from question: {inferred}")
+        return inferred, True
+
+    def _fallback(self, docs: List[Document], metadata_filter: Dict[str, Any]) -> bool:
+        if len(docs) >= self.auto_filter_min_results:
+            return False
+
+        logger.info(
+            f"Inferred filter {metadata_filter} matched {len(docs)} documents "
+            f"(< {self.auto_filter_min_results}), falling back to unfiltered search"
+        )
+        return True
+
+    def _filtered_search(
+        self,
+        question: str,
+        metadata_filter: Dict[str, Any],
+        timings: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        if _manager_searcher(self.retriever) is not None:
+            return self._manager_search(question, metadata_filter, timings)
+
+        where = self._resolve_filter(metadata_filter)
+        if where is None:
+            return []
+
+        return self._search(question, timings, embedding, k=Config.RETRIEVAL_K, filter=where)
+
+    def _manager_search(self, question: str, metadata_filter: Dict[str, Any], timings: Dict[str, Any]) -> List[Document]:
+        # These retrievers have no single vectorstore; the manager prefilters through the
+        # posting lists itself, restricting BM25, shard selection or the report stage as well
+        search = _manager_searcher(self.retriever)
+        search_kwargs = self._fetch_kwargs({**self.retriever.search_kwargs, "k": Config.RETRIEVAL_K})
+        start = time.perf_counter()
+        docs = search(question, **{**search_kwargs, "filter": metadata_filter})
+        timings["search_ms"] = _elapsed_ms(start)
+        return docs
+
+    def _retrieve(
+        self,
+        question: str,
+        metadata_filter: Optional[Dict[str, Any]],
+        timings: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        inferred: bool = False,
+    ) -> Tuple[List[Document], bool]:
+        fallback = False
+        if metadata_filter:
+            docs = self._filtered_search(question, metadata_filter, timings, embedding)
+            logger.info(f"Retrieved {len(docs)} documents with filter")
+            fallback = inferred and self._fallback(docs, metadata_filter)
+            if fallback:
+                docs = self._search(question, timings, embedding)
+        else:
+            docs = self._search(question, timings, embedding)
+            logger.info(f"Retrieved {len(docs)} relevant documents")
+
+        if self.reranker is not None:
+            docs = self._rerank(question, docs, timings)
+        if self.parent_store is not None:
+            docs = expand_to_parents(docs, self.parent_store)
+        if self.stitch:
+            docs = stitch_adjacent_chunks(docs)
 
         # Calculate total context size
         total_chars = sum(len(doc.page_content) for doc in docs)
         logger.info(f"Total context size: {total_chars:,} characters")
 
-        logger.info("Sending query to LLM (this may take 30-60 seconds)...")
-        answer = self.chain.invoke(question)
+        return docs, fallback
+
+    async def _aretrieve(
+        self,
+        question: str,
+        metadata_filter: Optional[Dict[str, Any]],
+        timings: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        inferred: bool = False,
+    ) -> Tuple[List[Document], bool]:
+        fallback = False
+        if metadata_filter and _manager_searcher(self.retriever) is not None:
+            docs = await run_in_executor(None, self._manager_search, question, metadata_filter, timings)
+            logger.info(f"Retrieved {len(docs)} documents with filter")
+        elif metadata_filter:
+            where = self._resolve_filter(metadata_filter)
+            docs = [] if where is None else await self._asearch(
+                question, timings, embedding, k=Config.RETRIEVAL_K, filter=where
+            )
+            logger.info(f"Retrieved {len(docs)} documents with filter")
+            fallback = inferred and self._fallback(docs, metadata_filter)
+            if fallback:
+                docs = await self._asearch(question, timings, embedding)
+        else:
+            docs = await self._asearch(question, timings, embedding)
+            logger.info(f"Retrieved {len(docs)} relevant documents")
+
+        if self.reranker is not None:
+            docs = await run_in_executor(None, self._rerank, question, docs, timings)
+        if self.parent_store is not None:
+            docs = await run_in_executor(None, expand_to_parents, docs, self.parent_store)
+        if self.stitch:
+            docs = stitch_adjacent_chunks(docs)
+
+        return docs, fallback
+
+    def _stream_answer(
+        self,
+        question: str,
+        context: str,
+        timings: Dict[str, Any],
+        priority: str = INTERACTIVE,
+    ) -> Iterator[str]:
+        start = time.perf_counter()
+        with self.scheduler.slot(priority):
+            timings["queue_ms"] = _elapsed_ms(start)
+
+            logger.info("Sending query to LLM (this may take 30-60 seconds)...")
+            start = time.perf_counter()
+            for token in self.chain.stream({"context": context, "question": question}):
+                if timings["llm_ttft_ms"] is None:
+                    timings["llm_ttft_ms"] = _elapsed_ms(start)
+                yield token
+            timings["llm_total_ms"] = _elapsed_ms(start)
         logger.success("LLM response received")
 
-        return {
+    async def _astream_answer(
+        self,
+        question: str,
+        context: str,
+        timings: Dict[str, Any],
+        priority: str = INTERACTIVE,
+    ) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        async with self.scheduler.aslot(priority):
+            timings["queue_ms"] = _elapsed_ms(start)
+
+            start = time.perf_counter()
+            async for token in self.chain.astream({"context": context, "question": question}):
+                if timings["llm_ttft_ms"] is None:
+                    timings["llm_ttft_ms"] = _elapsed_ms(start)
+                yield token
+            timings["llm_total_ms"] = _elapsed_ms(start)
+
+    def _result(
+        self,
+        question: str,
+        answer: str,
+        docs: List[Document],
+        metadata_filter: Optional[Dict[str, Any]],
+        timings: Dict[str, Any],
+        usage: Dict[str, Any],
+        filter_fallback: bool = False,
+    ) -> Dict[str, Any]:
+        result = {
             "question": question,
             "answer": answer,
             "source_documents": docs,
             "num_sources": len(docs),
+            "timings": timings,
+            "usage": usage,
+            "cached": False,
         }
+        # After a fallback the answer came from the whole corpus, not the filtered subset
+        if filter_fallback:
+            result["filter_fallback"] = True
+        elif metadata_filter is not None:
+            result["filter"] = metadata_filter
+
+        _log_timings(timings)
+        return result
+
+    def _run(
+        self,
+        question: str,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        priority: str = INTERACTIVE,
+    ) -> Dict[str, Any]:
+        query_start = time.perf_counter()
+        timings = _empty_timings()
+        metadata_filter, inferred = self._infer_filter(question, metadata_filter)
+
+        embedding = version = None
+        if self.cache is not None:
+            embedding = self._embed_question(question, timings)
+            version = self._collection_version()
+            cached = self._cache_hit(question, embedding, metadata_filter, version, timings, query_start)
+            if cached is not None:
+                return cached
+
+        docs, fallback = self._retrieve(question, metadata_filter, timings, embedding, inferred)
+        usage = {}
+        context, docs = self._build_context(question, docs, timings, usage)
+        answer = "".join(self._stream_answer(question, context, timings, priority))
+        timings["total_ms"] = _elapsed_ms(query_start)
+
+        result = self._result(question, answer, docs, metadata_filter, timings, usage, fallback)
+        self._cache_store(embedding, result, metadata_filter, version)
+        return result
+
+    async def _arun(
+        self,
+        question: str,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None,
+        priority: str = INTERACTIVE,
+    ) -> Dict[str, Any]:
+        query_start = time.perf_counter()
+        timings = _empty_timings()
+        metadata_filter, inferred = self._infer_filter(question, metadata_filter)
+
+        version = None
+        if self.cache is not None:
+            if embedding is None:
+                embedding = await self._aembed_question(question, timings)
+            version = await run_in_executor(None, self._collection_version)
+            cached = self._cache_hit(question, embedding, metadata_filter, version, timings, query_start)
+            if cached is not None:
+                return cached
 
-    def query_with_filter(self, question: str, metadata_filter: Dict[str, Any]) -> Dict[str, Any]:
+        docs, fallback = await self._aretrieve(question, metadata_filter, timings, embedding, inferred)
+        usage = {}
+        context, docs = self._build_context(question, docs, timings, usage)
+        answer = "".join([token async for token in self._astream_answer(question, context, timings, priority)])
+        timings["total_ms"] = _elapsed_ms(query_start)
+
+        result = self._result(question, answer, docs, metadata_filter, timings, usage, fallback)
+        self._cache_store(embedding, result, metadata_filter, version)
+        return result
+
+    def query(self, question: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        logger.info(f"Processing query: {question}")
+        return self._run(question, priority=priority)
+
+    def query_with_filter(
+        self, question: str, metadata_filter: Dict[str, Any], priority: str = INTERACTIVE
+    ) -> Dict[str, Any]:
         logger.info(f"Processing query with filter: {metadata_filter}")
+        return self._run(question, metadata_filter, priority)
 
-        def filtered_retrieval(query):
-            return self.retriever.vectorstore.similarity_search(
-                query=query,
-                k=Config.RETRIEVAL_K,
-                filter=metadata_filter
-            )
+    async def aquery(
+        self, question: str, embedding: Optional[List[float]] = None, priority: str = INTERACTIVE
+    ) -> Dict[str, Any]:
+        logger.info(f"Processing async query: {question}")
+        return await self._arun(question, embedding=embedding, priority=priority)
 
-        filtered_retriever = RunnableLambda(filtered_retrieval)
+    async def aquery_with_filter(
+        self,
+        question: str,
+        metadata_filter: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        priority: str = INTERACTIVE,
+    ) -> Dict[str, Any]:
+        logger.info(f"Processing async query with filter: {metadata_filter}")
+        return await self._arun(question, metadata_filter, embedding, priority)
 
-        docs = filtered_retrieval(question)
-        logger.info(f"Retrieved {len(docs)} documents with filter")
+    def embed_questions(self, questions: List[str]) -> Optional[List[List[float]]]:
+        embeddings = self._query_embeddings()
+        if embeddings is None:
+            return None
 
-        context = self._format_docs(docs)
-        prompt_value = self.prompt.invoke({"context": context, "question": question})
-        answer = self.llm.invoke(prompt_value)
+        # One forward pass for the whole batch, same as ChromaManager.embed_queries
+        return embeddings.embed_documents(list(questions))
 
-        return {
-            "question": question,
-            "answer": answer,
-            "source_documents": docs,
-            "num_sources": len(docs),
-            "filter": metadata_filter,
-        }
+    def stream(
+        self,
+        question: str,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        priority: str = INTERACTIVE,
+    ) -> Iterator[Dict[str, Any]]:
+        logger.info(f"Streaming query: {question}")
+        query_start = time.perf_counter()
+        timings = _empty_timings()
+        metadata_filter, inferred = self._infer_filter(question, metadata_filter)
 
-def create_rag_chain(vectorstore, llm_model: str = "gemma3n:e4b"):
-    retriever = vectorstore.as_retriever(
-        search_kwargs={"k": Config.RETRIEVAL_K}
-    )
+        embedding = version = None
+        if self.cache is not None:
+            embedding = self._embed_question(question, timings)
+            version = self._collection_version()
+            cached = self._cache_hit(question, embedding, metadata_filter, version, timings, query_start)
+            if cached is not None:
+                docs = cached["source_documents"]
+                yield {"type": "sources", "source_documents": docs, "num_sources": len(docs)}
+                yield {"type": "token", "content": cached["answer"]}
+                yield {"type": "result", **cached}
+                return
+
+        docs, fallback = self._retrieve(question, metadata_filter, timings, embedding, inferred)
+        usage = {}
+        context, docs = self._build_context(question, docs, timings, usage)
+        yield {"type": "sources", "source_documents": docs, "num_sources": len(docs)}
 
-    return RAGChain(retriever=retriever, llm_model=llm_model)
\ No newline at end of file
+        parts = []
+        for token in self._stream_answer(question, context, timings, priority):
+            parts.append(token)
+            yield {"type": "token", "content": token}
+        timings["total_ms"] = _elapsed_ms(query_start)
+
+        result = self._result(question, "".join(parts), docs, metadata_filter, timings, usage, fallback)
+        self._cache_store(embedding, result, metadata_filter, version)
+        yield {"type": "result", **result}
+
+def static_prompt_prefix(prompt: ChatPromptTemplate) -> str:
+    rendered = prompt.format(context=PREFIX_SENTINEL, question=PREFIX_SENTINEL)
+    return rendered.split(PREFIX_SENTINEL, 1)[0]
+
+def default_prompt_prefix() -> str:
+    return static_prompt_prefix(ChatPromptTemplate.from_template(APT_ATTRIBUTION_TEMPLATE))
+
+def _is_similarity_retriever(retriever) -> bool:
+    return isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity"
+
+def _manager_searcher(retriever):
+    if isinstance(retriever, HybridRetriever):
+        return retriever.manager.hybrid_search
+    if isinstance(retriever, ShardedRetriever):
+        return retriever.manager.sharded_similarity_search
+    if isinstance(retriever, TwoStageRetriever):
+        return retriever.manager.two_stage_search
+    return None
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+def _empty_timings() -> Dict[str, Optional[float]]:
+    return {key: None for key in TIMING_KEYS}
+
+def _log_timings(timings: Dict[str, Optional[float]]) -> None:
+    parts = [f"{key[:-3]}={value:.0f}ms" for key, value in timings.items() if value is not None]
+    logger.info(f"Timings: {', '.join(parts)}")
+
+def create_rag_chain(
+    vectorstore,
+    llm_model: str = "gemma3n:e4b",
+    retriever=None,
+    metadata_index=None,
+    cache=None,
+    context_budget: int = Config.CONTEXT_TOKEN_BUDGET,
+    stitch: bool = Config.STITCH_ADJACENT_CHUNKS,
+    reranker=None,
+    llm_manager=None,
+    scheduler=None,
+    parent_store=None,
+    auto_filter: bool = Config.AUTO_FILTER,
+):
+    if retriever is None:
+        retriever = vectorstore.as_retriever(
+            search_kwargs={"k": Config.RETRIEVAL_K}
+        )
+
+    return RAGChain(
+        retriever=retriever,
+        llm_model=llm_model,
+        metadata_index=metadata_index,
+        cache=cache,
+        context_budget=context_budget,
+        stitch=stitch,
+        reranker=reranker,
+        llm_manager=llm_manager,
+        scheduler=scheduler,
+        parent_store=parent_store,
+        auto_filter=auto_filter,
+    )
@@ -0,0 +1,158 @@
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from apt.config import Config
+
+SEPARATOR = "\n---\n"
+ELLIPSIS = "..."
+SENTENCE_END = re.compile(r"[.!?](?=\s)|\n\n")
+WORD_END = re.compile(r"\S(?=\s)")
+SCORE_KEYS = ("rerank_score", "rrf_score", "similarity")
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / Config.CHARS_PER_TOKEN)
+
+def _sigmoid(x: float) -> float:
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1 + z)
+
+def relevance_weights(docs: Sequence[Document], scores: Optional[Sequence[float]]) -> List[float]:
+    if scores is not None:
+        if len(scores) != len(docs):
+            raise ValueError("Number of scores must match number of documents")
+        if any(score < 0 for score in scores):
+            raise ValueError("Relevance scores must be non-negative")
+        return [float(score) for score in scores]
+
+    for key in SCORE_KEYS:
+        if docs and all(key in doc.metadata for doc in docs):
+            if key == "rerank_score":
+                # Cross-encoder logits are mostly negative, clamping them would zero every weight
+                return [_sigmoid(float(doc.metadata[key])) for doc in docs]
+            return [max(float(doc.metadata[key]), 0.0) for doc in docs]
+
+    # Retrieval order is the only relevance signal for plain similarity search
+    return [1 / rank for rank in range(1, len(docs) + 1)]
+
+class ContextPacker:
+    def __init__(
+        self,
+        budget: int = Config.CONTEXT_TOKEN_BUDGET,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        if budget < 1:
+            raise ValueError("Token budget must be positive")
+
+        self.budget = budget
+        self.count_tokens = count_tokens
+
+    def header(self, index: int, doc: Document) -> str:
+        source = doc.metadata.get("filename", "Unknown")
+        year = doc.metadata.get("year", "N/A")
+        return f"[Report {index}] Source: {source} (Year: {year})\n"
+
+    def _allocate(self, needs: List[int], weights: List[float], available: int) -> List[int]:
+        allocation = [0] * len(needs)
+        active = [i for i, need in enumerate(needs) if need > 0]
+
+        # Water-filling: chunks shorter than their share release the rest to the others
+        while active and available > 0:
+            total_weight = sum(weights[i] for i in active)
+            if total_weight > 0:
+                shares = {i: available * weights[i] / total_weight for i in active}
+            else:
+                shares = {i: available / len(active) for i in active}
+
+            satisfied = [i for i in active if needs[i] - allocation[i] <= shares[i]]
+            if not satisfied:
+                for i in active:
+                    allocation[i] += int(shares[i])
+                break
+
+            for i in satisfied:
+                available -= needs[i] - allocation[i]
+                allocation[i] = needs[i]
+            active = [i for i in active if i not in satisfied]
+
+        return allocation
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+
+        for pattern in (SENTENCE_END, WORD_END):
+            ends = [match.end() for match in pattern.finditer(text)]
+            end = self._last_fitting(text, ends, max_tokens)
+            if end is not None:
+                return text[:end].rstrip()
+
+        return ""
+
+    def _last_fitting(self, text: str, ends: List[int], max_tokens: int) -> Optional[int]:
+        # Prefix token counts grow with the prefix, so binary search the boundaries
+        lo, hi = 0, len(ends)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.count_tokens(text[:ends[mid]]) <= max_tokens:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return ends[lo - 1] if lo else None
+
+    def pack(
+        self,
+        docs: Sequence[Document],
+        scores: Optional[Sequence[float]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        weights = relevance_weights(docs, scores)
+        separator_tokens = self.count_tokens(SEPARATOR)
+
+        # Headers are never trimmed; the lowest-ranked reports go first when even they do not fit
+        order = sorted(range(len(docs)), key=lambda i: weights[i], reverse=True)
+        kept, used = [], 0
+        for i in order:
+            cost = self.count_tokens(self.header(len(docs), docs[i]) + "\n") + (separator_tokens if kept else 0)
+            if used + cost > self.budget:
+                continue
+            kept.append(i)
+            used += cost
+        kept.sort()
+
+        needs = [self.count_tokens(docs[i].page_content) for i in kept]
+        allocation = self._allocate(needs, [weights[i] for i in kept], self.budget - used)
+
+        parts, documents = [], []
+        for i, need, tokens in zip(kept, needs, allocation):
+            content = docs[i].page_content
+            truncated = tokens < need
+            if truncated:
+                content = self.trim(content, tokens - self.count_tokens(ELLIPSIS))
+                # A header with no content behind it only costs tokens
+                if not content:
+                    continue
+                content += ELLIPSIS
+
+            parts.append(f"{self.header(len(parts) + 1, docs[i])}{content}\n")
+            documents.append({
+                "index": i,
+                "chunk_id": docs[i].metadata.get("chunk_id"),
+                "tokens": self.count_tokens(content),
+                "original_tokens": need,
+                "truncated": truncated,
+            })
+
+        context = SEPARATOR.join(parts)
+        stats = {
+            "budget": self.budget,
+            "context_tokens": self.count_tokens(context),
+            "documents": documents,
+            "truncated": sum(doc["truncated"] for doc in documents),
+            "dropped": len(docs) - len(documents),
+        }
+        return context, stats
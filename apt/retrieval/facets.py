@@ -0,0 +1,54 @@
+import re
+from typing import List
+from apt.config import Config
+from apt.ingest.metadata import TECHNIQUE_PATTERN
+
+# Sentence ends, list items and sequencing phrases usually start a new behaviour
+FACET_BOUNDARY = re.compile(
+    r"\s*\n+\s*(?:[-*•]|\d+[.)])?\s*"
+    r"|(?<=[.!?;])\s+"
+    r"|,?\s+(?:and\s+)?then\s+"
+    r"|,?\s+followed by\s+",
+    re.IGNORECASE,
+)
+
+def split_facets(
+    description: str,
+    max_facets: int = Config.FACET_MAX_QUERIES,
+    min_chars: int = Config.FACET_MIN_CHARS,
+) -> List[str]:
+    facets: List[str] = []
+    pending = ""
+
+    for part in FACET_BOUNDARY.split(description):
+        part = (part or "").strip(" \t.;")
+        if not part:
+            continue
+
+        part = f"{pending} {part}".strip()
+        # Fragments too short to embed well ride along with the next one,
+        # unless they name a technique, which is a facet on its own
+        if len(part) < min_chars and not re.search(TECHNIQUE_PATTERN, part):
+            pending = part
+            continue
+
+        pending = ""
+        if part not in facets:
+            facets.append(part)
+
+    if pending:
+        if facets:
+            facets[-1] = f"{facets[-1]} {pending}"
+        else:
+            facets.append(pending)
+
+    return facets[:max_facets]
+
+def facet_queries(description: str, max_facets: int = Config.FACET_MAX_QUERIES) -> List[str]:
+    description = description.strip()
+    facets = split_facets(description, max_facets=max_facets)
+    if len(facets) <= 1:
+        return [description]
+
+    # The full description stays in, so reports matching the overall pattern still rank
+    return [description] + [facet for facet in facets if facet != description]
@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from langchain_ollama import OllamaLLM
+from loguru import logger
+from apt.config import Config
+
+def ollama_kwargs(
+    keep_alive: Optional[str] = Config.OLLAMA_KEEP_ALIVE,
+    base_url: Optional[str] = Config.OLLAMA_BASE_URL,
+    max_connections: int = Config.OLLAMA_MAX_CONNECTIONS,
+) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return {"keep_alive": keep_alive, "base_url": base_url, "client_kwargs": {"limits": limits}}
+
+class LLMClientManager:
+    def __init__(
+        self,
+        keep_alive: Optional[str] = Config.OLLAMA_KEEP_ALIVE,
+        base_url: Optional[str] = Config.OLLAMA_BASE_URL,
+        max_connections: int = Config.OLLAMA_MAX_CONNECTIONS,
+    ):
+        self.keep_alive = keep_alive
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._clients: Dict[Tuple[str, Tuple], OllamaLLM] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str, **llm_kwargs) -> OllamaLLM:
+        key = (model, tuple(sorted(llm_kwargs.items())))
+
+        with self._lock:
+            if key not in self._clients:
+                logger.info(f"Initializing LLM: {model} (keep_alive={self.keep_alive})")
+                self._clients[key] = OllamaLLM(
+                    model=model,
+                    **ollama_kwargs(self.keep_alive, self.base_url, self.max_connections),
+                    **llm_kwargs,
+                )
+            return self._clients[key]
+
+    def warm_up(self, model: str, prefix: str = "", background: bool = False) -> Optional[threading.Thread]:
+        if background:
+            thread = threading.Thread(target=self.warm_up, args=(model, prefix), daemon=True)
+            thread.start()
+            return thread
+
+        llm = self.get(model)
+        start = time.perf_counter()
+        try:
+            # Loads the weights and, with a prefix, primes Ollama's prompt cache for it
+            llm._client.generate(
+                model=model,
+                prompt=prefix,
+                keep_alive=self.keep_alive,
+                options={"num_predict": 1},
+            )
+        except Exception as e:
+            logger.warning(f"Warm-up of {model} failed: {e}")
+            return None
+
+        logger.info(f"Warmed up {model} in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+_default_manager: Optional[LLMClientManager] = None
+
+def get_llm_manager() -> LLMClientManager:
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = LLMClientManager()
+    return _default_manager
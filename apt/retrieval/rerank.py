@@ -0,0 +1,83 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from loguru import logger
+from apt.config import Config
+
+def _cache_id(doc: Document) -> str:
+    chunk_id = doc.metadata.get("chunk_id") or doc.id
+    if chunk_id:
+        return chunk_id
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = Config.RERANK_MODEL,
+        batch_size: int = Config.RERANK_BATCH_SIZE,
+        cache_size: int = Config.RERANK_CACHE_SIZE,
+        device: str = "cpu",
+        model: Any = None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.device = device
+        self._model = model
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Loading cross-encoder: {self.model_name} on {self.device}")
+            self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def score(self, query: str, docs: List[Document]) -> List[float]:
+        keys = [(query, _cache_id(doc)) for doc in docs]
+        missing = [i for i, key in enumerate(keys) if key not in self._scores]
+        self.hits += len(docs) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            pairs = [(query, docs[i].page_content) for i in missing]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            for i, score in zip(missing, predicted):
+                self._scores[keys[i]] = float(score)
+
+        scores = [self._scores[key] for key in keys]
+        for key in keys:
+            self._scores.move_to_end(key)
+        while len(self._scores) > self.cache_size:
+            self._scores.popitem(last=False)
+
+        return scores
+
+    def rerank(self, query: str, docs: List[Document], top_n: Optional[int] = Config.RERANK_TOP_N) -> List[Document]:
+        if not docs:
+            return []
+
+        scores = self.score(query, docs)
+        ranked = sorted(zip(docs, scores), key=lambda item: item[1], reverse=True)[:top_n]
+
+        reranked = []
+        for doc, score in ranked:
+            doc = Document(page_content=doc.page_content, metadata={**doc.metadata, "rerank_score": score}, id=doc.id)
+            reranked.append(doc)
+
+        logger.info(f"Reranked {len(docs)} candidates to {len(reranked)}")
+        return reranked
+
+    def cache_info(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._scores),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,218 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from apt.config import Config
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Lower rank is admitted first
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+class QueueTimeoutError(TimeoutError):
+    pass
+
+class _Waiter:
+    def __init__(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.abandoned = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = Config.LLM_MAX_CONCURRENCY,
+        deadlines: Optional[Dict[str, Optional[float]]] = None,
+        metrics_window: int = Config.LLM_QUEUE_METRICS_WINDOW,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+
+        self.max_concurrency = max_concurrency
+        self.deadlines = {
+            INTERACTIVE: Config.LLM_INTERACTIVE_QUEUE_DEADLINE,
+            BATCH: Config.LLM_BATCH_QUEUE_DEADLINE,
+            **(deadlines or {}),
+        }
+        self.active = 0
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._service_s: Optional[float] = None
+
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=metrics_window) for p in PRIORITIES}
+        self._admitted = {p: 0 for p in PRIORITIES}
+        self._shed = {p: 0 for p in PRIORITIES}
+        self._max_depth = 0
+
+    def _check_priority(self, priority: str) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+
+    def _queued(self, priority: Optional[str] = None) -> int:
+        return sum(1 for _, _, w in self._queue if not w.abandoned and (priority is None or w.priority == priority))
+
+    def _estimated_wait(self, priority: str) -> Optional[float]:
+        if self._service_s is None:
+            return None
+        ahead = sum(
+            1 for rank, _, w in self._queue
+            if not w.abandoned and rank <= PRIORITIES[priority]
+        )
+        return (ahead // self.max_concurrency + 1) * self._service_s
+
+    def _try_admit(self, waiter: _Waiter) -> bool:
+        # Called with the lock held
+        if self.active < self.max_concurrency and not self._queued():
+            self.active += 1
+            self._grant(waiter)
+            return True
+
+        deadline = self.deadlines.get(waiter.priority)
+        estimate = self._estimated_wait(waiter.priority)
+        if deadline is not None and estimate is not None and estimate > deadline:
+            self._shed[waiter.priority] += 1
+            raise QueueTimeoutError(
+                f"LLM queue too deep for {waiter.priority} request: ~{estimate:.0f}s wait exceeds {deadline:.0f}s"
+            )
+
+        heapq.heappush(self._queue, (PRIORITIES[waiter.priority], next(self._seq), waiter))
+        self._max_depth = max(self._max_depth, self._queued())
+        return False
+
+    def _grant(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self._admitted[waiter.priority] += 1
+        self._waits[waiter.priority].append((time.perf_counter() - waiter.enqueued) * 1000)
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        # Returns True when the slot was handed over before the waiter gave up
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.abandoned = True
+            self._shed[waiter.priority] += 1
+            return False
+
+    def _timeout_error(self, waiter: _Waiter) -> QueueTimeoutError:
+        deadline = self.deadlines.get(waiter.priority)
+        logger.warning(f"Shedding {waiter.priority} LLM request after {deadline:.0f}s in queue")
+        return QueueTimeoutError(f"{waiter.priority} request waited longer than {deadline:.0f}s for the LLM")
+
+    def acquire(self, priority: str = INTERACTIVE) -> None:
+        self._check_priority(priority)
+        waiter = _Waiter(priority)
+
+        with self._lock:
+            if self._try_admit(waiter):
+                return
+
+        if waiter.event.wait(timeout=self.deadlines.get(priority)):
+            return
+        if not self._abandon(waiter):
+            raise self._timeout_error(waiter)
+
+    async def aacquire(self, priority: str = INTERACTIVE) -> None:
+        self._check_priority(priority)
+        waiter = _Waiter(priority, asyncio.get_running_loop())
+
+        with self._lock:
+            if self._try_admit(waiter):
+                return
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.deadlines.get(priority))
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise self._timeout_error(waiter)
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+
+    def release(self, service_s: Optional[float] = None) -> None:
+        with self._lock:
+            if service_s is not None:
+                # Moving average keeps the admission estimate current as prompts change
+                self._service_s = service_s if self._service_s is None else 0.8 * self._service_s + 0.2 * service_s
+
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.abandoned:
+                    continue
+                # The slot passes straight to the next waiter, so active is unchanged
+                self._grant(waiter)
+                waiter.wake()
+                return
+
+            self.active -= 1
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE) -> Iterator[None]:
+        self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def aslot(self, priority: str = INTERACTIVE) -> AsyncIterator[None]:
+        await self.aacquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "active": self.active,
+                "max_concurrency": self.max_concurrency,
+                "queued": self._queued(),
+                "max_queued": self._max_depth,
+                "mean_service_s": self._service_s,
+            }
+            for priority in PRIORITIES:
+                waits = np.fromiter(self._waits[priority], dtype=float)
+                stats[priority] = {
+                    "queued": self._queued(priority),
+                    "admitted": self._admitted[priority],
+                    "shed": self._shed[priority],
+                    "wait_p50_ms": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                    "wait_p95_ms": float(np.percentile(waits, 95)) if len(waits) else 0.0,
+                    "wait_max_ms": float(waits.max()) if len(waits) else 0.0,
+                }
+            return stats
+
+_default_scheduler: Optional[LLMScheduler] = None
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = LLMScheduler()
+    return _default_scheduler
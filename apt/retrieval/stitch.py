@@ -0,0 +1,117 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from loguru import logger
+from apt.config import Config
+from apt.retrieval.context import SCORE_KEYS
+
+def _source_key(doc: Document) -> Tuple[str, Optional[int]]:
+    source = str(doc.metadata.get("source") or doc.metadata.get("filename", "unknown"))
+    # pdfplumber yields one document per page, so offsets restart on every page
+    return source, doc.metadata.get("page")
+
+def _position(doc: Document) -> Tuple[int, int]:
+    return doc.metadata.get("start_index", -1), doc.metadata.get("chunk_index", -1)
+
+def text_overlap(left: str, right: str, max_overlap: int = Config.CHUNK_OVERLAP) -> int:
+    # Longest suffix of left that is also a prefix of right
+    for size in range(min(len(left), len(right), max_overlap), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _merge_offset(left: Document, right: Document) -> Optional[int]:
+    left_start = left.metadata.get("start_index")
+    right_start = right.metadata.get("start_index")
+
+    if left_start is not None and right_start is not None:
+        overlap = left_start + len(left.page_content) - right_start
+        if 0 <= overlap <= len(right.page_content) and left.page_content.endswith(right.page_content[:overlap]):
+            return overlap
+
+    # Chunks embedded before start offsets were recorded only carry their index
+    left_index = left.metadata.get("chunk_index")
+    right_index = right.metadata.get("chunk_index")
+    if left_index is not None and right_index == left_index + 1:
+        overlap = text_overlap(left.page_content, right.page_content)
+        if overlap:
+            return overlap
+
+    return None
+
+def _merge(passage: List[Document], offsets: List[int]) -> Document:
+    text = passage[0].page_content
+    for doc, overlap in zip(passage[1:], offsets):
+        text += doc.page_content[overlap:]
+
+    metadata = dict(passage[0].metadata)
+    metadata["merged_chunk_ids"] = [doc.metadata.get("chunk_id") for doc in passage]
+    for key in SCORE_KEYS:
+        scores = [doc.metadata[key] for doc in passage if key in doc.metadata]
+        if scores:
+            metadata[key] = max(scores)
+
+    return Document(page_content=text, metadata=metadata, id=passage[0].id)
+
+def stitch_adjacent_chunks(docs: List[Document]) -> List[Document]:
+    groups: Dict[Tuple[str, Optional[int]], List[int]] = defaultdict(list)
+    for i, doc in enumerate(docs):
+        groups[_source_key(doc)].append(i)
+
+    # Each passage takes the rank of its best-ranked chunk
+    passages: List[Tuple[int, Document]] = []
+    for members in groups.values():
+        members.sort(key=lambda i: _position(docs[i]))
+
+        run, offsets = [members[0]], []
+        for i in members[1:]:
+            overlap = _merge_offset(docs[run[-1]], docs[i])
+            if overlap is not None:
+                run.append(i)
+                offsets.append(overlap)
+                continue
+
+            passages.append(_passage(docs, run, offsets))
+            run, offsets = [i], []
+        passages.append(_passage(docs, run, offsets))
+
+    passages.sort(key=lambda item: item[0])
+    stitched = [doc for _, doc in passages]
+
+    if len(stitched) < len(docs):
+        logger.info(f"Stitched {len(docs)} chunks into {len(stitched)} passages")
+
+    return stitched
+
+def _passage(docs: List[Document], run: List[int], offsets: List[int]) -> Tuple[int, Document]:
+    if len(run) == 1:
+        return run[0], docs[run[0]]
+    return min(run), _merge([docs[i] for i in run], offsets)
+
+def expand_to_parents(docs: List[Document], parent_store) -> List[Document]:
+    parent_ids = list(dict.fromkeys(doc.metadata["parent_id"] for doc in docs if doc.metadata.get("parent_id")))
+    if not parent_ids:
+        return docs
+
+    parents = parent_store.get(parent_ids)
+    if len(parents) < len(parent_ids):
+        logger.warning(f"{len(parent_ids) - len(parents)} parent sections missing from the parent store")
+
+    # Each parent takes the rank and best scores of its highest-ranked child
+    expanded: Dict[str, Document] = {}
+    for doc in docs:
+        parent = parents.get(doc.metadata.get("parent_id"))
+        if parent is None:
+            expanded[doc.metadata.get("chunk_id") or doc.id] = doc
+            continue
+
+        if parent.id not in expanded:
+            parent.metadata["child_chunk_ids"] = []
+            expanded[parent.id] = parent
+        parent.metadata["child_chunk_ids"].append(doc.metadata.get("chunk_id"))
+        for key in SCORE_KEYS:
+            if key in doc.metadata:
+                parent.metadata[key] = max(parent.metadata.get(key, doc.metadata[key]), doc.metadata[key])
+
+    logger.info(f"Expanded {len(docs)} chunks into {len(expanded)} parent sections")
+    return list(expanded.values())
@@ -0,0 +1,5 @@
+from apt.service.app import QueryService, create_app
+from apt.service.batcher import EmbeddingBatcher
+from apt.service.metrics import LatencyTracker
+
+__all__ = ["EmbeddingBatcher", "LatencyTracker", "QueryService", "create_app"]
@@ -0,0 +1,201 @@
+import time
+from typing import Any, Dict, Optional
+from aiohttp import web
+from langchain_core.runnables.config import run_in_executor
+from loguru import logger
+from apt.config import Config
+from apt.retrieval.attribution import build_attribution_prompt
+from apt.retrieval.bulk import serialize_sources
+from apt.retrieval.scheduler import INTERACTIVE, PRIORITIES, QueueTimeoutError
+from apt.retrieval.stitch import stitch_adjacent_chunks
+from apt.service.batcher import EmbeddingBatcher
+from apt.service.metrics import LatencyTracker
+
+class QueryService:
+    def __init__(
+        self,
+        chroma_manager,
+        rag_chain,
+        llm,
+        batcher: Optional[EmbeddingBatcher] = None,
+        reranker=None,
+        attribution_k: int = 10,
+    ):
+        self.chroma_manager = chroma_manager
+        self.rag_chain = rag_chain
+        self.llm = llm
+        self.batcher = batcher or EmbeddingBatcher(chroma_manager.embeddings)
+        self.reranker = reranker
+        self.attribution_k = attribution_k
+        self.packer = rag_chain.packer
+        self.latency = LatencyTracker()
+
+    @web.middleware
+    async def track_latency(self, request: web.Request, handler):
+        start = time.perf_counter()
+        error = False
+        try:
+            return await handler(request)
+        except Exception:
+            error = True
+            raise
+        finally:
+            route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+            self.latency.record(f"{request.method} {route}", (time.perf_counter() - start) * 1000, error)
+
+    async def _answer(
+        self, question: str, metadata_filter: Optional[Dict[str, Any]], priority: str
+    ) -> Dict[str, Any]:
+        embedding = await self.batcher.embed(question)
+
+        if metadata_filter:
+            result = await self.rag_chain.aquery_with_filter(question, metadata_filter, embedding, priority)
+        else:
+            result = await self.rag_chain.aquery(question, embedding, priority)
+
+        return {
+            "question": question,
+            "filter": metadata_filter,
+            "filter_fallback": result.get("filter_fallback", False),
+            "answer": result["answer"],
+            "sources": serialize_sources(result["source_documents"]),
+            "timings": result["timings"],
+            "usage": result["usage"],
+            "cached": result["cached"],
+        }
+
+    async def query(self, request: web.Request) -> web.Response:
+        body = await _json_body(request)
+        question = _required(body, "question")
+        return web.json_response(await self._answer(question, body.get("filter"), _priority(body)))
+
+    async def query_with_filter(self, request: web.Request) -> web.Response:
+        body = await _json_body(request)
+        question = _required(body, "question")
+        metadata_filter = _required(body, "filter")
+        if not isinstance(metadata_filter, dict):
+            raise web.HTTPBadRequest(text="filter must be an object")
+
+        return web.json_response(await self._answer(question, metadata_filter, _priority(body)))
+
+    async def search(self, request: web.Request) -> web.Response:
+        body = await _json_body(request)
+        query = _required(body, "query")
+        k = int(body.get("k", Config.RETRIEVAL_K))
+
+        embedding = await self.batcher.embed(query)
+        docs = await run_in_executor(
+            None, self.chroma_manager.similarity_search_by_vector, embedding, k, body.get("filter")
+        )
+
+        return web.json_response({
+            "query": query,
+            "results": [
+                {**source, "content": doc.page_content}
+                for source, doc in zip(serialize_sources(docs), docs)
+            ],
+        })
+
+    async def attribute(self, request: web.Request) -> web.Response:
+        body = await _json_body(request)
+        description = _required(body, "description")
+        k = int(body.get("k", self.attribution_k))
+
+        embedding = await self.batcher.embed(description)
+        fetch_k = max(k, Config.RERANK_FETCH_K) if self.reranker else k
+        docs = await run_in_executor(None, self.chroma_manager.similarity_search_by_vector, embedding, fetch_k)
+
+        if self.reranker:
+            docs = await run_in_executor(None, self.reranker.rerank, description, docs, min(k, Config.RERANK_TOP_N))
+        docs = stitch_adjacent_chunks(docs)
+
+        prompt, context_stats = build_attribution_prompt(description, docs, self.packer)
+        start = time.perf_counter()
+        async with self.rag_chain.scheduler.aslot(_priority(body)):
+            queue_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            attribution = await self.llm.ainvoke(prompt)
+            llm_ms = (time.perf_counter() - start) * 1000
+
+        response = {
+            "description": description,
+            "attribution": attribution,
+            "sources": serialize_sources(docs),
+            "usage": {"prompt_tokens": context_stats["prompt_tokens"], "context_tokens": context_stats["context_tokens"]},
+            "queue_ms": queue_ms,
+            "llm_ms": llm_ms,
+        }
+        if getattr(self.chroma_manager, "actor_profiles", None) is not None:
+            response["candidate_actors"] = self.chroma_manager.actor_profiles.rank(embedding)
+
+        return web.json_response(response)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        metrics = {
+            "latency": self.latency.snapshot(),
+            "embedding_batches": self.batcher.stats(),
+            "llm_queue": self.rag_chain.scheduler.stats(),
+        }
+        if self.rag_chain.cache is not None:
+            metrics["answer_cache"] = self.rag_chain.cache.stats()
+        if self.reranker is not None:
+            metrics["rerank_cache"] = self.reranker.cache_info()
+        return web.json_response(metrics)
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def shutdown(self, app: web.Application) -> None:
+        # Let in-flight embedding batches resolve their waiting requests
+        await self.batcher.close()
+
+def create_app(service: QueryService) -> web.Application:
+    app = web.Application(middlewares=[_error_middleware, service.track_latency])
+    app.add_routes([
+        web.post("/query", service.query),
+        web.post("/query/filter", service.query_with_filter),
+        web.post("/search", service.search),
+        web.post("/attribute", service.attribute),
+        web.get("/metrics", service.metrics),
+        web.get("/health", service.health),
+    ])
+    app.on_shutdown.append(service.shutdown)
+    return app
+
+@web.middleware
+async def _error_middleware(request: web.Request, handler):
+    try:
+        return await handler(request)
+    except web.HTTPException as e:
+        if e.status < 400:
+            raise
+        return web.json_response({"error": e.text}, status=e.status)
+    except QueueTimeoutError as e:
+        # Shed requests tell the client to come back rather than hang
+        return web.json_response({"error": str(e)}, status=503, headers={"Retry-After": "30"})
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.exception(f"{request.method} {request.path} failed")
+        return web.json_response({"error": str(e)}, status=500)
+
+async def _json_body(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object")
+    return body
+
+def _priority(body: Dict[str, Any]) -> str:
+    priority = body.get("priority", INTERACTIVE)
+    if priority not in PRIORITIES:
+        raise web.HTTPBadRequest(text=f"priority must be one of: {', '.join(PRIORITIES)}")
+    return priority
+
+def _required(body: Dict[str, Any], field: str) -> Any:
+    if not body.get(field):
+        raise web.HTTPBadRequest(text=f"Missing required field: {field}")
+    return body[field]
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from langchain_core.runnables.config import run_in_executor
+from loguru import logger
+from apt.config import Config
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embeddings,
+        window_ms: float = Config.SERVICE_BATCH_WINDOW_MS,
+        max_batch_size: int = Config.SERVICE_MAX_BATCH_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("Batch size must be positive")
+
+        self.embeddings = embeddings
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only holds weak references to tasks, an unreferenced batch could be collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            # Requests arriving within the window share one forward pass
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_soon(self._flush)
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        if self._pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+
+        try:
+            vectors = await run_in_executor(None, self.embeddings.embed_documents, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(texts)
+        logger.debug(f"Embedded batch of {len(texts)} in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+        }
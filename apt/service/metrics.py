@@ -0,0 +1,31 @@
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+import numpy as np
+from apt.config import Config
+
+PERCENTILES = (50, 90, 95, 99)
+
+class LatencyTracker:
+    def __init__(self, window: int = Config.SERVICE_LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, latency_ms: float, error: bool = False) -> None:
+        self._samples[route].append(latency_ms)
+        self._counts[route] += 1
+        if error:
+            self._errors[route] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        routes = {}
+        for route, samples in self._samples.items():
+            values = np.fromiter(samples, dtype=float)
+            routes[route] = {
+                "count": self._counts[route],
+                "errors": self._errors[route],
+                **{f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES},
+                "max_ms": float(values.max()),
+            }
+        return routes
@@ -1,3 +1,29 @@
-from apt.store.chroma import ChromaManager
+from apt.store.chroma import ChromaManager, HybridRetriever, TwoStageRetriever
+from apt.store.bm25 import BM25Index, build_bm25_index
+from apt.store.fusion import reciprocal_rank_fusion
+from apt.store.metadata_index import MetadataIndex, build_metadata_index
+from apt.store.ioc_index import IOCIndex, build_ioc_index
+from apt.store.analytics import AnalyticsStore, build_analytics_store
+from apt.store.parents import ParentStore, build_parent_store
+from apt.store.profiles import ActorProfileIndex, build_actor_profiles
+from apt.store.reports import ReportAggregator
 
-__all__ = ["ChromaManager"]
+__all__ = [
+    "ChromaManager",
+    "HybridRetriever",
+    "TwoStageRetriever",
+    "BM25Index",
+    "build_bm25_index",
+    "reciprocal_rank_fusion",
+    "MetadataIndex",
+    "build_metadata_index",
+    "IOCIndex",
+    "build_ioc_index",
+    "AnalyticsStore",
+    "build_analytics_store",
+    "ParentStore",
+    "build_parent_store",
+    "ActorProfileIndex",
+    "build_actor_profiles",
+    "ReportAggregator",
+]
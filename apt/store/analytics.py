@@ -0,0 +1,222 @@
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from loguru import logger
+from apt.ingest.dedup import duplicate_sources
+from apt.ingest.metadata import normalize_ioc
+from apt.store.metadata_index import field_values, normalize_value
+
+# CLI/API field name -> chunk metadata key
+TAG_FIELDS = {
+    "group": "apt_groups_mentioned",
+    "technique": "techniques_mentioned",
+    "ioc": "iocs",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    filename TEXT PRIMARY KEY,
+    year INTEGER,
+    page_count INTEGER,
+    chunk_count INTEGER NOT NULL,
+    chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    year INTEGER,
+    page INTEGER,
+    chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    chunk_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    year INTEGER,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_year ON reports (year);
+CREATE INDEX IF NOT EXISTS idx_chunks_filename ON chunks (filename);
+CREATE INDEX IF NOT EXISTS idx_tags_value ON tags (field, value, year, filename);
+CREATE INDEX IF NOT EXISTS idx_tags_filename ON tags (filename, field, value);
+CREATE INDEX IF NOT EXISTS idx_tags_chunk ON tags (chunk_id, field, value);
+"""
+
+def _normalize(field: str, value: Any) -> str:
+    if field == "ioc":
+        # Same keys as IOCIndex, so defanged queries match the refanged values stored at ingest
+        return normalize_ioc(str(value))
+    return normalize_value(TAG_FIELDS[field], value)
+
+def _check_field(field: str) -> None:
+    if field not in TAG_FIELDS:
+        raise ValueError(f"Unknown field: {field} (expected one of {', '.join(TAG_FIELDS)})")
+
+class AnalyticsStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self.connection.execute(sql, list(params)).fetchall()
+
+    def add(self, chunks: List[Document], pages: Optional[List[Document]] = None) -> None:
+        page_counts: Dict[str, int] = defaultdict(int)
+        years: Dict[str, Optional[int]] = {}
+        for page in pages or []:
+            filename = page.metadata.get("filename")
+            years.setdefault(filename, page.metadata.get("year"))
+            count = page.metadata.get("total_pages") or (page.metadata["page"] + 1 if "page" in page.metadata else 0)
+            page_counts[filename] = max(page_counts[filename], count)
+
+        reports: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        chunk_rows, tag_rows = [], []
+        for chunk in chunks:
+            metadata = chunk.metadata
+            filename = str(metadata.get("filename", "unknown"))
+            years.setdefault(filename, metadata.get("year"))
+            reports[filename][0] += 1
+            reports[filename][1] += len(chunk.page_content)
+            chunk_rows.append((metadata["chunk_id"], filename, metadata.get("year"), metadata.get("page"), len(chunk.page_content)))
+
+            # Deduplicated copies still count for the reports they came from
+            sources = [filename]
+            for source, year in duplicate_sources(metadata):
+                years.setdefault(source, year)
+                sources.append(source)
+            for field, key in TAG_FIELDS.items():
+                if field == "ioc":
+                    values = {normalize_ioc(v) for v in str(metadata.get(key) or "").split(", ") if v}
+                else:
+                    values = set(field_values(key, metadata.get(key)))
+                for value in values:
+                    for source in sources:
+                        tag_rows.append((metadata["chunk_id"], source, years.get(source), field, value))
+            for source in sources[1:]:
+                reports.setdefault(source, [0, 0])
+
+        # Reports whose chunks were all deduplicated away still exist for counting
+        for filename in page_counts:
+            reports.setdefault(filename, [0, 0])
+        report_rows = [
+            (filename, years.get(filename), page_counts.get(filename) or None, count, chars)
+            for filename, (count, chars) in reports.items()
+        ]
+
+        with self._lock:
+            self.connection.executemany("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)", report_rows)
+            self.connection.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)", chunk_rows)
+            self.connection.executemany("INSERT INTO tags VALUES (?, ?, ?, ?, ?)", tag_rows)
+            self.connection.commit()
+
+        logger.info(f"Analytics store: {len(report_rows)} reports, {len(chunk_rows)} chunks, {len(tag_rows)} tags")
+
+    def _conditions(
+        self,
+        group: Optional[str] = None,
+        technique: Optional[str] = None,
+        ioc: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> Tuple[str, List[Any]]:
+        # Each tag condition is a report-level semi-join, so they combine with AND
+        clauses, params = [], []
+        for field, value in (("group", group), ("technique", technique), ("ioc", ioc)):
+            if value is not None:
+                clauses.append("r.filename IN (SELECT filename FROM tags WHERE field = ? AND value = ?)")
+                params.extend([field, _normalize(field, value)])
+        if year is not None:
+            clauses.append("r.year = ?")
+            params.append(int(year))
+
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def report_count(self, **conditions) -> int:
+        where, params = self._conditions(**conditions)
+        return self._query(f"SELECT COUNT(*) FROM reports r{where}", params)[0][0]
+
+    def reports(self, limit: Optional[int] = None, **conditions) -> List[Dict[str, Any]]:
+        where, params = self._conditions(**conditions)
+        sql = f"SELECT filename, year, page_count, chunk_count FROM reports r{where} ORDER BY year, filename"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [
+            {"filename": filename, "year": year, "page_count": pages, "chunk_count": count}
+            for filename, year, pages, count in self._query(sql, params)
+        ]
+
+    def top_values(self, field: str, limit: int = 10, **conditions) -> List[Tuple[str, int]]:
+        _check_field(field)
+        where, params = self._conditions(**conditions)
+        sql = (
+            f"SELECT t.value, COUNT(DISTINCT t.filename) AS n FROM tags t "
+            f"JOIN reports r ON r.filename = t.filename{where}{' AND' if where else ' WHERE'} t.field = ? "
+            f"GROUP BY t.value ORDER BY n DESC, t.value LIMIT ?"
+        )
+        return self._query(sql, params + [field, limit])
+
+    def co_occurring(
+        self, field: str, value: str, other_field: str, limit: int = 10, level: str = "report"
+    ) -> List[Tuple[str, int]]:
+        _check_field(field)
+        _check_field(other_field)
+        if level not in ("report", "chunk"):
+            raise ValueError(f"Unknown co-occurrence level: {level} (expected report or chunk)")
+
+        # Report level: both named anywhere in the same report; chunk level: in the same passage
+        key = "filename" if level == "report" else "chunk_id"
+        value = _normalize(field, value)
+        sql = (
+            f"SELECT value, COUNT(DISTINCT {key}) AS n FROM tags "
+            f"WHERE field = ? AND {key} IN (SELECT {key} FROM tags WHERE field = ? AND value = ?) "
+            f"AND NOT (field = ? AND value = ?) "
+            f"GROUP BY value ORDER BY n DESC, value LIMIT ?"
+        )
+        return self._query(sql, [other_field, field, value, field, value, limit])
+
+    def trend(self, field: str, value: str) -> List[Tuple[Optional[int], int]]:
+        _check_field(field)
+        return self._query(
+            "SELECT year, COUNT(DISTINCT filename) FROM tags WHERE field = ? AND value = ? GROUP BY year ORDER BY year",
+            [field, _normalize(field, value)],
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        reports, pages, chunks = self._query("SELECT COUNT(*), SUM(page_count), SUM(chunk_count) FROM reports")[0]
+        tags = dict(self._query("SELECT field, COUNT(DISTINCT value) FROM tags GROUP BY field"))
+        return {
+            "reports": reports,
+            "pages": pages or 0,
+            "chunks": chunks or 0,
+            **{f"{field}s": tags.get(field, 0) for field in TAG_FIELDS},
+        }
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+def build_analytics_store(
+    chunks: List[Document], path: Path, pages: Optional[List[Document]] = None
+) -> AnalyticsStore:
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    store = AnalyticsStore(path)
+    store.add(chunks, pages)
+    return store
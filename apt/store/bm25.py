@@ -0,0 +1,167 @@
+import math
+import pickle
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+from loguru import logger
+from apt.config import Config
+
+# Keeps dotted/hyphenated identifiers (T1566.001, evil-domain.com, hashes) intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9._\-/:@]*[a-z0-9]|[a-z0-9]")
+SUBTOKEN_SPLIT = re.compile(r"[._\-/:@]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "which", "with",
+}
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+
+        parts = [part for part in SUBTOKEN_SPLIT.split(token) if part]
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in STOPWORDS)
+
+    return tokens
+
+class BM25Index:
+    def __init__(self, k1: float = Config.BM25_K1, b: float = Config.BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._positions: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def average_length(self) -> float:
+        if not self.doc_ids:
+            return 0.0
+        return self._total_length / len(self.doc_ids)
+
+    def add(self, doc_id: str, text: str) -> None:
+        # Re-adding a chunk replaces it, chunk ids are deterministic so re-ingest is routine
+        if doc_id in self._positions:
+            self._remove({self._positions[doc_id]})
+        self._insert(doc_id, text)
+
+    def add_documents(self, documents: Iterable[Document]) -> None:
+        latest = {doc.metadata["chunk_id"]: doc for doc in documents}
+        replaced = {self._positions[doc_id] for doc_id in latest if doc_id in self._positions}
+        if replaced:
+            self._remove(replaced)
+
+        for doc_id, doc in latest.items():
+            self._insert(doc_id, doc.page_content)
+
+    def _insert(self, doc_id: str, text: str) -> None:
+        terms = tokenize(text)
+
+        position = self._positions.get(doc_id)
+        if position is None:
+            position = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(0)
+            self._positions[doc_id] = position
+
+        self.doc_lengths[position] = len(terms)
+        self._total_length += len(terms)
+
+        for term, freq in Counter(terms).items():
+            self.postings[term][position] = freq
+
+    def _remove(self, positions: Set[int]) -> None:
+        # One pass over the vocabulary per batch, positions are reused by the replacements
+        for term in list(self.postings):
+            postings = self.postings[term]
+            for position in positions & postings.keys():
+                del postings[position]
+            if not postings:
+                del self.postings[term]
+
+        for position in positions:
+            self._total_length -= self.doc_lengths[position]
+            self.doc_lengths[position] = 0
+
+    def search(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        candidates: Optional[Set[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        if not self.doc_ids:
+            return []
+
+        allowed = None
+        if candidates is not None:
+            allowed = {self._positions[doc_id] for doc_id in candidates if doc_id in self._positions}
+
+        total_docs = len(self.doc_ids)
+        avg_length = self.average_length or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, freq in postings.items():
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_length)
+                scores[position] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.doc_ids[position], score) for position, score in ranked]
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        state = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": dict(self.postings),
+        }
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logger.info(f"Saved BM25 index ({len(self)} documents, {len(self.postings):,} terms) to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+
+        index = cls(k1=state["k1"], b=state["b"])
+        index.doc_ids = state["doc_ids"]
+        index.doc_lengths = state["doc_lengths"]
+        index.postings = defaultdict(dict, state["postings"])
+        index._positions = {doc_id: i for i, doc_id in enumerate(index.doc_ids)}
+        index._total_length = sum(index.doc_lengths)
+
+        return index
+
+def build_bm25_index(documents: List[Document], path: Optional[Path] = None) -> BM25Index:
+    index = BM25Index()
+    index.add_documents(documents)
+
+    if path is not None:
+        index.save(path)
+
+    return index
@@ -1,11 +1,26 @@
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import chromadb
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores.utils import filter_complex_metadata
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from loguru import logger
 from apt.config import Config
+from apt.ingest.chunker import assign_chunk_ids
+from apt.store.bm25 import BM25Index, build_bm25_index
+from apt.store.fusion import reciprocal_rank_fusion
+from apt.store.hnsw import distance_to_similarity, hnsw_metadata, hnsw_params
+from apt.store.ioc_index import IOCIndex
+from apt.store.metadata_index import MetadataIndex, candidate_where
+from apt.store.profiles import ActorProfileIndex, build_actor_profiles
+from apt.store.reports import ReportAggregator
 
 try:
     import torch
@@ -13,16 +28,22 @@ try:
 except ImportError:
     HAS_TORCH = False
 
+SHARD_SEPARATOR = "__year_"
+REPORT_SUFFIX = "__reports"
+UNKNOWN_SHARD = "unknown"
+
 class ChromaManager:
     def __init__(
         self,
         persist_directory: Path = Config.CHROMA_DB,
         collection_name: str = Config.COLLECTION_NAME,
         embedding_model: str = Config.EMBEDDING_MODEL,
+        hnsw: Optional[Dict[str, Any]] = None,
     ):
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         self.collection_name = collection_name
+        self.collection_metadata = hnsw_metadata(**(hnsw or {})) or None
 
         logger.info(f"Initializing embeddings with model: {embedding_model}")
 
@@ -43,16 +64,43 @@ class ChromaManager:
         )
 
         self.vectorstore = None
+        self.bm25_index = None
+        self.metadata_index = None
+        self.ioc_index = None
+        self.actor_profiles = None
+        self.report_store = None
+        self.shards: Dict[str, Chroma] = {}
+
+    @property
+    def bm25_path(self) -> Path:
+        return self.persist_directory / f"{self.collection_name}_bm25.pkl"
+
+    @property
+    def profiles_path(self) -> Path:
+        return self.persist_directory / f"{self.collection_name}_profiles.npz"
 
     def create_vectorstore(self, documents: List[Document], batch_size: int = 100) -> Chroma:
         logger.info(f"Creating Chroma vectorstore with {len(documents)} documents")
 
+        self.vectorstore = self._build_collection(self.collection_name, documents, batch_size)
+
+        logger.success(f"Vectorstore created and persisted to {self.persist_directory}")
+        return self.vectorstore
+
+    def _build_collection(self, collection_name: str, documents: List[Document], batch_size: int) -> Chroma:
         logger.info("Filtering complex metadata from documents")
         filtered_documents = filter_complex_metadata(documents)
         logger.success(f"Filtered {len(filtered_documents)} documents")
 
+        if any("chunk_id" not in doc.metadata for doc in filtered_documents):
+            logger.warning("Documents without chunk IDs found, assigning IDs")
+            assign_chunk_ids(filtered_documents)
+
         total_docs = len(filtered_documents)
 
+        if self.collection_metadata:
+            logger.info(f"HNSW settings: {hnsw_params(self.collection_metadata)}")
+
         # Process in batches with progress logging
         if total_docs > batch_size:
             logger.info(f"Processing documents in batches of {batch_size}")
@@ -62,10 +110,12 @@ class ChromaManager:
             logger.info(f"Creating vectorstore with first batch ({batch_size} docs)")
             logger.info("Computing embeddings... (this may take a while)")
 
-            self.vectorstore = Chroma.from_documents(
+            vectorstore = Chroma.from_documents(
                 documents=first_batch,
                 embedding=self.embeddings,
-                collection_name=self.collection_name,
+                ids=_chunk_ids(first_batch),
+                collection_name=collection_name,
+                collection_metadata=self.collection_metadata,
                 persist_directory=str(self.persist_directory),
             )
             logger.success(f"First batch complete: {batch_size}/{total_docs}")
@@ -77,21 +127,131 @@ class ChromaManager:
                 progress_pct = (i / total_docs) * 100
 
                 logger.info(f"Batch {batch_num}: Processing {i}-{min(i+batch_size, total_docs)}/{total_docs} ({progress_pct:.1f}%)")
-                self.vectorstore.add_documents(batch)
+                vectorstore.add_documents(batch, ids=_chunk_ids(batch))
                 logger.success(f"Batch {batch_num} complete")
         else:
             logger.info(f"Processing all {total_docs} documents at once")
             logger.info("Computing embeddings... (this may take a while)")
 
-            self.vectorstore = Chroma.from_documents(
+            vectorstore = Chroma.from_documents(
                 documents=filtered_documents,
                 embedding=self.embeddings,
-                collection_name=self.collection_name,
+                ids=_chunk_ids(filtered_documents),
+                collection_name=collection_name,
+                collection_metadata=self.collection_metadata,
                 persist_directory=str(self.persist_directory),
             )
 
-        logger.success(f"Vectorstore created and persisted to {self.persist_directory}")
-        return self.vectorstore
+        return vectorstore
+
+    def shard_name(self, year: Optional[int]) -> str:
+        return f"{self.collection_name}{SHARD_SEPARATOR}{year if year is not None else UNKNOWN_SHARD}"
+
+    def create_sharded_vectorstore(self, documents: List[Document], batch_size: int = 100) -> Dict[str, Chroma]:
+        by_year = _group_by_year(documents)
+        logger.info(f"Creating {len(by_year)} year shards from {len(documents)} documents")
+
+        for year, shard_docs in sorted(by_year.items(), key=lambda item: _shard_key(item[0])):
+            self.rebuild_shard(year, shard_docs, batch_size=batch_size)
+
+        logger.success(f"Sharded vectorstore created and persisted to {self.persist_directory}")
+        return self.shards
+
+    def rebuild_shard(self, year: Optional[int], documents: List[Document], batch_size: int = 100) -> Chroma:
+        name = self.shard_name(year)
+        shard_docs = [doc for doc in documents if doc.metadata.get("year") == year]
+        if len(shard_docs) != len(documents):
+            logger.warning(f"Skipping {len(documents) - len(shard_docs)} documents not from year {year}")
+
+        if not shard_docs:
+            raise ValueError(f"No documents for shard {name}")
+
+        client = chromadb.PersistentClient(path=str(self.persist_directory))
+        if name in _collection_names(client):
+            logger.info(f"Dropping existing shard {name}")
+            client.delete_collection(name)
+
+        logger.info(f"Building shard {name} with {len(shard_docs)} documents")
+        self.shards[_shard_key(year)] = self._build_collection(name, shard_docs, batch_size)
+        logger.success(f"Shard {name} built")
+
+        return self.shards[_shard_key(year)]
+
+    def load_shards(self) -> Dict[str, Chroma]:
+        client = chromadb.PersistentClient(path=str(self.persist_directory))
+        prefix = f"{self.collection_name}{SHARD_SEPARATOR}"
+
+        self.shards = {}
+        for name in sorted(_collection_names(client)):
+            if not name.startswith(prefix):
+                continue
+
+            self.shards[name[len(prefix):]] = Chroma(
+                collection_name=name,
+                embedding_function=self.embeddings,
+                client=client,
+            )
+
+        if not self.shards:
+            raise ValueError(f"No shards found for collection: {self.collection_name}")
+
+        logger.success(f"Loaded {len(self.shards)} shards: {', '.join(self.shards)}")
+        return self.shards
+
+    @property
+    def report_collection_name(self) -> str:
+        return f"{self.collection_name}{REPORT_SUFFIX}"
+
+    def build_report_index(self, batch_size: int = 5000) -> Chroma:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        # One vector per report: the normalized mean of its stored chunk vectors, nothing is re-embedded
+        collection = self.vectorstore._collection
+        aggregator = ReportAggregator()
+        for offset in range(0, collection.count(), batch_size):
+            batch = collection.get(
+                include=["embeddings", "metadatas", "documents"], limit=batch_size, offset=offset
+            )
+            aggregator.add(batch["embeddings"], batch["metadatas"], batch["documents"])
+
+        client = chromadb.PersistentClient(path=str(self.persist_directory))
+        name = self.report_collection_name
+        if name in _collection_names(client):
+            client.delete_collection(name)
+
+        self.report_store = Chroma(
+            collection_name=name,
+            embedding_function=self.embeddings,
+            client=client,
+            collection_metadata=collection.metadata or None,
+        )
+
+        ids, embeddings, metadatas, documents = aggregator.records()
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.report_store._collection.add(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                documents=documents[start:end],
+            )
+
+        logger.success(f"Report index {name} built with {len(ids)} reports from {collection.count()} chunks")
+        return self.report_store
+
+    def load_report_index(self) -> Chroma:
+        client = chromadb.PersistentClient(path=str(self.persist_directory))
+        if self.report_collection_name not in _collection_names(client):
+            raise ValueError(f"Report index not found: {self.report_collection_name}")
+
+        self.report_store = Chroma(
+            collection_name=self.report_collection_name,
+            embedding_function=self.embeddings,
+            client=client,
+        )
+        logger.success(f"Report index loaded ({self.report_store._collection.count()} reports)")
+        return self.report_store
 
     def load_vectorstore(self) -> Chroma:
         logger.info(f"Loading existing Chroma vectorstore from {self.persist_directory}")
@@ -110,9 +270,154 @@ class ChromaManager:
             raise ValueError("Vectorstore not initialized")
 
         logger.info(f"Adding {len(documents)} documents to vectorstore")
-        self.vectorstore.add_documents(documents)
+        if all("chunk_id" in doc.metadata for doc in documents):
+            self.vectorstore.add_documents(documents, ids=_chunk_ids(documents))
+        else:
+            self.vectorstore.add_documents(documents)
         logger.success(f"Added {len(documents)} documents")
 
+        if self.bm25_index is not None:
+            self.bm25_index.add_documents(doc for doc in documents if "chunk_id" in doc.metadata)
+            self.bm25_index.save(self.bm25_path)
+
+    def build_bm25_index(self, documents: List[Document]) -> BM25Index:
+        logger.info(f"Building BM25 index over {len(documents)} documents")
+
+        if any("chunk_id" not in doc.metadata for doc in documents):
+            assign_chunk_ids(documents)
+
+        self.bm25_index = build_bm25_index(documents, path=self.bm25_path)
+        logger.success(f"BM25 index persisted to {self.bm25_path}")
+        return self.bm25_index
+
+    def load_bm25_index(self) -> BM25Index:
+        if not self.bm25_path.exists():
+            raise ValueError(f"BM25 index not found: {self.bm25_path}")
+
+        logger.info(f"Loading BM25 index from {self.bm25_path}")
+        self.bm25_index = BM25Index.load(self.bm25_path)
+        logger.success(f"BM25 index loaded ({len(self.bm25_index)} documents)")
+        return self.bm25_index
+
+    def load_metadata_index(self, path: Optional[Path] = None) -> MetadataIndex:
+        if path is None:
+            path = Config.PROCESSED_DATA / Config.METADATA_INDEX_FILE
+
+        if not Path(path).exists():
+            raise ValueError(f"Metadata index not found: {path}")
+
+        logger.info(f"Loading metadata index from {path}")
+        self.metadata_index = MetadataIndex.load(path)
+        logger.success(f"Metadata index loaded ({self.metadata_index.num_chunks} chunks)")
+        return self.metadata_index
+
+    def load_ioc_index(self, path: Optional[Path] = None) -> IOCIndex:
+        if path is None:
+            path = Config.PROCESSED_DATA / Config.IOC_INDEX_FILE
+
+        if not Path(path).exists():
+            raise ValueError(f"IOC index not found: {path}")
+
+        logger.info(f"Loading IOC index from {path}")
+        self.ioc_index = IOCIndex.load(path)
+        logger.success(f"IOC index loaded ({len(self.ioc_index)} indicators)")
+        return self.ioc_index
+
+    def lookup_iocs(self, indicators: Union[str, List[str]], with_documents: bool = False) -> List[Dict[str, Any]]:
+        # Exact match on the hash table; the embedding model is never used
+        if self.ioc_index is None:
+            self.load_ioc_index()
+
+        if isinstance(indicators, str):
+            results = self.ioc_index.lookup_text(indicators)
+        else:
+            results = self.ioc_index.lookup(indicators)
+
+        if with_documents:
+            for result in results:
+                for report in result["reports"]:
+                    report["documents"] = self.get_documents_by_ids(report["chunk_ids"])
+
+        return results
+
+    def build_actor_profiles(
+        self,
+        n_medoids: int = Config.PROFILE_MEDOIDS,
+        min_chunks: int = Config.PROFILE_MIN_CHUNKS,
+        batch_size: int = 5000,
+    ) -> ActorProfileIndex:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        # Reuses the stored chunk vectors, nothing is re-embedded
+        collection = self.vectorstore._collection
+        chunk_ids, embeddings, metadatas = [], [], []
+        for offset in range(0, collection.count(), batch_size):
+            batch = collection.get(include=["embeddings", "metadatas"], limit=batch_size, offset=offset)
+            chunk_ids.extend(batch["ids"])
+            embeddings.extend(batch["embeddings"])
+            metadatas.extend(batch["metadatas"])
+
+        self.actor_profiles = build_actor_profiles(
+            chunk_ids,
+            embeddings,
+            metadatas,
+            path=self.profiles_path,
+            n_medoids=n_medoids,
+            min_chunks=min_chunks,
+        )
+        logger.success(f"Actor profiles persisted to {self.profiles_path}")
+        return self.actor_profiles
+
+    def load_actor_profiles(self) -> ActorProfileIndex:
+        if not self.profiles_path.exists():
+            raise ValueError(f"Actor profiles not found: {self.profiles_path}")
+
+        logger.info(f"Loading actor profiles from {self.profiles_path}")
+        self.actor_profiles = ActorProfileIndex.load(self.profiles_path)
+        logger.success(f"Actor profiles loaded ({len(self.actor_profiles)} actors)")
+        return self.actor_profiles
+
+    def rank_actors(
+        self,
+        query: str,
+        top_n: int = Config.PROFILE_TOP_N,
+        embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        if self.actor_profiles is None:
+            self.load_actor_profiles()
+
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        return self.actor_profiles.rank(embedding, top_n=top_n)
+
+    def _prefilter(self, filter: Optional[dict]) -> Tuple[Optional[dict], Optional[Set[str]]]:
+        if self.metadata_index is None or not filter:
+            return filter, None
+
+        candidates, residual = self.metadata_index.resolve_filter(filter)
+        if candidates is None:
+            return residual, None
+
+        logger.debug(f"Metadata prefilter {filter} matched {len(candidates)} chunks")
+        return candidate_where(candidates, residual), candidates
+
+    def get_documents_by_ids(self, ids: List[str], filter: Optional[dict] = None) -> List[Document]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if not ids:
+            return []
+
+        results = self.vectorstore._collection.get(ids=list(ids), where=filter)
+        by_id = {
+            doc_id: Document(page_content=content, metadata=metadata or {}, id=doc_id)
+            for doc_id, content, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+            if content is not None
+        }
+
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
     def similarity_search(
         self,
         query: str,
@@ -122,6 +427,10 @@ class ChromaManager:
         if not self.vectorstore:
             raise ValueError("Vectorstore not initialized")
 
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return []
+
         results = self.vectorstore.similarity_search(
             query=query,
             k=k,
@@ -130,13 +439,401 @@ class ChromaManager:
 
         return results
 
-    def get_retriever(self, search_kwargs: Optional[dict] = None):
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None
+    ) -> List[Document]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return []
+
+        return self.vectorstore.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def scored_similarity_search(
+        self,
+        embedding: List[float],
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None
+    ) -> List[Document]:
         if not self.vectorstore:
             raise ValueError("Vectorstore not initialized")
 
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return []
+
+        collection = self.vectorstore._collection
+        space = hnsw_params(collection.metadata).get("space", "l2")
+        [hits] = _query_collection(collection, [embedding], k, filter)
+
+        similarities = distance_to_similarity([distance for _, distance in hits], space)
+        for (doc, _), similarity in zip(hits, similarities):
+            doc.metadata["similarity"] = float(similarity)
+
+        return [doc for doc, _ in hits]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        # embed_documents runs the whole list through the model as one batch
+        return self.embeddings.embed_documents(list(queries))
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = Config.RETRIEVAL_K,
+        filters: Union[dict, List[Optional[dict]], None] = None,
+    ) -> List[List[Document]]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if not queries:
+            return []
+
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+
+        if len(filters) != len(queries):
+            raise ValueError("Number of filters must match number of queries")
+
+        query_embeddings = self.embed_queries(queries)
+
+        # Chroma applies one where clause per request, so group queries sharing a filter
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, query_filter in enumerate(filters):
+            groups[json.dumps(query_filter, sort_keys=True)].append(i)
+
+        results: List[List[Document]] = [[] for _ in queries]
+        for positions in groups.values():
+            where, candidates = self._prefilter(filters[positions[0]])
+            if candidates is not None and not candidates:
+                continue
+
+            hits = _query_collection(
+                self.vectorstore._collection,
+                [query_embeddings[i] for i in positions],
+                k,
+                where,
+            )
+            for i, query_hits in zip(positions, hits):
+                results[i] = [doc for doc, _ in query_hits]
+
+        logger.debug(f"Batch search: {len(queries)} queries in {len(groups)} Chroma requests")
+        return results
+
+    def multi_query_search_with_stats(
+        self,
+        queries: List[str],
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        fetch_k: int = Config.FACET_FETCH_K,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if not queries:
+            return [], {}
+
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return [], {}
+
+        fetch_k = max(fetch_k, k)
+
+        embed_start = time.perf_counter()
+        query_embeddings = self.embed_queries(queries)
+        embed_ms = (time.perf_counter() - embed_start) * 1000
+
+        def search(embedding):
+            start = time.perf_counter()
+            docs = self.vectorstore.similarity_search_by_vector(embedding, k=fetch_k, filter=filter)
+            return docs, (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=min(len(queries), Config.SHARD_SEARCH_WORKERS)) as executor:
+            searches = list(executor.map(search, query_embeddings))
+
+        fusion_start = time.perf_counter()
+
+        docs_by_id: Dict[str, Document] = {}
+        rankings = []
+        for docs, _ in searches:
+            rankings.append([_document_id(doc) for doc in docs])
+            for doc in docs:
+                docs_by_id.setdefault(_document_id(doc), doc)
+
+        fused = reciprocal_rank_fusion(rankings)[:k]
+        results = []
+        for doc_id, score in fused:
+            doc = docs_by_id[doc_id]
+            doc.metadata["rrf_score"] = score
+            results.append(doc)
+
+        fusion_ms = (time.perf_counter() - fusion_start) * 1000
+
+        fused_ids = {doc_id for doc_id, _ in fused}
+        stats = {
+            "embed_ms": embed_ms,
+            "queries": [
+                {
+                    "query": query,
+                    "latency_ms": latency_ms,
+                    "results": len(ranking),
+                    "fused_hits": len(fused_ids.intersection(ranking)),
+                }
+                for query, (_, latency_ms), ranking in zip(queries, searches, rankings)
+            ],
+            "unique_results": len(docs_by_id),
+            "fusion_ms": fusion_ms,
+        }
+
+        logger.debug(
+            f"Multi-query search: {len(queries)} queries embedded in {embed_ms:.1f}ms, "
+            f"{sum(len(r) for r in rankings)} hits ({len(docs_by_id)} unique), fusion {fusion_ms:.1f}ms"
+        )
+
+        return results, stats
+
+    def two_stage_search_with_stats(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        reports: int = Config.REPORT_STAGE_K,
+        max_per_report: Optional[int] = Config.REPORT_MAX_CHUNKS,
+        embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if self.report_store is None:
+            self.load_report_index()
+
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+
+        # Year is the only filter that also holds at report level
+        years = [{"year": condition} for condition in _year_conditions(filter)]
+        report_where = years[0] if len(years) == 1 else ({"$and": years} if years else None)
+
+        start = time.perf_counter()
+        [report_hits] = _query_collection(self.report_store._collection, [embedding], reports, report_where)
+        report_ms = (time.perf_counter() - start) * 1000
+
+        filenames = [doc.metadata["filename"] for doc, _ in report_hits]
+        stats = {
+            "report_ms": report_ms,
+            "reports": filenames,
+            "searched_chunks": sum(doc.metadata.get("chunks", 0) for doc, _ in report_hits),
+        }
+        if not filenames:
+            return [], {**stats, "chunk_ms": 0.0}
+
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return [], {**stats, "chunk_ms": 0.0}
+
+        where = {"filename": {"$in": filenames}}
+        if filter:
+            where = {"$and": [where, filter]}
+
+        # Over-fetch so the per-report cap can still fill k
+        fetch_k = k * len(filenames) if max_per_report else k
+        start = time.perf_counter()
+        [chunk_hits] = _query_collection(self.vectorstore._collection, [embedding], fetch_k, where)
+        stats["chunk_ms"] = (time.perf_counter() - start) * 1000
+
+        results, per_report = [], defaultdict(int)
+        for doc, _ in chunk_hits:
+            filename = doc.metadata.get("filename")
+            if max_per_report and per_report[filename] >= max_per_report:
+                continue
+            per_report[filename] += 1
+            results.append(doc)
+            if len(results) == k:
+                break
+
+        logger.debug(
+            f"Two-stage search: {len(filenames)} reports in {report_ms:.1f}ms, "
+            f"{len(results)} chunks from {len(per_report)} reports in {stats['chunk_ms']:.1f}ms"
+        )
+        return results, stats
+
+    def two_stage_search(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        **kwargs,
+    ) -> List[Document]:
+        docs, _ = self.two_stage_search_with_stats(query, k=k, filter=filter, **kwargs)
+        return docs
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        fetch_k: int = Config.HYBRID_FETCH_K,
+    ) -> List[Document]:
+        docs, _ = self.hybrid_search_with_stats(query, k=k, filter=filter, fetch_k=fetch_k)
+        return docs
+
+    def hybrid_search_with_stats(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        fetch_k: int = Config.HYBRID_FETCH_K,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if self.bm25_index is None:
+            self.load_bm25_index()
+
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return [], {}
+
+        fetch_k = max(fetch_k, k)
+
+        def timed(func):
+            start = time.perf_counter()
+            result = func()
+            return result, (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            dense_future = executor.submit(
+                timed, lambda: self.vectorstore.similarity_search(query=query, k=fetch_k, filter=filter)
+            )
+            bm25_future = executor.submit(
+                timed, lambda: self.bm25_index.search(query, k=fetch_k, candidates=candidates)
+            )
+
+            dense_docs, dense_ms = dense_future.result()
+            bm25_hits, bm25_ms = bm25_future.result()
+
+        fusion_start = time.perf_counter()
+
+        docs_by_id = {_document_id(doc): doc for doc in dense_docs}
+        bm25_ids = [doc_id for doc_id, _ in bm25_hits]
+        missing = [doc_id for doc_id in bm25_ids if doc_id not in docs_by_id]
+        for doc in self.get_documents_by_ids(missing, filter=filter):
+            docs_by_id[doc.id] = doc
+
+        # Filtered-out BM25 hits never got hydrated, drop them before fusing
+        bm25_ids = [doc_id for doc_id in bm25_ids if doc_id in docs_by_id]
+        dense_ids = [_document_id(doc) for doc in dense_docs]
+
+        fused = reciprocal_rank_fusion([dense_ids, bm25_ids])[:k]
+        results = []
+        for doc_id, score in fused:
+            doc = docs_by_id[doc_id]
+            doc.metadata["rrf_score"] = score
+            results.append(doc)
+
+        fusion_ms = (time.perf_counter() - fusion_start) * 1000
+
+        fused_ids = {doc_id for doc_id, _ in fused}
+        stats = {
+            "dense": {
+                "latency_ms": dense_ms,
+                "results": len(dense_ids),
+                "fused_hits": len(fused_ids.intersection(dense_ids)),
+            },
+            "bm25": {
+                "latency_ms": bm25_ms,
+                "results": len(bm25_ids),
+                "fused_hits": len(fused_ids.intersection(bm25_ids)),
+            },
+            "fusion_ms": fusion_ms,
+        }
+
+        logger.debug(
+            f"Hybrid search: dense {dense_ms:.1f}ms ({stats['dense']['fused_hits']}/{len(results)} hits), "
+            f"bm25 {bm25_ms:.1f}ms ({stats['bm25']['fused_hits']}/{len(results)} hits), "
+            f"fusion {fusion_ms:.1f}ms"
+        )
+
+        return results, stats
+
+    def sharded_similarity_search(
+        self,
+        query: str,
+        k: int = Config.RETRIEVAL_K,
+        filter: Optional[dict] = None,
+        years: Optional[List[int]] = None,
+    ) -> List[Document]:
+        if not self.shards:
+            raise ValueError("Shards not initialized")
+
+        shard_keys = select_year_shards(list(self.shards), years=years, filter=filter)
+        if not shard_keys:
+            return []
+
+        filter, candidates = self._prefilter(filter)
+        if candidates is not None and not candidates:
+            return []
+
+        # One embedding for all shards, only the cheap ANN lookups fan out
+        query_embedding = self.embeddings.embed_query(query)
+
+        def search_shard(key: str) -> List[Tuple[Document, float]]:
+            return _query_collection(self.shards[key]._collection, [query_embedding], k, filter)[0]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(shard_keys), Config.SHARD_SEARCH_WORKERS)) as executor:
+            shard_results = list(executor.map(search_shard, shard_keys))
+
+        merged = sorted(
+            (hit for hits in shard_results for hit in hits),
+            key=lambda hit: hit[1],
+        )[:k]
+
+        logger.debug(
+            f"Searched {len(shard_keys)} shards ({', '.join(shard_keys)}) "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+        return [doc for doc, _ in merged]
+
+    def get_shard_stats(self) -> Dict[str, int]:
+        if not self.shards:
+            raise ValueError("Shards not initialized")
+
+        return {key: shard._collection.count() for key, shard in self.shards.items()}
+
+    def get_retriever(
+        self,
+        search_kwargs: Optional[dict] = None,
+        hybrid: bool = False,
+        sharded: bool = False,
+        two_stage: bool = False,
+    ):
         if search_kwargs is None:
             search_kwargs = {"k": Config.RETRIEVAL_K}
 
+        if sharded:
+            if not self.shards:
+                raise ValueError("Shards not initialized")
+            return ShardedRetriever(manager=self, search_kwargs=search_kwargs)
+
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not initialized")
+
+        if hybrid:
+            if self.bm25_index is None:
+                self.load_bm25_index()
+            return HybridRetriever(manager=self, vectorstore=self.vectorstore, search_kwargs=search_kwargs)
+
+        if two_stage:
+            if self.report_store is None:
+                self.load_report_index()
+            return TwoStageRetriever(manager=self, vectorstore=self.vectorstore, search_kwargs=search_kwargs)
+
         return self.vectorstore.as_retriever(search_kwargs=search_kwargs)
 
     def get_collection_stats(self) -> dict:
@@ -150,4 +847,136 @@ class ChromaManager:
             "collection_name": self.collection_name,
             "document_count": count,
             "persist_directory": str(self.persist_directory),
+            "hnsw": hnsw_params(collection.metadata),
         }
+
+    def get_collection_version(self) -> str:
+        vectorstores = ([self.vectorstore] if self.vectorstore else []) + list(self.shards.values())
+        if not vectorstores:
+            raise ValueError("Vectorstore not initialized")
+
+        return collection_version(vectorstores)
+
+class HybridRetriever(BaseRetriever):
+    manager: Any
+    vectorstore: Any
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.manager.hybrid_search(query, **self.search_kwargs)
+
+class TwoStageRetriever(BaseRetriever):
+    manager: Any
+    vectorstore: Any
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.manager.two_stage_search(query, **self.search_kwargs)
+
+class ShardedRetriever(BaseRetriever):
+    manager: Any
+    search_kwargs: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.manager.sharded_similarity_search(query, **self.search_kwargs)
+
+def collection_version(vectorstores: List[Chroma]) -> str:
+    # A rebuilt collection gets a new id and added chunks change the count
+    return "|".join(f"{vs._collection.id}:{vs._collection.count()}" for vs in vectorstores)
+
+def select_year_shards(
+    shard_keys: List[str],
+    years: Optional[List[int]] = None,
+    filter: Optional[dict] = None,
+) -> List[str]:
+    if years is not None:
+        wanted = {str(year) for year in years}
+        return [key for key in shard_keys if key in wanted]
+
+    conditions = _year_conditions(filter)
+    if not conditions:
+        return list(shard_keys)
+
+    selected = []
+    for key in shard_keys:
+        if key == UNKNOWN_SHARD:
+            continue
+        if all(_year_matches(int(key), condition) for condition in conditions):
+            selected.append(key)
+
+    return selected
+
+def _year_conditions(filter: Optional[dict]) -> List[Any]:
+    # Ranges arrive as one clause per bound, e.g. {"$and": [{"year": {"$gte": ...}}, {"year": {"$lte": ...}}]}
+    if not filter:
+        return []
+
+    if "year" in filter:
+        return [filter["year"]]
+
+    return [clause["year"] for clause in filter.get("$and", []) if "year" in clause]
+
+def _year_matches(year: int, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return year == int(condition)
+
+    checks = {
+        "$eq": lambda v: year == v,
+        "$ne": lambda v: year != v,
+        "$gt": lambda v: year > v,
+        "$gte": lambda v: year >= v,
+        "$lt": lambda v: year < v,
+        "$lte": lambda v: year <= v,
+        "$in": lambda v: year in {int(x) for x in v},
+        "$nin": lambda v: year not in {int(x) for x in v},
+    }
+
+    return all(checks[op](value) for op, value in condition.items() if op in checks)
+
+def _shard_key(year: Optional[int]) -> str:
+    return str(year) if year is not None else UNKNOWN_SHARD
+
+def _group_by_year(documents: List[Document]) -> Dict[Optional[int], List[Document]]:
+    by_year = defaultdict(list)
+    for doc in documents:
+        by_year[doc.metadata.get("year")].append(doc)
+    return by_year
+
+def _collection_names(client) -> List[str]:
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+def _query_collection(
+    collection,
+    query_embeddings: List[List[float]],
+    k: int,
+    where: Optional[dict] = None,
+) -> List[List[Tuple[Document, float]]]:
+    results = collection.query(
+        query_embeddings=query_embeddings,
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances"],
+    )
+
+    return [
+        [
+            (Document(page_content=content, metadata=metadata or {}, id=doc_id), distance)
+            for doc_id, content, metadata, distance in zip(ids, documents, metadatas, distances)
+            if content is not None
+        ]
+        for ids, documents, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+def _document_id(doc: Document) -> str:
+    return doc.metadata.get("chunk_id") or doc.id
+
+def _chunk_ids(documents: List[Document]) -> List[str]:
+    return [doc.metadata["chunk_id"] for doc in documents]
@@ -0,0 +1,21 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+from apt.config import Config
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = Config.RRF_K,
+    weights: Sequence[float] = None,
+) -> List[Tuple[str, float]]:
+    if weights is None:
+        weights = [1.0] * len(rankings)
+
+    if len(weights) != len(rankings):
+        raise ValueError("Number of weights must match number of rankings")
+
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
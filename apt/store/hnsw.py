@@ -0,0 +1,73 @@
+from typing import Any, Dict, Optional
+import numpy as np
+
+HNSW_SPACES = ("l2", "cosine", "ip")
+HNSW_KEYS = {
+    "space": "hnsw:space",
+    "M": "hnsw:M",
+    "construction_ef": "hnsw:construction_ef",
+    "search_ef": "hnsw:search_ef",
+}
+
+def hnsw_metadata(
+    space: Optional[str] = None,
+    M: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None,
+) -> Dict[str, Any]:
+    if space is not None and space not in HNSW_SPACES:
+        raise ValueError(f"Unsupported HNSW space: {space} (expected one of {', '.join(HNSW_SPACES)})")
+
+    params = {"space": space, "M": M, "construction_ef": construction_ef, "search_ef": search_ef}
+    for name in ("M", "construction_ef", "search_ef"):
+        if params[name] is not None and params[name] < 1:
+            raise ValueError(f"HNSW {name} must be positive")
+
+    return {HNSW_KEYS[name]: value for name, value in params.items() if value is not None}
+
+def hnsw_params(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    metadata = metadata or {}
+    return {name: metadata[key] for name, key in HNSW_KEYS.items() if key in metadata}
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, space: str = "l2") -> np.ndarray:
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        distances = -queries @ corpus.T
+    elif space == "ip":
+        distances = -queries @ corpus.T
+    elif space == "l2":
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ corpus.T
+            + np.sum(corpus ** 2, axis=1)
+        )
+    else:
+        raise ValueError(f"Unsupported HNSW space: {space}")
+
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def distance_to_similarity(distances: Any, space: str = "l2") -> np.ndarray:
+    distances = np.asarray(distances, dtype=float)
+    if space in ("cosine", "ip"):
+        # Chroma reports 1 - similarity for both
+        return 1 - distances
+    if space == "l2":
+        # Squared L2 is unbounded, so map it monotonically into (0, 1]; this is not cosine similarity
+        return 1 / (1 + distances)
+    raise ValueError(f"Unsupported HNSW space: {space}")
+
+def recall_at_k(approx: list, exact: list) -> float:
+    if not exact:
+        return 0.0
+
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    return hits / sum(len(e) for e in exact)
+
+def estimate_index_bytes(count: int, dim: int, M: Optional[int] = None) -> int:
+    # float32 vector plus the level-0 neighbour list (2*M int32 links); upper levels are negligible
+    M = M or 16
+    return count * (dim * 4 + 2 * M * 4)
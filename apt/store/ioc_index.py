@@ -0,0 +1,96 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from langchain_core.documents import Document
+from loguru import logger
+from apt.ingest.dedup import duplicate_sources
+from apt.ingest.metadata import extract_iocs, ioc_type, normalize_ioc
+
+class IOCIndex:
+    def __init__(self):
+        # indicator -> filename -> chunk IDs; reports carry the year once
+        self.entries: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self.types: Dict[str, str] = {}
+        self.years: Dict[str, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add_documents(self, documents: Iterable[Document]) -> None:
+        for doc in documents:
+            raw = doc.metadata.get("iocs")
+            if not raw:
+                continue
+
+            filename = str(doc.metadata.get("filename") or doc.metadata.get("source", "unknown"))
+            self.years.setdefault(filename, doc.metadata.get("year"))
+            # Reports whose copy of this chunk was deduplicated away still get credited, with their own year
+            copies = []
+            for source, year in duplicate_sources(doc.metadata):
+                self.years.setdefault(source, year)
+                copies.append(source)
+            for value in raw.split(", "):
+                for source in [filename] + copies:
+                    self.entries[value][source].append(doc.metadata["chunk_id"])
+                if value not in self.types:
+                    self.types[value] = ioc_type(value) or "unknown"
+
+    def lookup(self, indicators: Iterable[str]) -> List[Dict[str, Any]]:
+        results = []
+        for indicator in dict.fromkeys(normalize_ioc(i) for i in indicators if i.strip()):
+            reports = self.entries.get(indicator, {})
+            results.append({
+                "ioc": indicator,
+                "type": self.types.get(indicator) or ioc_type(indicator),
+                "reports": [
+                    {"filename": filename, "year": self.years.get(filename), "chunk_ids": chunk_ids}
+                    for filename, chunk_ids in sorted(reports.items())
+                ],
+            })
+        return results
+
+    def lookup_text(self, text: str) -> List[Dict[str, Any]]:
+        # Pasted blobs may mix several defanged indicators with prose
+        found = extract_iocs(text)
+        return self.lookup(sorted(set().union(*found.values())) if found else [])
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        state = {
+            "entries": {value: dict(reports) for value, reports in self.entries.items()},
+            "types": self.types,
+            "years": self.years,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+        counts = defaultdict(int)
+        for kind in self.types.values():
+            counts[kind] += 1
+        sizes = ", ".join(f"{kind}={count}" for kind, count in sorted(counts.items()))
+        logger.info(f"Saved IOC index ({sizes}) to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "IOCIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        index = cls()
+        for value, reports in state["entries"].items():
+            index.entries[value] = defaultdict(list, reports)
+        index.types = state["types"]
+        index.years = state["years"]
+
+        return index
+
+def build_ioc_index(documents: List[Document], path: Optional[Path] = None) -> IOCIndex:
+    index = IOCIndex()
+    index.add_documents(documents)
+
+    if path is not None:
+        index.save(path)
+
+    return index
@@ -0,0 +1,170 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+from loguru import logger
+
+INDEXED_FIELDS = ("apt_groups_mentioned", "techniques_mentioned", "year")
+
+def normalize_value(field: str, value: Any) -> str:
+    value = str(value).strip()
+    if field == "apt_groups_mentioned":
+        return value.upper().replace(" ", "").replace("-", "").replace("_", "")
+    if field == "techniques_mentioned":
+        return value.upper()
+    return value
+
+def field_values(field: str, raw: Any) -> List[str]:
+    if raw is None:
+        return []
+
+    if field == "year":
+        return [normalize_value(field, raw)]
+
+    values = [normalize_value(field, v) for v in str(raw).split(",") if v.strip()]
+    if field == "techniques_mentioned":
+        # T1566.001 also counts as a mention of its parent technique T1566
+        values.extend(v.split(".")[0] for v in list(values) if "." in v)
+
+    return values
+
+def _filter_values(field: str, condition: Any) -> Optional[List[str]]:
+    if isinstance(condition, dict):
+        if set(condition) == {"$eq"}:
+            condition = condition["$eq"]
+        elif set(condition) == {"$in"}:
+            condition = condition["$in"]
+        else:
+            return None
+
+    if isinstance(condition, (list, tuple, set)):
+        return [normalize_value(field, v) for v in condition]
+
+    return [normalize_value(field, condition)]
+
+class MetadataIndex:
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[str]]] = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        self.num_chunks = 0
+
+    def add_documents(self, documents: Iterable[Document]) -> None:
+        for doc in documents:
+            chunk_id = doc.metadata["chunk_id"]
+            self.num_chunks += 1
+
+            for field in INDEXED_FIELDS:
+                for value in field_values(field, doc.metadata.get(field)):
+                    self.postings[field][value].add(chunk_id)
+
+    def values(self, field: str) -> List[str]:
+        return sorted(self.postings[field])
+
+    def lookup(self, field: str, values: Iterable[Any]) -> Set[str]:
+        matches = set()
+        for value in values:
+            matches |= self.postings[field].get(normalize_value(field, value), set())
+        return matches
+
+    def candidates(
+        self,
+        apt_groups: Optional[Iterable[str]] = None,
+        techniques: Optional[Iterable[str]] = None,
+        years: Optional[Iterable[int]] = None,
+    ) -> Optional[Set[str]]:
+        conditions = {
+            "apt_groups_mentioned": apt_groups,
+            "techniques_mentioned": techniques,
+            "year": years,
+        }
+
+        result = None
+        for field, values in conditions.items():
+            if values is None:
+                continue
+
+            matches = self.lookup(field, values)
+            result = matches if result is None else result & matches
+
+        return result
+
+    def resolve_filter(self, metadata_filter: Optional[Dict[str, Any]]) -> Tuple[Optional[Set[str]], Optional[dict]]:
+        if not metadata_filter:
+            return None, metadata_filter
+
+        if set(metadata_filter) == {"$and"}:
+            clauses = metadata_filter["$and"]
+        else:
+            clauses = [{field: condition} for field, condition in metadata_filter.items()]
+
+        candidates = None
+        residual = []
+        for clause in clauses:
+            (field, condition), = clause.items()
+
+            values = _filter_values(field, condition) if field in INDEXED_FIELDS else None
+            if values is None:
+                residual.append(clause)
+                continue
+
+            matches = set()
+            for value in values:
+                matches |= self.postings[field].get(value, set())
+            candidates = matches if candidates is None else candidates & matches
+
+        if not residual:
+            residual_filter = None
+        elif len(residual) == 1:
+            residual_filter = residual[0]
+        else:
+            residual_filter = {"$and": residual}
+
+        return candidates, residual_filter
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        state = {
+            "num_chunks": self.num_chunks,
+            "postings": {
+                field: {value: sorted(ids) for value, ids in postings.items()}
+                for field, postings in self.postings.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+        sizes = ", ".join(f"{field}={len(postings)}" for field, postings in self.postings.items())
+        logger.info(f"Saved metadata index ({sizes}) to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "MetadataIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        index = cls()
+        index.num_chunks = state["num_chunks"]
+        for field, postings in state["postings"].items():
+            index.postings[field] = defaultdict(set, {value: set(ids) for value, ids in postings.items()})
+
+        return index
+
+def candidate_where(candidates: Set[str], residual: Optional[dict] = None) -> Optional[dict]:
+    if not candidates:
+        return residual
+
+    where = {"chunk_id": {"$in": sorted(candidates)}}
+    if residual:
+        where = {"$and": [where, residual]}
+
+    return where
+
+def build_metadata_index(documents: List[Document], path: Optional[Path] = None) -> MetadataIndex:
+    index = MetadataIndex()
+    index.add_documents(documents)
+
+    if path is not None:
+        index.save(path)
+
+    return index
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from langchain_core.documents import Document
+from loguru import logger
+
+class ParentStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Opened on first use; lookups run from executor threads
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS parents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+        return self._connection
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def add(self, parents: Iterable[Document], batch_size: int = 1000) -> int:
+        rows = [
+            (doc.metadata["parent_id"], doc.page_content, json.dumps(doc.metadata, default=str))
+            for doc in parents
+        ]
+
+        with self._lock:
+            for start in range(0, len(rows), batch_size):
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO parents (id, content, metadata) VALUES (?, ?, ?)",
+                    rows[start:start + batch_size],
+                )
+            self.connection.commit()
+
+        return len(rows)
+
+    def get(self, ids: List[str]) -> Dict[str, Document]:
+        if not ids:
+            return {}
+
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT id, content, metadata FROM parents WHERE id IN ({placeholders})", list(ids)
+            ).fetchall()
+
+        return {
+            parent_id: Document(page_content=content, metadata=json.loads(metadata), id=parent_id)
+            for parent_id, content, metadata in rows
+        }
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+def build_parent_store(parents: List[Document], path: Path) -> ParentStore:
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    store = ParentStore(path)
+    count = store.add(parents)
+    logger.info(f"Stored {count} parent sections in {path}")
+    return store
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from loguru import logger
+from apt.config import Config
+from apt.store.metadata_index import field_values
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def _medoids(vectors: np.ndarray, count: int, iterations: int = 10) -> List[int]:
+    # Small spherical k-means; each cluster is represented by its most central member
+    count = min(count, len(vectors))
+    centers = [int(np.argmax(vectors @ _normalize(vectors.mean(axis=0))))]
+    while len(centers) < count:
+        nearest = (vectors @ vectors[centers].T).max(axis=1)
+        centers.append(int(np.argmin(nearest)))
+
+    centroids = vectors[centers]
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        centroids = np.stack([
+            _normalize(vectors[assignment == c].mean(axis=0)) if np.any(assignment == c) else centroids[c]
+            for c in range(count)
+        ])
+
+    assignment = np.argmax(vectors @ centroids.T, axis=1)
+    medoids = []
+    for c in range(count):
+        members = np.flatnonzero(assignment == c)
+        if len(members):
+            medoids.append(int(members[np.argmax(vectors[members] @ centroids[c])]))
+    return sorted(set(medoids))
+
+class ActorProfileIndex:
+    def __init__(self, centroid_weight: float = Config.PROFILE_CENTROID_WEIGHT):
+        self.centroid_weight = centroid_weight
+        self.actors: List[str] = []
+        self.chunk_counts = np.zeros(0, dtype=np.int64)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.medoids = np.zeros((0, 0), dtype=np.float32)
+        self.medoid_actors = np.zeros(0, dtype=np.int64)
+        self.medoid_chunk_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.actors)
+
+    def build(
+        self,
+        chunk_ids: Sequence[str],
+        embeddings: Any,
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        n_medoids: int = Config.PROFILE_MEDOIDS,
+        min_chunks: int = Config.PROFILE_MIN_CHUNKS,
+    ) -> "ActorProfileIndex":
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        members: Dict[str, List[int]] = defaultdict(list)
+        for i, metadata in enumerate(metadatas):
+            for actor in set(field_values("apt_groups_mentioned", (metadata or {}).get("apt_groups_mentioned"))):
+                members[actor].append(i)
+
+        actors = sorted(actor for actor, rows in members.items() if len(rows) >= min_chunks)
+        centroids, medoids, medoid_actors, medoid_chunk_ids = [], [], [], []
+        for position, actor in enumerate(actors):
+            rows = np.asarray(members[actor])
+            actor_vectors = vectors[rows]
+            centroids.append(_normalize(actor_vectors.mean(axis=0)))
+
+            for medoid in _medoids(actor_vectors, n_medoids):
+                medoids.append(actor_vectors[medoid])
+                medoid_actors.append(position)
+                medoid_chunk_ids.append(chunk_ids[rows[medoid]])
+
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        self.actors = actors
+        self.chunk_counts = np.asarray([len(members[actor]) for actor in actors], dtype=np.int64)
+        self.centroids = np.asarray(centroids, dtype=np.float32).reshape(len(actors), dim)
+        self.medoids = np.asarray(medoids, dtype=np.float32).reshape(len(medoid_actors), dim)
+        self.medoid_actors = np.asarray(medoid_actors, dtype=np.int64)
+        self.medoid_chunk_ids = medoid_chunk_ids
+
+        logger.info(
+            f"Built {len(actors)} actor profiles ({len(medoids)} medoids) from {len(chunk_ids)} chunks, "
+            f"skipped {len(members) - len(actors)} actors with fewer than {min_chunks} chunks"
+        )
+        return self
+
+    def rank(self, embedding: Iterable[float], top_n: Optional[int] = Config.PROFILE_TOP_N) -> List[Dict[str, Any]]:
+        if not self.actors:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        centroid_scores = self.centroids @ query
+
+        medoid_scores = np.full(len(self.actors), -1.0, dtype=np.float32)
+        medoid_similarity = self.medoids @ query
+        np.maximum.at(medoid_scores, self.medoid_actors, medoid_similarity)
+
+        scores = self.centroid_weight * centroid_scores + (1 - self.centroid_weight) * medoid_scores
+        order = np.argsort(-scores)[:top_n]
+
+        ranking = []
+        for position in order:
+            own = np.flatnonzero(self.medoid_actors == position)
+            best = own[np.argmax(medoid_similarity[own])] if len(own) else None
+            ranking.append({
+                "actor": self.actors[position],
+                "score": float(scores[position]),
+                "centroid_similarity": float(centroid_scores[position]),
+                "medoid_similarity": float(medoid_scores[position]),
+                "closest_chunk_id": self.medoid_chunk_ids[best] if best is not None else None,
+                "chunks": int(self.chunk_counts[position]),
+            })
+        return ranking
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroid_weight=self.centroid_weight,
+                actors=np.asarray(self.actors, dtype=str),
+                chunk_counts=self.chunk_counts,
+                centroids=self.centroids,
+                medoids=self.medoids,
+                medoid_actors=self.medoid_actors,
+                medoid_chunk_ids=np.asarray(self.medoid_chunk_ids, dtype=str),
+            )
+
+        logger.info(f"Saved {len(self)} actor profiles to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "ActorProfileIndex":
+        with np.load(path, allow_pickle=False) as state:
+            index = cls(centroid_weight=float(state["centroid_weight"]))
+            index.actors = state["actors"].tolist()
+            index.chunk_counts = state["chunk_counts"]
+            index.centroids = state["centroids"]
+            index.medoids = state["medoids"]
+            index.medoid_actors = state["medoid_actors"]
+            index.medoid_chunk_ids = state["medoid_chunk_ids"].tolist()
+
+        return index
+
+def build_actor_profiles(
+    chunk_ids: Sequence[str],
+    embeddings: Any,
+    metadatas: Sequence[Optional[Dict[str, Any]]],
+    path: Optional[Path] = None,
+    n_medoids: int = Config.PROFILE_MEDOIDS,
+    min_chunks: int = Config.PROFILE_MIN_CHUNKS,
+) -> ActorProfileIndex:
+    index = ActorProfileIndex().build(chunk_ids, embeddings, metadatas, n_medoids=n_medoids, min_chunks=min_chunks)
+
+    if path is not None:
+        index.save(path)
+
+    return index
@@ -0,0 +1,62 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from apt.config import Config
+from apt.store.metadata_index import field_values
+
+def _chunk_position(metadata: Dict[str, Any]) -> Tuple[int, int, int]:
+    return (metadata.get("page") or 0, metadata.get("start_index") or 0, metadata.get("chunk_index") or 0)
+
+class ReportAggregator:
+    def __init__(self, preview_chars: int = Config.REPORT_PREVIEW_CHARS):
+        self.preview_chars = preview_chars
+        self.reports: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.reports)
+
+    def add(
+        self,
+        embeddings: Iterable[Any],
+        metadatas: Iterable[Optional[Dict[str, Any]]],
+        documents: Iterable[Optional[str]],
+    ) -> None:
+        for embedding, metadata, content in zip(embeddings, metadatas, documents):
+            metadata = metadata or {}
+            filename = metadata.get("filename")
+            if filename is None:
+                continue
+
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            report = self.reports.setdefault(
+                filename, {"sum": np.zeros_like(vector), "chunks": 0, "lead": None, "groups": set(), "year": None}
+            )
+            report["sum"] += vector / norm if norm else vector
+            report["chunks"] += 1
+            report["groups"].update(field_values("apt_groups_mentioned", metadata.get("apt_groups_mentioned")))
+            if metadata.get("year") is not None:
+                report["year"] = metadata["year"]
+
+            # The report's opening chunk stands in for its title and summary
+            position = _chunk_position(metadata)
+            if report["lead"] is None or position < report["lead"][0]:
+                report["lead"] = (position, content or "")
+
+    def records(self) -> Tuple[List[str], List[List[float]], List[Dict[str, Any]], List[str]]:
+        ids, embeddings, metadatas, documents = [], [], [], []
+        for filename in sorted(self.reports):
+            report = self.reports[filename]
+            norm = np.linalg.norm(report["sum"])
+
+            metadata = {"filename": filename, "chunks": report["chunks"]}
+            if report["year"] is not None:
+                metadata["year"] = report["year"]
+            if report["groups"]:
+                metadata["apt_groups_mentioned"] = ",".join(sorted(report["groups"]))
+
+            ids.append(filename)
+            embeddings.append((report["sum"] / norm if norm else report["sum"]).tolist())
+            metadatas.append(metadata)
+            documents.append(report["lead"][1][:self.preview_chars])
+
+        return ids, embeddings, metadatas, documents
@@ -0,0 +1,86 @@
+#!/usr/bin/env -S uv run
+import asyncio
+import time
+from typing import List, Optional
+import typer
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from loguru import logger
+from typing_extensions import Annotated
+
+from apt.retrieval import LLMScheduler, RAGChain
+
+app = typer.Typer()
+
+def stand_in_retriever(latency: float) -> RunnableLambda:
+    docs = [
+        Document(page_content="APT28 used spearphishing with T1566.001 attachments.", metadata={"filename": "apt28.pdf", "year": 2023}),
+        Document(page_content="Lazarus deployed a custom loader against banks.", metadata={"filename": "lazarus.pdf", "year": 2024}),
+    ]
+
+    def retrieve(query):
+        time.sleep(latency)
+        return docs
+
+    async def aretrieve(query):
+        await asyncio.sleep(latency)
+        return docs
+
+    return RunnableLambda(retrieve, afunc=aretrieve)
+
+def stand_in_llm(latency: float) -> RunnableLambda:
+    # Mimics Ollama: the caller mostly waits on a remote generation
+    def generate(prompt):
+        time.sleep(latency)
+        return "Stand-in answer."
+
+    async def agenerate(prompt):
+        await asyncio.sleep(latency)
+        return "Stand-in answer."
+
+    return RunnableLambda(generate, afunc=agenerate)
+
+async def run_concurrent(rag_chain: RAGChain, questions: List[str], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ask(question: str):
+        async with semaphore:
+            return await rag_chain.aquery(question)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(question) for question in questions))
+    return time.perf_counter() - start
+
+@app.command()
+def main(
+    num_questions: Annotated[int, typer.Option(help="Questions per concurrency level")] = 64,
+    llm_latency: Annotated[float, typer.Option(help="Stand-in LLM latency in seconds")] = 0.5,
+    retrieval_latency: Annotated[float, typer.Option(help="Stand-in retrieval latency in seconds")] = 0.02,
+    levels: Annotated[str, typer.Option(help="Comma-separated concurrency levels")] = "1,8,32",
+    llm_slots: Annotated[Optional[int], typer.Option(help="LLM scheduler slots (default: highest concurrency level)")] = None,
+):
+    logger.disable("apt")
+    concurrency_levels = [int(level) for level in levels.split(",")]
+
+    # The shared scheduler is capped at OLLAMA_NUM_PARALLEL, which would flatten every level above it
+    scheduler = LLMScheduler(max_concurrency=llm_slots or max(concurrency_levels))
+    rag_chain = RAGChain(stand_in_retriever(retrieval_latency), llm=stand_in_llm(llm_latency), scheduler=scheduler)
+    questions = [f"Question {i} about APT28 tactics" for i in range(num_questions)]
+
+    logger.info(
+        f"{num_questions} questions, LLM {llm_latency * 1000:.0f}ms, retrieval {retrieval_latency * 1000:.0f}ms, "
+        f"{scheduler.max_concurrency} LLM slots"
+    )
+
+    start = time.perf_counter()
+    for question in questions:
+        rag_chain.query(question)
+    sync_time = time.perf_counter() - start
+    logger.info(f"  sync loop       {num_questions / sync_time:7.2f} questions/s")
+
+    for concurrency in concurrency_levels:
+        elapsed = asyncio.run(run_concurrent(rag_chain, questions, concurrency))
+        logger.info(f"  async c={concurrency:<3}     {num_questions / elapsed:7.2f} questions/s")
+
+if __name__ == "__main__":
+    app()
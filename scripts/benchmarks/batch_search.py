@@ -0,0 +1,67 @@
+#!/usr/bin/env -S uv run
+import time
+from pathlib import Path
+from typing import List
+import typer
+from loguru import logger
+from typing_extensions import Annotated
+
+from apt.config import Config
+from apt.store import ChromaManager
+
+app = typer.Typer()
+
+DEFAULT_QUERIES = [
+    "Which APT group uses HrServ webshell?",
+    "What are the TTPs of APT28?",
+    "Show me spearphishing campaigns from 2023",
+    "What malware does Lazarus Group use?",
+    "Kimsuky credential harvesting infrastructure",
+    "Turla satellite command and control",
+    "OceanLotus watering hole attacks in Southeast Asia",
+    "Carbanak banking intrusion techniques",
+]
+
+def load_queries(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+@app.command()
+def main(
+    collection: Annotated[str, typer.Option(help="Collection name")] = None,
+    embedding_model: Annotated[str, typer.Option(help="Embedding model used")] = Config.EMBEDDING_MODEL,
+    queries_file: Annotated[Path, typer.Option("--queries", help="Text file with one query per line")] = None,
+    repeat: Annotated[int, typer.Option(help="Repeat the query set to reach a larger batch")] = 8,
+    k: Annotated[int, typer.Option(help="Results per query")] = Config.RETRIEVAL_K,
+):
+    if collection is None:
+        collection = f"apt_reports_{embedding_model.replace('/', '_').replace('-', '_')}"
+
+    queries = load_queries(queries_file) if queries_file else DEFAULT_QUERIES
+    queries = queries * repeat
+
+    chroma_manager = ChromaManager(collection_name=collection, embedding_model=embedding_model)
+    chroma_manager.load_vectorstore()
+
+    # Warm up the model so neither side pays one-off initialization
+    chroma_manager.similarity_search(queries[0], k=k)
+
+    start = time.perf_counter()
+    looped = [chroma_manager.similarity_search(query, k=k) for query in queries]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = chroma_manager.similarity_search_batch(queries, k=k)
+    batch_time = time.perf_counter() - start
+
+    agreement = sum(
+        [doc.id for doc in a] == [doc.id for doc in b] for a, b in zip(looped, batched)
+    ) / len(queries)
+
+    logger.info(f"{len(queries)} queries, k={k}")
+    logger.info(f"  Loop:  {loop_time:.2f}s ({len(queries) / loop_time:.1f} queries/s)")
+    logger.info(f"  Batch: {batch_time:.2f}s ({len(queries) / batch_time:.1f} queries/s)")
+    logger.info(f"  Speedup: {loop_time / batch_time:.2f}x, identical results: {agreement:.0%}")
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,97 @@
+#!/usr/bin/env -S uv run
+import pickle
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+import typer
+from loguru import logger
+from typing_extensions import Annotated
+
+from apt.config import Config
+from apt.store import ChromaManager
+
+app = typer.Typer()
+
+HASH_PATTERN = re.compile(r"\b[a-fA-F0-9]{32,64}\b")
+
+def build_exact_token_queries(chunks: List, num_queries: int, seed: int) -> Dict[str, set]:
+    occurrences: Dict[str, set] = {}
+
+    for chunk in chunks:
+        chunk_id = chunk.metadata["chunk_id"]
+        tokens = set(HASH_PATTERN.findall(chunk.page_content))
+        tokens.update(t.strip() for t in chunk.metadata.get("techniques_mentioned", "").split(",") if t.strip())
+
+        for token in tokens:
+            occurrences.setdefault(token, set()).add(chunk_id)
+
+    candidates = sorted(occurrences)
+    random.Random(seed).shuffle(candidates)
+    return {token: occurrences[token] for token in candidates[:num_queries]}
+
+def recall_at_k(retrieved: List[str], relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]) & relevant) / min(len(relevant), k)
+
+@app.command()
+def main(
+    collection: Annotated[str, typer.Option(help="Collection name")] = None,
+    embedding_model: Annotated[str, typer.Option(help="Embedding model used")] = Config.EMBEDDING_MODEL,
+    input_file: Annotated[Path, typer.Option("--input", help="Chunk pickle used to build the collection")] = None,
+    num_queries: Annotated[int, typer.Option(help="Number of exact-token queries")] = 100,
+    k: Annotated[int, typer.Option(help="Recall cutoff")] = Config.RETRIEVAL_K,
+    seed: Annotated[int, typer.Option(help="Query sampling seed")] = 0,
+):
+    if input_file is None:
+        input_file = Config.PROCESSED_DATA / "chunked_documents.pkl"
+
+    if collection is None:
+        collection = f"apt_reports_{embedding_model.replace('/', '_').replace('-', '_')}"
+
+    with open(input_file, 'rb') as f:
+        chunks = pickle.load(f)
+
+    queries = build_exact_token_queries(chunks, num_queries, seed)
+    logger.info(f"Built {len(queries)} exact-token queries from {len(chunks):,} chunks")
+
+    if not queries:
+        logger.error("No technique IDs or hashes found in chunks")
+        raise typer.Exit(code=1)
+
+    chroma_manager = ChromaManager(collection_name=collection, embedding_model=embedding_model)
+    chroma_manager.load_vectorstore()
+    chroma_manager.load_bm25_index()
+
+    recalls = {"dense": [], "bm25": [], "hybrid": []}
+    latencies = {"dense": [], "bm25": [], "hybrid": []}
+
+    for token, relevant in queries.items():
+        start = time.perf_counter()
+        dense_docs = chroma_manager.similarity_search(token, k=k)
+        latencies["dense"].append((time.perf_counter() - start) * 1000)
+        recalls["dense"].append(recall_at_k([d.id for d in dense_docs], relevant, k))
+
+        start = time.perf_counter()
+        bm25_hits = chroma_manager.bm25_index.search(token, k=k)
+        latencies["bm25"].append((time.perf_counter() - start) * 1000)
+        recalls["bm25"].append(recall_at_k([doc_id for doc_id, _ in bm25_hits], relevant, k))
+
+        start = time.perf_counter()
+        hybrid_docs = chroma_manager.hybrid_search(token, k=k)
+        latencies["hybrid"].append((time.perf_counter() - start) * 1000)
+        recalls["hybrid"].append(recall_at_k([d.id for d in hybrid_docs], relevant, k))
+
+    logger.info(f"Recall@{k} and latency over {len(queries)} queries:")
+    for retriever in ("dense", "bm25", "hybrid"):
+        logger.info(
+            f"  {retriever:<7} recall={statistics.mean(recalls[retriever]):.3f}  "
+            f"p50={statistics.median(latencies[retriever]):.1f}ms  "
+            f"max={max(latencies[retriever]):.1f}ms"
+        )
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,118 @@
+#!/usr/bin/env -S uv run
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import typer
+from loguru import logger
+from typing_extensions import Annotated
+
+from apt.config import Config
+from apt.ingest.metadata import APT_PATTERNS
+from apt.retrieval.attribution import build_attribution_prompt, score_actors
+from apt.retrieval.context import ContextPacker
+from apt.retrieval.llm import get_llm_manager
+from apt.store import ChromaManager
+from apt.store.metadata_index import normalize_value
+
+app = typer.Typer()
+
+# Small built-in sample; pass --labels for a real labelled set
+DEFAULT_LABELS = [
+    {"description": "Spear phishing with X-Agent and Sofacy implants targeting NATO governments", "actor": "APT28"},
+    {"description": "WellMess and WellMail malware used against COVID-19 vaccine research", "actor": "APT29"},
+    {"description": "Fake job offers to cryptocurrency exchange staff delivering AppleJeus", "actor": "Lazarus"},
+    {"description": "Snake rootkit and satellite-based command and control", "actor": "Turla"},
+    {"description": "BabyShark and AppleSeed malware against South Korean think tanks", "actor": "Kimsuky"},
+    {"description": "Denis backdoor and watering holes targeting Vietnamese dissidents", "actor": "OceanLotus"},
+]
+
+def load_labels(path: Optional[Path]) -> List[Dict[str, str]]:
+    if path is None:
+        return DEFAULT_LABELS
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def normalize_actor(actor: Optional[str]) -> Optional[str]:
+    return normalize_value("apt_groups_mentioned", actor) if actor else None
+
+def first_actor(text: str) -> Optional[str]:
+    # The attribution prompt asks for the most likely actor first
+    matches = [m for pattern in APT_PATTERNS for m in re.finditer(pattern, text, re.IGNORECASE)]
+    if not matches:
+        return None
+    return normalize_actor(min(matches, key=lambda m: m.start()).group(0))
+
+def percentile(values: List[float], p: float) -> float:
+    return float(np.percentile(values, p)) if values else 0.0
+
+@app.command()
+def main(
+    collection: Annotated[str, typer.Option(help="Collection name")] = None,
+    embedding_model: Annotated[str, typer.Option(help="Embedding model used")] = Config.EMBEDDING_MODEL,
+    labels_file: Annotated[Path, typer.Option("--labels", help="JSONL of {description, actor}")] = None,
+    k: Annotated[int, typer.Option(help="Chunks retrieved per description")] = 10,
+    model: Annotated[str, typer.Option(help="Ollama model for the LLM baseline")] = "gemma3n:e4b",
+    llm: Annotated[bool, typer.Option(help="Also run the LLM attribution for agreement")] = True,
+):
+    if collection is None:
+        collection = f"apt_reports_{embedding_model.replace('/', '_').replace('-', '_')}"
+
+    labels = load_labels(labels_file)
+
+    chroma_manager = ChromaManager(collection_name=collection, embedding_model=embedding_model)
+    chroma_manager.load_vectorstore()
+
+    packer = ContextPacker()
+    llm_client = get_llm_manager().get(model) if llm else None
+
+    numpy_ms, llm_ms = [], []
+    top1 = top3 = llm_correct = agree = 0
+    for sample in labels:
+        label = normalize_actor(sample["actor"])
+
+        start = time.perf_counter()
+        embedding = chroma_manager.embeddings.embed_query(sample["description"])
+        docs = chroma_manager.scored_similarity_search(embedding, k=k)
+        ranking = score_actors(docs, top_n=3)
+        numpy_ms.append((time.perf_counter() - start) * 1000)
+
+        predicted = [candidate["actor"] for candidate in ranking]
+        top1 += bool(predicted) and predicted[0] == label
+        top3 += label in predicted
+
+        line = f"{sample['actor']:<12} numpy={','.join(predicted) or '-':<28}"
+        if llm_client is not None:
+            prompt, _ = build_attribution_prompt(sample["description"], docs, packer)
+            start = time.perf_counter()
+            answer = llm_client.invoke(prompt)
+            llm_ms.append((time.perf_counter() - start) * 1000)
+
+            llm_actor = first_actor(answer)
+            llm_correct += llm_actor == label
+            agree += bool(predicted) and predicted[0] == llm_actor
+            line += f" llm={llm_actor or '-'}"
+        logger.info(line)
+
+    n = len(labels)
+    logger.info(f"LLM-free attribution over {n} labelled descriptions (k={k}):")
+    logger.info(
+        f"  numpy  p50={percentile(numpy_ms, 50):.1f}ms  p95={percentile(numpy_ms, 95):.1f}ms  "
+        f"top1={top1 / n:.0%}  top3={top3 / n:.0%}"
+    )
+    if llm_ms:
+        logger.info(
+            f"  llm    p50={percentile(llm_ms, 50):.0f}ms  p95={percentile(llm_ms, 95):.0f}ms  "
+            f"top1={llm_correct / n:.0%}"
+        )
+        logger.info(
+            f"  agreement with LLM top actor: {agree / n:.0%}, "
+            f"speedup {statistics.median(llm_ms) / max(statistics.median(numpy_ms), 1e-6):.0f}x"
+        )
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,73 @@
+#!/usr/bin/env -S uv run
+import statistics
+from pathlib import Path
+from typing import List
+import typer
+from loguru import logger
+from typing_extensions import Annotated
+
+from apt.config import Config
+from apt.retrieval.chain import APT_ATTRIBUTION_TEMPLATE
+from apt.retrieval.context import ContextPacker
+from apt.retrieval.stitch import stitch_adjacent_chunks
+from apt.store import ChromaManager
+
+app = typer.Typer()
+
+DEFAULT_QUERIES = [
+    "Which APT group uses HrServ webshell?",
+    "What are the TTPs of APT28?",
+    "Show me spearphishing campaigns from 2023",
+    "What malware does Lazarus Group use?",
+    "How does APT29 maintain persistence?",
+    "Which groups target the energy sector?",
+    "What initial access techniques does Kimsuky use?",
+    "Describe the command and control infrastructure of Turla",
+]
+
+def load_queries(path: Path) -> List[str]:
+    if path is None:
+        return DEFAULT_QUERIES
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+@app.command()
+def main(
+    collection: Annotated[str, typer.Option(help="Collection name")] = None,
+    embedding_model: Annotated[str, typer.Option(help="Embedding model used")] = Config.EMBEDDING_MODEL,
+    queries_file: Annotated[Path, typer.Option("--queries", help="One question per line")] = None,
+    k: Annotated[int, typer.Option(help="Chunks retrieved per question")] = 10,
+):
+    if collection is None:
+        collection = f"apt_reports_{embedding_model.replace('/', '_').replace('-', '_')}"
+
+    queries = load_queries(queries_file)
+
+    chroma_manager = ChromaManager(collection_name=collection, embedding_model=embedding_model)
+    chroma_manager.load_vectorstore()
+
+    # Unbounded budget so the measurement isolates duplicated overlap, not trimming
+    packer = ContextPacker(budget=10 ** 9)
+
+    raw_tokens, stitched_tokens, merged = [], [], 0
+    for question in queries:
+        docs = chroma_manager.similarity_search(question, k=k)
+        stitched = stitch_adjacent_chunks(docs)
+        merged += len(docs) - len(stitched)
+
+        for target, chunks in ((raw_tokens, docs), (stitched_tokens, stitched)):
+            context, _ = packer.pack(chunks)
+            target.append(packer.count_tokens(APT_ATTRIBUTION_TEMPLATE.format(context=context, question=question)))
+
+    saved = [raw - stitched for raw, stitched in zip(raw_tokens, stitched_tokens)]
+    logger.info(f"Prompt tokens over {len(queries)} questions (k={k}, {merged} chunks merged):")
+    logger.info(f"  unstitched  mean={statistics.mean(raw_tokens):.0f}  total={sum(raw_tokens):,}")
+    logger.info(f"  stitched    mean={statistics.mean(stitched_tokens):.0f}  total={sum(stitched_tokens):,}")
+    logger.info(
+        f"  saved       mean={statistics.mean(saved):.0f}  max={max(saved)}  "
+        f"({sum(saved) / sum(raw_tokens):.1%} of prompt tokens)"
+    )
+
+if __name__ == "__main__":
+    app()
@@ -46,6 +46,7 @@ def sample_chunks() -> List[Document]:
             metadata={
                 "filename": "apt28.pdf",
                 "year": 2023,
+                "chunk_id": "apt28:0",
                 "apt_groups_mentioned": "APT28",
                 "techniques_mentioned": "T1566.001"
             }
@@ -55,6 +56,7 @@ def sample_chunks() -> List[Document]:
             metadata={
                 "filename": "apt28.pdf",
                 "year": 2023,
+                "chunk_id": "apt28:1",
                 "techniques_mentioned": "T1566"
             }
         ),
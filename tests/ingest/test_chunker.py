@@ -1,6 +1,6 @@
 import pytest
 from langchain_core.documents import Document
-from apt.ingest.chunker import DocumentChunker, chunk_documents
+from apt.ingest.chunker import DocumentChunker, chunk_documents, chunk_parent_documents
 
 class TestDocumentChunker:
     def test_chunk_documents(self, sample_documents):
@@ -25,6 +25,52 @@ class TestDocumentChunker:
         for chunk in chunks:
             assert "filename" in chunk.metadata
 
+    def test_chunk_ids_assigned(self):
+        doc = Document(page_content="A" * 500, metadata={"source": "/reports/2023/a.pdf"})
+        chunker = DocumentChunker(chunk_size=100, chunk_overlap=0)
+        chunks = chunker.chunk_documents([doc])
+
+        ids = [chunk.metadata["chunk_id"] for chunk in chunks]
+        assert len(set(ids)) == len(chunks)
+        assert [chunk.metadata["chunk_index"] for chunk in chunks] == list(range(len(chunks)))
+        assert all("start_index" in chunk.metadata for chunk in chunks)
+
+    def test_chunk_ids_stable(self, sample_documents):
+        chunker = DocumentChunker(chunk_size=100, chunk_overlap=20)
+        first = [c.metadata["chunk_id"] for c in chunker.chunk_documents(sample_documents)]
+        second = [c.metadata["chunk_id"] for c in chunker.chunk_documents(sample_documents)]
+
+        assert first == second
+
+    def test_chunk_with_parents(self):
+        text = " ".join(f"Sentence {i} about APT28." for i in range(200))
+        doc = Document(page_content=text, metadata={"source": "/reports/2023/a.pdf", "page": 2})
+        chunker = DocumentChunker(chunk_size=150, chunk_overlap=0, parent_chunk_size=600)
+        children, parents = chunker.chunk_with_parents([doc])
+
+        by_id = {p.metadata["parent_id"]: p for p in parents}
+        assert len(by_id) == len(parents) > 1
+        assert len(children) > len(parents)
+        for child in children:
+            parent = by_id[child.metadata["parent_id"]]
+            start = child.metadata["start_index"]
+            assert child.page_content in parent.page_content
+            assert text[start:start + len(child.page_content)] == child.page_content
+            assert child.metadata["page"] == 2
+        assert len({c.metadata["chunk_id"] for c in children}) == len(children)
+
+    def test_chunk_with_parents_requires_parent_size(self):
+        with pytest.raises(ValueError):
+            DocumentChunker().chunk_with_parents([Document(page_content="text")])
+
+    def test_chunk_parent_documents_function(self):
+        doc = Document(page_content="APT28 used T1566.001. " * 200, metadata={"filename": "a.pdf"})
+        children, parents = chunk_parent_documents([doc])
+
+        assert all(len(c.page_content) <= 400 for c in children)
+        assert all(len(p.page_content) <= 2000 for p in parents)
+        assert children[0].metadata["apt_groups_mentioned"] == "APT28"
+
     def test_enrich_metadata(self):
         doc = Document(
             page_content="APT28 used T1566.001 technique",
@@ -36,6 +82,12 @@ class TestDocumentChunker:
         assert enriched[0].metadata["apt_groups_mentioned"] == "APT28"
         assert "T1566.001" in enriched[0].metadata["techniques_mentioned"]
 
+    def test_enrich_metadata_iocs(self):
+        doc = Document(page_content="C2 at hxxp://bad[.]com/x and 10.0.0[.]1", metadata={"filename": "test.pdf"})
+        enriched = DocumentChunker().enrich_metadata([doc])
+
+        assert enriched[0].metadata["iocs"] == "10.0.0.1, bad.com, http://bad.com/x"
+
     def test_chunk_documents_function(self, sample_documents):
         chunks = chunk_documents(sample_documents)
 
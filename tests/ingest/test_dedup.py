@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from apt.ingest.dedup import cluster_signatures, deduplicate_chunks, minhash_signatures
+
+DISCLAIMER = (
+    "This report is provided for informational purposes only and the vendor makes no warranties "
+    "regarding the accuracy of the information contained herein. Contact the threat intelligence "
+    "team for further questions about indicators described in this publication."
+)
+
+def report_text(seed: int, sentences: int = 4):
+    rng = np.random.default_rng(seed)
+    words = ["loader", "beacon", "registry", "payload", "operator", "implant", "server", "victim", "lure", "archive"]
+    return " ".join(" ".join(rng.choice(words, size=12)) + "." for _ in range(sentences))
+
+class TestMinHash:
+    def test_identical_texts_share_signature(self):
+        signatures = minhash_signatures([DISCLAIMER, DISCLAIMER, report_text(1)])
+
+        assert (signatures[0] == signatures[1]).all()
+        assert np.mean(signatures[0] == signatures[2]) < 0.2
+
+    def test_near_duplicates_cluster(self):
+        edited = DISCLAIMER.replace("further questions", "more questions")
+        signatures = minhash_signatures([DISCLAIMER, report_text(2), edited, report_text(3)])
+
+        roots = cluster_signatures(signatures, threshold=0.6)
+
+        assert roots[0] == roots[2]
+        assert len(set(roots)) == 3
+
+class TestDeduplicateChunks:
+    def test_keeps_earliest_copy_with_provenance(self):
+        chunks = [
+            Document(page_content=DISCLAIMER, metadata={"chunk_id": "b:0", "filename": "b.pdf", "year": 2022, "iocs": "bad.com"}),
+            Document(page_content=report_text(4), metadata={"chunk_id": "b:1", "filename": "b.pdf", "year": 2022}),
+            Document(page_content=DISCLAIMER, metadata={"chunk_id": "a:0", "filename": "a.pdf", "year": 2019, "apt_groups_mentioned": "APT28"}),
+        ]
+
+        unique, stats = deduplicate_chunks(chunks)
+
+        assert [c.metadata["chunk_id"] for c in unique] == ["b:1", "a:0"]
+        kept = unique[1].metadata
+        assert kept["duplicate_count"] == 2
+        assert kept["duplicate_chunk_ids"] == "b:0"
+        assert kept["duplicate_sources"] == "b.pdf"
+        assert kept["duplicate_years"] == "2022"
+        assert kept["iocs"] == "bad.com"
+        assert kept["apt_groups_mentioned"] == "APT28"
+        assert stats["removed_chunks"] == 1
+        assert stats["removed_chars"] == len(DISCLAIMER)
+
+    def test_reprinted_report_detected(self):
+        original = [report_text(10 + i) for i in range(5)]
+        chunks = [
+            Document(page_content=text, metadata={"chunk_id": f"{name}:{i}", "filename": f"{name}.pdf", "year": year})
+            for name, year in (("orig", 2018), ("reprint", 2020))
+            for i, text in enumerate(original)
+        ]
+
+        unique, stats = deduplicate_chunks(chunks)
+
+        assert len(unique) == 5
+        assert all(c.metadata["filename"] == "orig.pdf" for c in unique)
+        assert stats["duplicate_reports"] == {"reprint.pdf": "orig.pdf"}
+
+    def test_distinct_chunks_untouched(self):
+        chunks = [Document(page_content=report_text(20 + i), metadata={"chunk_id": f"a:{i}"}) for i in range(5)]
+
+        unique, stats = deduplicate_chunks(chunks)
+
+        assert unique == chunks
+        assert stats["duplicate_clusters"] == 0
+        assert "duplicate_count" not in unique[0].metadata
+
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            deduplicate_chunks([], num_perm=64, bands=10)
@@ -1,5 +1,5 @@
 import pytest
-from apt.ingest.metadata import extract_apt_mentions, extract_technique_mentions
+from apt.ingest.metadata import extract_apt_mentions, extract_iocs, extract_technique_mentions, ioc_type, refang
 
 class TestExtractAPTMentions:
     def test_extract_apt_numbers(self):
@@ -52,3 +52,47 @@ class TestExtractTechniqueMentions:
         text = "Generic threat report without technique IDs"
         result = extract_technique_mentions(text)
         assert len(result) == 0
+
+class TestRefang:
+    @pytest.mark.parametrize("defanged,expected", [
+        ("hxxp://evil[.]com", "http://evil.com"),
+        ("hXXps://evil(.)com/a", "https://evil.com/a"),
+        ("10.0.0[.]1", "10.0.0.1"),
+        ("evil[dot]com", "evil.com"),
+        ("user[@]evil.com", "user@evil.com"),
+    ])
+    def test_refang(self, defanged, expected):
+        assert refang(defanged) == expected
+
+class TestExtractIOCs:
+    def test_extracts_and_normalizes(self):
+        text = (
+            "Beacons to hxxps://Update-Check[.]NET/gate.php and 185.25.51[.]198. "
+            "Dropper SHA256 E3B0C44298FC1C149AFBF4C8996FB92427AE41E4649B934CA495991B7852B855, "
+            "MD5 d41d8cd98f00b204e9800998ecf8427e."
+        )
+        iocs = extract_iocs(text)
+
+        assert iocs["url"] == {"https://update-check.net/gate.php"}
+        assert iocs["domain"] == {"update-check.net"}
+        assert iocs["ipv4"] == {"185.25.51.198"}
+        assert iocs["sha256"] == {"e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"}
+        assert iocs["md5"] == {"d41d8cd98f00b204e9800998ecf8427e"}
+
+    def test_file_names_are_not_domains(self):
+        iocs = extract_iocs("The loader.exe drops payload.dll next to report.pdf, e.g. in version 1.2.3")
+
+        assert "domain" not in iocs
+
+    def test_no_iocs(self):
+        assert extract_iocs("APT28 used spearphishing") == {}
+
+    @pytest.mark.parametrize("value,expected", [
+        ("evil[.]com", "domain"),
+        ("8.8.8.8", "ipv4"),
+        ("a" * 40, "sha1"),
+        ("hxxp://x[.]org/p", "url"),
+        ("loader.exe", None),
+    ])
+    def test_ioc_type(self, value, expected):
+        assert ioc_type(value) == expected
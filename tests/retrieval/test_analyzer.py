@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.documents import Document
+from apt.retrieval.analyzer import analyze_question
+from apt.store.metadata_index import build_metadata_index
+
+@pytest.fixture
+def metadata_index():
+    return build_metadata_index([
+        Document(page_content="", metadata={"chunk_id": "a:0", "apt_groups_mentioned": "APT28", "techniques_mentioned": "T1566.001", "year": 2023}),
+        Document(page_content="", metadata={"chunk_id": "b:0", "apt_groups_mentioned": "LAZARUS", "year": 2021}),
+    ])
+
+class TestAnalyzeQuestion:
+    def test_no_signals(self):
+        assert analyze_question("Which groups use spearphishing?") is None
+
+    def test_single_year(self):
+        assert analyze_question("spearphishing campaigns from 2023") == {"year": {"$in": [2023]}}
+
+    @pytest.mark.parametrize("question,expected", [
+        ("campaigns between 2019 and 2021", {"$and": [{"year": {"$gte": 2019}}, {"year": {"$lte": 2021}}]}),
+        ("campaigns in 2021-2019", {"$and": [{"year": {"$gte": 2019}}, {"year": {"$lte": 2021}}]}),
+        ("activity since 2019 and before 2021", {"$and": [{"year": {"$gte": 2019}}, {"year": {"$lt": 2021}}]}),
+        ("activity since 2020", {"year": {"$gte": 2020}}),
+        ("activity before 2015", {"year": {"$lt": 2015}}),
+    ])
+    def test_year_ranges(self, question, expected):
+        assert analyze_question(question) == expected
+
+    @pytest.mark.parametrize("question,expected", [
+        ("campaigns between 2019 and 2021", ["b", "c"]),
+        ("activity since 2019 and before 2021", ["b"]),
+        ("activity in 2021", ["c"]),
+    ])
+    def test_filters_accepted_by_chroma(self, question, expected):
+        import chromadb
+
+        collection = chromadb.EphemeralClient().get_or_create_collection(f"analyzer_{len(question)}")
+        collection.upsert(
+            ids=["a", "b", "c"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+            metadatas=[{"year": 2018}, {"year": 2019}, {"year": 2021}],
+        )
+
+        result = collection.get(where=analyze_question(question))
+
+        assert sorted(result["ids"]) == expected
+
+    @pytest.mark.parametrize("question", [
+        "beacons to port 2020 on the C2 server",
+        "implants using 2048-bit RSA keys",
+        "clusters of 1999 samples",
+        "what did the 2021 loader drop",
+    ])
+    def test_bare_numbers_are_not_years(self, question):
+        assert analyze_question(question) is None
+
+    def test_ignores_cve_and_technique_numbers(self):
+        assert analyze_question("exploitation of CVE-2021-44228 via T1190") is None
+
+    def test_groups_and_techniques_need_index(self):
+        assert analyze_question("what does APT28 use for T1566") is None
+
+    def test_groups_and_techniques_with_index(self, metadata_index):
+        result = analyze_question("what does APT28 use for T1566", metadata_index)
+
+        assert result == {"$and": [
+            {"apt_groups_mentioned": {"$in": ["APT28"]}},
+            {"techniques_mentioned": {"$in": ["T1566"]}},
+        ]}
+        candidates, residual = metadata_index.resolve_filter(result)
+        assert candidates == {"a:0"} and residual is None
+
+    def test_unknown_values_dropped(self, metadata_index):
+        assert analyze_question("Kimsuky activity in 2019", metadata_index) is None
+        assert analyze_question("Lazarus in 2021 and 2019", metadata_index) == {"$and": [
+            {"apt_groups_mentioned": {"$in": ["LAZARUS"]}},
+            {"year": {"$in": [2021]}},
+        ]}
@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.documents import Document
+from apt.retrieval.attribution import ATTRIBUTION_PREFIX, build_attribution_prompt, score_actors
+from apt.retrieval.context import ContextPacker
+
+def chunk(chunk_id, groups, techniques="", similarity=None):
+    metadata = {"chunk_id": chunk_id, "filename": f"{chunk_id}.pdf", "apt_groups_mentioned": groups}
+    if techniques:
+        metadata["techniques_mentioned"] = techniques
+    if similarity is not None:
+        metadata["similarity"] = similarity
+    return Document(page_content=f"Report {chunk_id}", metadata=metadata)
+
+class TestBuildAttributionPrompt:
+    def test_static_prefix_first(self):
+        prompt, stats = build_attribution_prompt("Spear phishing", [chunk("a", "APT28")], ContextPacker(budget=100))
+
+        assert prompt.startswith(ATTRIBUTION_PREFIX)
+        assert prompt.rstrip().endswith("Spear phishing")
+        assert stats["prompt_tokens"] > stats["context_tokens"] > 0
+
+class TestScoreActors:
+    def test_similarity_weighted_ranking(self):
+        docs = [
+            chunk("a", "APT28", "T1566.001", similarity=0.9),
+            chunk("b", "Lazarus", "T1059", similarity=0.5),
+            chunk("c", "Lazarus", "T1059", similarity=0.5),
+            chunk("d", "APT28", "T1566.001,T1071", similarity=0.8),
+        ]
+
+        ranking = score_actors(docs)
+
+        assert [candidate["actor"] for candidate in ranking] == ["APT28", "LAZARUS"]
+        assert ranking[0]["score"] == pytest.approx(1.7)
+        assert ranking[0]["share"] == pytest.approx(1.7 / 2.7)
+        assert ranking[0]["chunks"] == 2
+        assert [doc.metadata["chunk_id"] for doc in ranking[0]["evidence"]] == ["a", "d"]
+
+    def test_techniques_per_actor(self):
+        docs = [
+            chunk("a", "APT28", "T1566.001", similarity=0.9),
+            chunk("b", "APT28", "T1566.001,T1071", similarity=0.4),
+        ]
+
+        techniques = dict(score_actors(docs)[0]["techniques"])
+
+        assert techniques["T1566.001"] == pytest.approx(1.3)
+        assert techniques["T1566"] == pytest.approx(1.3)
+        assert techniques["T1071"] == pytest.approx(0.4)
+
+    def test_multi_group_chunk_split_between_groups(self):
+        docs = [chunk("a", "APT28,APT29", similarity=1.0), chunk("b", "APT29", similarity=0.4)]
+
+        scores = {candidate["actor"]: candidate["score"] for candidate in score_actors(docs)}
+
+        assert scores == pytest.approx({"APT28": 0.5, "APT29": 0.9})
+
+    def test_rank_order_used_without_scores(self):
+        docs = [chunk("a", "Turla"), chunk("b", "Kimsuky"), chunk("c", "Kimsuky")]
+
+        ranking = score_actors(docs)
+
+        assert ranking[0]["actor"] == "TURLA"
+        assert ranking[0]["score"] == pytest.approx(1.0)
+        assert ranking[1]["score"] == pytest.approx(1 / 2 + 1 / 3)
+
+    def test_explicit_scores_and_top_n(self):
+        docs = [chunk("a", "Turla"), chunk("b", "Kimsuky")]
+
+        ranking = score_actors(docs, scores=[0.1, 0.9], top_n=1)
+
+        assert [candidate["actor"] for candidate in ranking] == ["KIMSUKY"]
+
+    def test_negative_rerank_logits(self):
+        docs = [chunk("a", "Turla"), chunk("b", "Kimsuky")]
+        docs[0].metadata["rerank_score"] = -2.0
+        docs[1].metadata["rerank_score"] = -6.0
+
+        ranking = score_actors(docs)
+
+        assert [candidate["actor"] for candidate in ranking] == ["TURLA", "KIMSUKY"]
+        assert all(candidate["score"] > 0 for candidate in ranking)
+
+    def test_no_mentions(self):
+        assert score_actors([Document(page_content="x", metadata={})]) == []
+        assert score_actors([]) == []
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from apt.retrieval.bulk import completed_ids, load_questions, question_id, run_bulk
+from apt.retrieval.chain import RAGChain
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+@pytest.fixture
+def rag_chain():
+    retriever = RunnableLambda(
+        lambda query: [Document(page_content="APT28 content", metadata={"filename": "a.pdf", "chunk_id": "a:0"})]
+    )
+
+    async def agenerate(prompt):
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    return RAGChain(retriever, llm=RunnableLambda(lambda prompt: "answer", afunc=agenerate))
+
+class TestLoadQuestions:
+    def test_accepts_strings_and_objects(self, tmp_path):
+        path = tmp_path / "questions.jsonl"
+        write_jsonl(path, ["Who is APT28?", {"id": "q2", "question": "Who is APT29?", "filter": {"year": 2023}}])
+
+        records = load_questions(path)
+
+        assert records[0]["id"] == question_id("Who is APT28?")
+        assert records[1]["id"] == "q2"
+        assert records[1]["filter"] == {"year": 2023}
+
+    def test_default_filter(self, tmp_path):
+        path = tmp_path / "questions.jsonl"
+        write_jsonl(path, [{"question": "Who is APT28?"}])
+
+        records = load_questions(path, default_filter={"year": 2024})
+
+        assert records[0]["filter"] == {"year": 2024}
+
+    def test_missing_question_raises_error(self, tmp_path):
+        path = tmp_path / "questions.jsonl"
+        write_jsonl(path, [{"id": "q1"}])
+
+        with pytest.raises(ValueError, match="no question"):
+            load_questions(path)
+
+    def test_duplicate_ids_raise_error(self, tmp_path):
+        path = tmp_path / "questions.jsonl"
+        write_jsonl(path, ["Who is APT28?", "Who is APT28?"])
+
+        with pytest.raises(ValueError, match="Duplicate"):
+            load_questions(path)
+
+class TestCompletedIds:
+    def test_missing_file(self, tmp_path):
+        assert completed_ids(tmp_path / "answers.jsonl") == set()
+
+    def test_drops_truncated_last_line(self, tmp_path):
+        path = tmp_path / "answers.jsonl"
+        path.write_text(json.dumps({"id": "q1"}) + "\n" + '{"id": "q2", "answ')
+
+        assert completed_ids(path) == {"q1"}
+        assert path.read_text() == json.dumps({"id": "q1"}) + "\n"
+
+class TestRunBulk:
+    def test_answers_all_questions(self, tmp_path, rag_chain):
+        records = [{"id": f"q{i}", "question": f"Question {i}", "filter": None} for i in range(5)]
+        output = tmp_path / "answers.jsonl"
+
+        stats = asyncio.run(run_bulk(rag_chain, records, output, concurrency=2))
+
+        answers = read_jsonl(output)
+        assert stats["completed"] == 5
+        assert {answer["id"] for answer in answers} == {f"q{i}" for i in range(5)}
+        assert answers[0]["answer"] == "answer"
+        assert answers[0]["sources"] == [{"filename": "a.pdf", "year": None, "chunk_id": "a:0"}]
+
+    def test_resumes_from_partial_output(self, tmp_path, rag_chain):
+        records = [{"id": f"q{i}", "question": f"Question {i}", "filter": None} for i in range(3)]
+        output = tmp_path / "answers.jsonl"
+        output.write_text(json.dumps({"id": "q0", "answer": "earlier"}) + "\n")
+
+        stats = asyncio.run(run_bulk(rag_chain, records, output))
+
+        answers = read_jsonl(output)
+        assert stats["skipped"] == 1
+        assert stats["completed"] == 2
+        assert [answer["id"] for answer in answers].count("q0") == 1
+
+    def test_bounded_concurrency_runs_in_parallel(self, tmp_path, rag_chain):
+        records = [{"id": f"q{i}", "question": f"Question {i}", "filter": None} for i in range(8)]
+
+        stats = asyncio.run(run_bulk(rag_chain, records, tmp_path / "answers.jsonl", concurrency=8))
+
+        assert stats["elapsed_s"] < 8 * 0.05
+
+    def test_failed_questions_not_written(self, tmp_path):
+        def llm_func(prompt):
+            if "Question 1" in prompt.to_string():
+                raise RuntimeError("Ollama unavailable")
+            return "answer"
+
+        chain = RAGChain(RunnableLambda(lambda query: []), llm=RunnableLambda(llm_func))
+        records = [{"id": f"q{i}", "question": f"Question {i}", "filter": None} for i in range(2)]
+        output = tmp_path / "answers.jsonl"
+
+        stats = asyncio.run(run_bulk(chain, records, output))
+
+        assert stats["failed"] == 1
+        assert [answer["id"] for answer in read_jsonl(output)] == ["q0"]
+
+    def test_batches_question_embeddings(self, tmp_path):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        calls = {"documents": 0, "query": 0}
+
+        class CountingEmbedding(DeterministicFakeEmbedding):
+            def embed_documents(self, texts):
+                calls["documents"] += 1
+                return super().embed_documents(texts)
+
+            def embed_query(self, text):
+                calls["query"] += 1
+                return super().embed_query(text)
+
+        vectorstore = InMemoryVectorStore(CountingEmbedding(size=8))
+        vectorstore.add_documents([Document(page_content="APT28 content", metadata={"filename": "a.pdf"})])
+        calls["documents"] = 0
+
+        chain = RAGChain(vectorstore.as_retriever(), llm=RunnableLambda(lambda prompt: "answer"))
+        records = [{"id": f"q{i}", "question": f"Question {i}", "filter": None} for i in range(5)]
+
+        asyncio.run(run_bulk(chain, records, tmp_path / "answers.jsonl", embed_batch_size=3))
+
+        assert calls == {"documents": 2, "query": 0}
+
+    def test_invalid_concurrency_raises_error(self, tmp_path, rag_chain):
+        with pytest.raises(ValueError, match="Concurrency"):
+            asyncio.run(run_bulk(rag_chain, [], tmp_path / "answers.jsonl", concurrency=0))
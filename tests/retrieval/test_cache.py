@@ -0,0 +1,88 @@
+import pytest
+from apt.retrieval.cache import SemanticAnswerCache, filter_key
+
+class TestFilterKey:
+    def test_order_independent(self):
+        assert filter_key({"year": 2023, "apt": "APT28"}) == filter_key({"apt": "APT28", "year": 2023})
+
+    def test_none_and_empty_match(self):
+        assert filter_key(None) == filter_key({})
+
+class TestSemanticAnswerCache:
+    @pytest.fixture
+    def result(self):
+        return {"question": "Who is APT28?", "answer": "A Russian group.", "source_documents": [], "num_sources": 0}
+
+    def test_invalid_threshold_raises_error(self):
+        with pytest.raises(ValueError, match="threshold"):
+            SemanticAnswerCache(threshold=0)
+
+    def test_invalid_size_raises_error(self):
+        with pytest.raises(ValueError, match="size"):
+            SemanticAnswerCache(max_size=0)
+
+    def test_hit_on_near_duplicate(self, result):
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], result)
+
+        hit = cache.lookup([0.99, 0.05, 0.0])
+
+        assert hit is not None
+        cached, similarity = hit
+        assert cached["answer"] == "A Russian group."
+        assert similarity > 0.95
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_below_threshold(self, result):
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], result)
+
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_filter_must_match(self, result):
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], result, metadata_filter={"year": 2023})
+
+        assert cache.lookup([1.0, 0.0], metadata_filter={"year": 2024}) is None
+        assert cache.lookup([1.0, 0.0]) is None
+        assert cache.lookup([1.0, 0.0], metadata_filter={"year": 2023}) is not None
+
+    def test_ttl_expires_entries(self, result, mocker):
+        clock = mocker.patch("apt.retrieval.cache.time.time", return_value=1000.0)
+        cache = SemanticAnswerCache(ttl=60)
+        cache.store([1.0, 0.0], result)
+
+        clock.return_value = 1061.0
+
+        assert cache.lookup([1.0, 0.0]) is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self, result):
+        cache = SemanticAnswerCache(max_size=2)
+        cache.store([1.0, 0.0, 0.0], {**result, "answer": "first"})
+        cache.store([0.0, 1.0, 0.0], {**result, "answer": "second"})
+
+        cache.lookup([1.0, 0.0, 0.0])
+        cache.store([0.0, 0.0, 1.0], {**result, "answer": "third"})
+
+        assert len(cache) == 2
+        assert cache.lookup([1.0, 0.0, 0.0])[0]["answer"] == "first"
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+    def test_version_change_invalidates(self, result):
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], result, version="abc:10")
+
+        assert cache.lookup([1.0, 0.0], version="abc:10") is not None
+        assert cache.lookup([1.0, 0.0], version="abc:12") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self, result):
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], result)
+
+        cache.invalidate()
+
+        assert len(cache) == 0
+        assert cache.lookup([1.0, 0.0]) is None
@@ -1,7 +1,10 @@
+import asyncio
+import time
 import pytest
 from unittest.mock import Mock, MagicMock
 from langchain_core.documents import Document
 from langchain_core.runnables import RunnableLambda
+from apt.retrieval.cache import SemanticAnswerCache
 from apt.retrieval.chain import RAGChain, create_rag_chain
 
 class TestRAGChain:
@@ -62,9 +65,9 @@ class TestRAGChain:
         assert "Year: 2024" in formatted
 
     def test_format_docs_truncates_content(self, mock_retriever, mock_llm):
-        chain = RAGChain(mock_retriever)
+        chain = RAGChain(mock_retriever, context_budget=100)
 
-        long_content = "A" * 1000
+        long_content = "A sentence of evidence. " * 40
         docs = [
             Document(
                 page_content=long_content,
@@ -101,6 +104,201 @@ class TestRAGChain:
         assert result["question"] == "What are APT28's tactics?"
         assert len(result["source_documents"]) == 2
 
+    def test_query_retrieves_once(self, mock_llm):
+        calls = []
+
+        def retriever_func(query):
+            calls.append(query)
+            return [Document(page_content="APT28 content", metadata={"filename": "apt28.pdf"})]
+
+        chain = RAGChain(RunnableLambda(retriever_func))
+        result = chain.query("APT28?")
+
+        assert calls == ["APT28?"]
+        assert result["source_documents"][0].page_content == "APT28 content"
+
+    def test_query_prompt_uses_retrieved_docs(self, mocker):
+        prompts = []
+
+        def llm_func(prompt):
+            prompts.append(prompt.to_string())
+            return "answer"
+
+        mocker.patch("apt.retrieval.chain.OllamaLLM", return_value=RunnableLambda(llm_func))
+        retriever = RunnableLambda(
+            lambda query: [Document(page_content="Unique evidence text", metadata={"filename": "e.pdf"})]
+        )
+
+        RAGChain(retriever).query("What evidence?")
+
+        assert "Unique evidence text" in prompts[0]
+
+    def test_query_timings(self, mock_retriever, mock_llm):
+        chain = RAGChain(mock_retriever)
+
+        timings = chain.query("APT28?")["timings"]
+
+        assert set(timings) == {"embed_ms", "search_ms", "rerank_ms", "format_ms", "queue_ms", "llm_ttft_ms", "llm_total_ms", "total_ms"}
+        assert timings["embed_ms"] is None
+        assert timings["search_ms"] >= 0
+        assert timings["llm_ttft_ms"] <= timings["llm_total_ms"] <= timings["total_ms"]
+
+    def test_dropped_sources_not_reported(self, mock_llm):
+        docs = [
+            Document(page_content="Evidence sentence. " * 100, metadata={"filename": f"{i}.pdf", "rrf_score": score})
+            for i, score in enumerate([1.0, 0.0])
+        ]
+        chain = RAGChain(RunnableLambda(lambda query: docs), context_budget=300)
+
+        result = chain.query("APT28?")
+        events = list(chain.stream("APT28?"))
+
+        assert result["usage"]["dropped_sources"] == 1
+        assert [doc.metadata["filename"] for doc in result["source_documents"]] == ["0.pdf"]
+        assert result["num_sources"] == 1
+        assert events[0]["num_sources"] == events[-1]["num_sources"] == 1
+
+    def test_format_docs_keeps_chunks_within_budget(self, mock_retriever, mock_llm):
+        chain = RAGChain(mock_retriever)
+
+        content = "B" * 1000
+        formatted = chain._format_docs([Document(page_content=content, metadata={"filename": "t.pdf"})])
+
+        assert content in formatted
+
+    def test_query_reports_usage(self, mock_retriever, mock_llm):
+        chain = RAGChain(mock_retriever, context_budget=500)
+
+        usage = chain.query("APT28?")["usage"]
+
+        assert usage["context_budget"] == 500
+        assert 0 < usage["context_tokens"] <= 500
+        assert usage["prompt_tokens"] > usage["context_tokens"]
+        assert usage["dropped_sources"] == 0
+
+    def test_query_stitches_adjacent_chunks(self, mock_llm):
+        chunks = [
+            Document(page_content="APT28 used spearphishing", metadata={"source": "a.pdf", "start_index": 0, "chunk_id": "a:0"}),
+            Document(page_content="spearphishing lures", metadata={"source": "a.pdf", "start_index": 11, "chunk_id": "a:1"}),
+        ]
+        chain = RAGChain(RunnableLambda(lambda query: chunks))
+
+        result = chain.query("APT28?")
+
+        assert result["num_sources"] == 1
+        assert result["source_documents"][0].page_content == "APT28 used spearphishing lures"
+        assert result["source_documents"][0].metadata["merged_chunk_ids"] == ["a:0", "a:1"]
+
+    def test_query_without_stitching(self, mock_llm):
+        chunks = [
+            Document(page_content="APT28 used spearphishing", metadata={"source": "a.pdf", "start_index": 0}),
+            Document(page_content="spearphishing lures", metadata={"source": "a.pdf", "start_index": 11}),
+        ]
+        chain = RAGChain(RunnableLambda(lambda query: chunks), stitch=False)
+
+        assert chain.query("APT28?")["num_sources"] == 2
+
+    def test_query_expands_to_parent_sections(self, mock_llm, tmp_path):
+        from apt.store.parents import build_parent_store
+
+        section = "APT28 used spearphishing lures against ministries and then deployed X-Agent."
+        store = build_parent_store(
+            [Document(page_content=section, metadata={"source": "a.pdf", "parent_id": "a:p0"})],
+            tmp_path / "parents.sqlite",
+        )
+        chunks = [
+            Document(page_content="APT28 used spearphishing", metadata={"source": "a.pdf", "chunk_id": "a:0", "parent_id": "a:p0"}),
+            Document(page_content="deployed X-Agent", metadata={"source": "a.pdf", "chunk_id": "a:1", "parent_id": "a:p0"}),
+        ]
+        chain = RAGChain(RunnableLambda(lambda query: chunks), parent_store=store)
+
+        result = chain.query("APT28?")
+        async_result = asyncio.run(chain.aquery("APT28?"))
+
+        assert result["num_sources"] == async_result["num_sources"] == 1
+        assert result["source_documents"][0].page_content == section
+        assert result["source_documents"][0].metadata["child_chunk_ids"] == ["a:0", "a:1"]
+
+    def test_query_reranks_over_fetched_candidates(self, mock_llm):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+        from apt.retrieval.rerank import CrossEncoderReranker
+
+        class KeywordModel:
+            def predict(self, pairs, batch_size=32, show_progress_bar=False):
+                return [float("HrServ" in text) for _, text in pairs]
+
+        vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=8))
+        vectorstore.add_documents([
+            Document(page_content=f"Filler report {i}", metadata={"filename": f"{i}.pdf"}) for i in range(11)
+        ] + [Document(page_content="HrServ webshell", metadata={"filename": "hrserv.pdf"})])
+
+        reranker = CrossEncoderReranker(model=KeywordModel())
+        chain = RAGChain(vectorstore.as_retriever(search_kwargs={"k": 2}), reranker=reranker, rerank_fetch_k=12, rerank_top_n=1)
+        result = chain.query("Which group uses HrServ?")
+
+        assert result["num_sources"] == 1
+        assert result["source_documents"][0].page_content == "HrServ webshell"
+        assert result["timings"]["rerank_ms"] is not None
+
+    def test_query_splits_embed_and_search_for_vectorstore_retriever(self, mock_llm):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=8))
+        vectorstore.add_documents([
+            Document(page_content="APT28 spearphishing", metadata={"filename": "a.pdf"}),
+            Document(page_content="Lazarus malware", metadata={"filename": "b.pdf"}),
+        ])
+
+        chain = create_rag_chain(vectorstore)
+        result = chain.query("APT28 spearphishing")
+
+        assert result["num_sources"] == 2
+        assert result["timings"]["embed_ms"] is not None
+        assert result["timings"]["search_ms"] is not None
+
+    def test_stream_emits_sources_then_tokens(self, mock_retriever, mocker):
+        from langchain_core.language_models import FakeStreamingListLLM
+
+        mocker.patch("apt.retrieval.chain.OllamaLLM", return_value=FakeStreamingListLLM(responses=["APT28"]))
+        chain = RAGChain(mock_retriever)
+
+        events = list(chain.stream("Who?"))
+
+        assert events[0]["type"] == "sources"
+        assert events[0]["num_sources"] == 2
+        tokens = [event["content"] for event in events if event["type"] == "token"]
+        assert len(tokens) > 1
+        assert "".join(tokens) == "APT28"
+        assert events[-1]["type"] == "result"
+        assert events[-1]["answer"] == "APT28"
+        assert events[-1]["timings"]["llm_ttft_ms"] is not None
+
+    def test_stream_is_lazy(self, mock_llm):
+        calls = []
+        chain = RAGChain(RunnableLambda(lambda query: calls.append(query) or []))
+
+        events = chain.stream("Who?")
+        assert calls == []
+
+        next(events)
+        assert calls == ["Who?"]
+
+    def test_stream_with_filter(self, mock_llm):
+        mock_vectorstore = Mock()
+        mock_vectorstore.similarity_search.return_value = [
+            Document(page_content="Filtered", metadata={"filename": "a.pdf", "year": 2023})
+        ]
+        mock_retriever = RunnableLambda(lambda query: [])
+        mock_retriever.vectorstore = mock_vectorstore
+
+        chain = RAGChain(mock_retriever)
+        events = list(chain.stream("APT28", metadata_filter={"year": 2023}))
+
+        assert events[0]["num_sources"] == 1
+        assert events[-1]["filter"] == {"year": 2023}
+
     def test_query_with_filter(self, mock_llm):
         mock_vectorstore = Mock()
         mock_vectorstore.similarity_search.return_value = [
@@ -133,6 +331,321 @@ class TestRAGChain:
         assert "source_documents" in result
         assert "filter" in result
         assert result["filter"] == {"year": 2023}
+        assert "timings" in result
+
+    def test_query_with_filter_uses_metadata_index(self, mock_llm):
+        from apt.store.metadata_index import build_metadata_index
+
+        metadata_index = build_metadata_index([
+            Document(page_content="x", metadata={"chunk_id": "a:0", "apt_groups_mentioned": "APT28"}),
+            Document(page_content="y", metadata={"chunk_id": "b:0", "apt_groups_mentioned": "LAZARUS"}),
+        ])
+
+        mock_vectorstore = Mock()
+        mock_vectorstore.similarity_search.return_value = []
+        mock_retriever = RunnableLambda(lambda query: [])
+        mock_retriever.vectorstore = mock_vectorstore
+
+        chain = RAGChain(mock_retriever, metadata_index=metadata_index)
+        chain.query_with_filter("APT28 tactics", metadata_filter={"apt_groups_mentioned": "APT28"})
+
+        _, kwargs = mock_vectorstore.similarity_search.call_args
+        assert kwargs["filter"] == {"chunk_id": {"$in": ["a:0"]}}
+
+    def test_query_with_filter_no_candidates_skips_search(self, mock_llm):
+        from apt.store.metadata_index import build_metadata_index
+
+        metadata_index = build_metadata_index([
+            Document(page_content="x", metadata={"chunk_id": "a:0", "apt_groups_mentioned": "APT28"}),
+        ])
+
+        mock_vectorstore = Mock()
+        mock_retriever = RunnableLambda(lambda query: [])
+        mock_retriever.vectorstore = mock_vectorstore
+
+        chain = RAGChain(mock_retriever, metadata_index=metadata_index)
+        result = chain.query_with_filter("Kimsuky", metadata_filter={"apt_groups_mentioned": "KIMSUKY"})
+
+        mock_vectorstore.similarity_search.assert_not_called()
+        assert result["num_sources"] == 0
+
+    @pytest.mark.parametrize("retriever_class,search", [
+        ("ShardedRetriever", "sharded_similarity_search"),
+        ("TwoStageRetriever", "two_stage_search"),
+    ])
+    def test_query_with_filter_routes_to_manager(self, mock_llm, retriever_class, search):
+        from apt.store import chroma
+
+        manager = Mock()
+        getattr(manager, search).return_value = [Document(page_content="Filtered", metadata={"filename": "a.pdf"})]
+        kwargs = {"vectorstore": Mock()} if retriever_class == "TwoStageRetriever" else {}
+        retriever = getattr(chroma, retriever_class)(manager=manager, search_kwargs={"k": 5}, **kwargs)
+
+        chain = RAGChain(retriever)
+        result = chain.query_with_filter("APT28", metadata_filter={"year": {"$in": [2023]}})
+        events = list(chain.stream("APT28", {"year": {"$in": [2023]}}))
+
+        assert getattr(manager, search).call_args.kwargs["filter"] == {"year": {"$in": [2023]}}
+        assert result["source_documents"][0].page_content == "Filtered"
+        assert events[-1]["num_sources"] == 1
+
+    def test_query_with_filter_keeps_hybrid_search(self, mock_llm):
+        from apt.store.chroma import HybridRetriever
+
+        manager = Mock()
+        manager.hybrid_search.return_value = [
+            Document(page_content="Filtered", metadata={"filename": "a.pdf", "year": 2023, "rrf_score": 0.03})
+        ]
+        retriever = HybridRetriever(manager=manager, vectorstore=Mock(), search_kwargs={"k": 5})
+
+        chain = RAGChain(retriever)
+        result = chain.query_with_filter("APT28", metadata_filter={"apt_groups_mentioned": "APT28"})
+        asyncio.run(chain.aquery_with_filter("APT28", {"apt_groups_mentioned": "APT28"}))
+
+        assert manager.hybrid_search.call_count == 2
+        assert manager.hybrid_search.call_args.kwargs["filter"] == {"apt_groups_mentioned": "APT28"}
+        retriever.vectorstore.similarity_search_by_vector.assert_not_called()
+        assert result["source_documents"][0].page_content == "Filtered"
+
+class TestAutoFilter:
+    @pytest.fixture
+    def mock_llm(self, mocker):
+        mock = mocker.patch("apt.retrieval.chain.OllamaLLM")
+        mock.return_value = RunnableLambda(lambda prompt: "answer")
+        return mock
+
+    @pytest.fixture
+    def search(self, mocker):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=8))
+        docs = [Document(page_content=f"doc {i}", metadata={"filename": f"{i}.pdf", "year": 2023}) for i in range(3)]
+        mock = mocker.patch.object(vectorstore, "similarity_search_by_vector", return_value=docs)
+        return vectorstore, mock
+
+    def test_year_in_question_becomes_filter(self, mock_llm, search):
+        vectorstore, mock = search
+        chain = RAGChain(vectorstore.as_retriever(search_kwargs={"k": 5}), auto_filter=True)
+
+        result = chain.query("Spearphishing campaigns from 2023")
+
+        _, kwargs = mock.call_args
+        assert kwargs["filter"] == {"year": {"$in": [2023]}}
+        assert result["filter"] == {"year": {"$in": [2023]}}
+        assert "filter_fallback" not in result
+        assert mock.call_count == 1
+
+    def test_falls_back_when_filter_matches_too_few(self, mock_llm, search):
+        vectorstore, mock = search
+        mock.side_effect = [[], mock.return_value]
+        chain = RAGChain(vectorstore.as_retriever(search_kwargs={"k": 5}), auto_filter=True)
+
+        result = asyncio.run(chain.aquery("Spearphishing campaigns from 2023"))
+
+        assert mock.call_count == 2
+        assert "filter" not in mock.call_args.kwargs
+        assert result["num_sources"] == 3
+        assert "filter" not in result
+        assert result["filter_fallback"] is True
+
+    def test_plain_question_unfiltered(self, mock_llm, search):
+        vectorstore, mock = search
+        chain = RAGChain(vectorstore.as_retriever(search_kwargs={"k": 5}), auto_filter=True)
+
+        result = chain.query("Which groups use spearphishing?")
+
+        assert "filter" not in mock.call_args.kwargs
+        assert "filter" not in result
+
+    def test_disabled_by_default(self, mock_llm, search):
+        vectorstore, mock = search
+        chain = RAGChain(vectorstore.as_retriever(search_kwargs={"k": 5}))
+
+        chain.query("Spearphishing campaigns from 2023")
+
+        assert "filter" not in mock.call_args.kwargs
+
+class TestAsyncRAGChain:
+    @pytest.fixture
+    def slow_llm(self):
+        def llm_func(prompt):
+            time.sleep(0.2)
+            return "answer"
+
+        async def allm_func(prompt):
+            await asyncio.sleep(0.2)
+            return "answer"
+
+        return RunnableLambda(llm_func, afunc=allm_func)
+
+    @pytest.fixture
+    def retriever(self):
+        docs = [Document(page_content="APT28 content", metadata={"filename": "apt28.pdf", "year": 2023})]
+
+        async def aretrieve(query):
+            return docs
+
+        return RunnableLambda(lambda query: docs, afunc=aretrieve)
+
+    def test_aquery(self, retriever, slow_llm):
+        chain = RAGChain(retriever, llm=slow_llm)
+
+        result = asyncio.run(chain.aquery("APT28?"))
+
+        assert result["answer"] == "answer"
+        assert result["num_sources"] == 1
+        assert result["timings"]["llm_total_ms"] >= 200
+
+    def test_aquery_with_filter(self, slow_llm):
+        mock_vectorstore = Mock()
+        mock_vectorstore.similarity_search.return_value = [
+            Document(page_content="Filtered", metadata={"filename": "a.pdf", "year": 2023})
+        ]
+        mock_retriever = RunnableLambda(lambda query: [])
+        mock_retriever.vectorstore = mock_vectorstore
+
+        chain = RAGChain(mock_retriever, llm=slow_llm)
+        result = asyncio.run(chain.aquery_with_filter("APT28", {"year": 2023}))
+
+        assert result["filter"] == {"year": 2023}
+        assert result["source_documents"][0].page_content == "Filtered"
+
+    def test_aquery_runs_concurrently(self, retriever, slow_llm):
+        chain = RAGChain(retriever, llm=slow_llm)
+
+        async def run_all():
+            return await asyncio.gather(*(chain.aquery(f"Question {i}") for i in range(8)))
+
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        assert [r["question"] for r in results] == [f"Question {i}" for i in range(8)]
+        assert elapsed < 8 * 0.2
+
+    def test_injected_llm_skips_ollama(self, retriever, slow_llm, mocker):
+        mock_ollama = mocker.patch("apt.retrieval.chain.OllamaLLM")
+
+        RAGChain(retriever, llm=slow_llm)
+
+        mock_ollama.assert_not_called()
+
+class TestLLMManagerIntegration:
+    @pytest.fixture
+    def retriever(self):
+        return RunnableLambda(lambda query: [Document(page_content="APT28 content", metadata={"filename": "a.pdf"})])
+
+    def test_chains_share_pooled_llm(self, retriever, mocker):
+        from apt.retrieval.llm import LLMClientManager
+
+        mocker.patch("apt.retrieval.llm.OllamaLLM", side_effect=lambda **kwargs: MagicMock())
+        manager = LLMClientManager()
+
+        first = RAGChain(retriever, llm_manager=manager)
+        second = RAGChain(retriever, llm_manager=manager)
+
+        assert first.llm is second.llm
+
+    def test_prompt_prefix_is_question_independent(self, retriever):
+        chain = RAGChain(retriever, llm=RunnableLambda(lambda prompt: "answer"))
+
+        prefix = chain.prompt_prefix
+        rendered = chain.prompt.format(context="[Report 1] evidence", question="Who is APT28?")
+
+        assert rendered.startswith(prefix)
+        assert "Provide a detailed answer" in prefix
+        assert "{context}" not in prefix
+
+    def test_warm_up_uses_prefix(self, retriever):
+        manager = Mock()
+        chain = RAGChain(retriever, llm_manager=manager)
+
+        chain.warm_up()
+
+        manager.warm_up.assert_called_once_with(chain.llm_model, chain.prompt_prefix, background=False)
+
+    def test_warm_up_without_manager_raises_error(self, retriever):
+        chain = RAGChain(retriever, llm=RunnableLambda(lambda prompt: "answer"))
+
+        with pytest.raises(ValueError, match="LLMClientManager"):
+            chain.warm_up()
+
+class TestAnswerCache:
+    @pytest.fixture
+    def vectorstore(self):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=8))
+        vectorstore.add_documents([
+            Document(page_content="APT28 spearphishing", metadata={"filename": "a.pdf", "year": 2023}),
+        ])
+        return vectorstore
+
+    @pytest.fixture
+    def llm_calls(self, mocker):
+        calls = []
+
+        def llm_func(prompt):
+            calls.append(prompt)
+            return "APT28 is a Russian threat group."
+
+        mocker.patch("apt.retrieval.chain.OllamaLLM", return_value=RunnableLambda(llm_func))
+        return calls
+
+    def test_repeated_question_served_from_cache(self, vectorstore, llm_calls):
+        chain = create_rag_chain(vectorstore, cache=SemanticAnswerCache())
+
+        first = chain.query("Who is APT28?")
+        second = chain.query("Who is APT28?")
+
+        assert len(llm_calls) == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["answer"] == first["answer"]
+        assert second["num_sources"] == first["num_sources"]
+        assert second["timings"]["llm_total_ms"] is None
+
+    def test_different_filter_misses_cache(self, vectorstore, llm_calls, mocker):
+        mocker.patch.object(vectorstore, "similarity_search_by_vector", return_value=[])
+        chain = create_rag_chain(vectorstore, cache=SemanticAnswerCache())
+
+        chain.query("Who is APT28?")
+        result = chain.query_with_filter("Who is APT28?", {"year": 2023})
+
+        assert len(llm_calls) == 2
+        assert result["cached"] is False
+
+    def test_stream_cache_hit(self, vectorstore, llm_calls):
+        chain = create_rag_chain(vectorstore, cache=SemanticAnswerCache())
+        chain.query("Who is APT28?")
+
+        events = list(chain.stream("Who is APT28?"))
+
+        assert [event["type"] for event in events] == ["sources", "token", "result"]
+        assert events[-1]["cached"] is True
+        assert len(llm_calls) == 1
+
+    def test_aquery_cache_hit(self, vectorstore, llm_calls):
+        chain = create_rag_chain(vectorstore, cache=SemanticAnswerCache())
+        chain.query("Who is APT28?")
+
+        result = asyncio.run(chain.aquery("Who is APT28?"))
+
+        assert result["cached"] is True
+        assert len(llm_calls) == 1
+
+    def test_collection_change_invalidates(self, vectorstore, llm_calls, mocker):
+        chain = create_rag_chain(vectorstore, cache=SemanticAnswerCache())
+        version = mocker.patch.object(chain, "_collection_version", return_value="c:1")
+
+        chain.query("Who is APT28?")
+        version.return_value = "c:2"
+        result = chain.query("Who is APT28?")
+
+        assert result["cached"] is False
+        assert len(llm_calls) == 2
 
 class TestCreateRAGChain:
     def test_create_rag_chain(self, mocker):
@@ -0,0 +1,108 @@
+import pytest
+from langchain_core.documents import Document
+from apt.retrieval.context import ContextPacker, estimate_tokens
+
+def make_doc(text, **metadata):
+    return Document(page_content=text, metadata={"filename": "r.pdf", "year": 2023, **metadata})
+
+class TestEstimateTokens:
+    def test_rounds_up(self):
+        assert estimate_tokens("abcde") == 2
+        assert estimate_tokens("") == 0
+
+class TestContextPacker:
+    def test_invalid_budget_raises_error(self):
+        with pytest.raises(ValueError, match="budget"):
+            ContextPacker(budget=0)
+
+    def test_short_chunks_kept_whole(self):
+        packer = ContextPacker(budget=1000)
+        docs = [make_doc("APT28 used spearphishing."), make_doc("Lazarus targeted banks.")]
+
+        context, stats = packer.pack(docs)
+
+        assert "APT28 used spearphishing." in context
+        assert "Lazarus targeted banks." in context
+        assert "[Report 2]" in context
+        assert stats["truncated"] == 0
+        assert stats["dropped"] == 0
+
+    def test_respects_budget(self):
+        packer = ContextPacker(budget=200)
+        docs = [make_doc("One sentence of evidence here. " * 50) for _ in range(5)]
+
+        context, stats = packer.pack(docs)
+
+        assert estimate_tokens(context) <= 200
+        assert stats["context_tokens"] <= 200
+        assert stats["truncated"] == 5
+
+    def test_trims_on_sentence_boundary(self):
+        packer = ContextPacker()
+        text = "First sentence here. Second sentence is here. Third sentence trails on."
+
+        trimmed = packer.trim(text, estimate_tokens("First sentence here. Second sen"))
+
+        assert trimmed == "First sentence here."
+
+    def test_trim_falls_back_to_words(self):
+        packer = ContextPacker()
+
+        trimmed = packer.trim("one two three four five six seven eight", 4)
+
+        assert trimmed == "one two three"
+
+    def test_allocates_by_relevance(self):
+        packer = ContextPacker(budget=300)
+        docs = [make_doc("Evidence sentence. " * 100) for _ in range(2)]
+
+        _, stats = packer.pack(docs, scores=[3.0, 1.0])
+
+        first, second = stats["documents"]
+        assert first["tokens"] > 2 * second["tokens"]
+
+    def test_short_chunks_release_budget(self):
+        packer = ContextPacker(budget=300)
+        docs = [make_doc("Tiny."), make_doc("Evidence sentence. " * 100)]
+
+        _, stats = packer.pack(docs, scores=[10.0, 1.0])
+
+        assert stats["documents"][0]["truncated"] is False
+        assert stats["documents"][1]["tokens"] > 200
+
+    def test_uses_rrf_score_metadata(self):
+        packer = ContextPacker(budget=300)
+        docs = [
+            make_doc("Evidence sentence. " * 100, rrf_score=0.01),
+            make_doc("Evidence sentence. " * 100, rrf_score=0.03),
+        ]
+
+        _, stats = packer.pack(docs)
+
+        assert stats["documents"][1]["tokens"] > stats["documents"][0]["tokens"]
+
+    def test_drops_lowest_ranked_when_headers_do_not_fit(self):
+        packer = ContextPacker(budget=30)
+        docs = [make_doc("Evidence.", chunk_id=f"r:{i}") for i in range(5)]
+
+        _, stats = packer.pack(docs)
+
+        assert stats["dropped"] > 0
+        assert stats["documents"][0]["chunk_id"] == "r:0"
+
+    def test_drops_sources_without_budget_share(self):
+        packer = ContextPacker(budget=300)
+        docs = [
+            make_doc("Evidence sentence. " * 100, chunk_id="r:0"),
+            make_doc("Evidence sentence. " * 100, chunk_id="r:1"),
+        ]
+
+        context, stats = packer.pack(docs, scores=[1.0, 0.0])
+
+        assert [doc["chunk_id"] for doc in stats["documents"]] == ["r:0"]
+        assert stats["dropped"] == 1
+        assert "[Report 2]" not in context
+
+    def test_score_count_mismatch_raises_error(self):
+        with pytest.raises(ValueError, match="Number of scores"):
+            ContextPacker().pack([make_doc("x")], scores=[1.0, 2.0])
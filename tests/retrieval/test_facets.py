@@ -0,0 +1,53 @@
+from apt.retrieval.facets import facet_queries, split_facets
+
+DESCRIPTION = (
+    "Spear phishing emails with macro-enabled documents targeted government agencies. "
+    "The macro drops a DLL loader via rundll32, then the loader beacons to C2 over HTTPS."
+)
+
+class TestSplitFacets:
+    def test_splits_sentences_and_sequencing(self):
+        facets = split_facets(DESCRIPTION)
+
+        assert facets == [
+            "Spear phishing emails with macro-enabled documents targeted government agencies",
+            "The macro drops a DLL loader via rundll32",
+            "the loader beacons to C2 over HTTPS",
+        ]
+
+    def test_splits_list_items(self):
+        facets = split_facets("Observed:\n- Credential dumping with Mimikatz\n- Lateral movement over SMB shares")
+
+        assert facets == ["Observed: Credential dumping with Mimikatz", "Lateral movement over SMB shares"]
+
+    def test_short_fragments_merge(self):
+        facets = split_facets("Loader found. Uses DLL side-loading of a signed binary.")
+
+        assert facets == ["Loader found Uses DLL side-loading of a signed binary"]
+
+    def test_technique_mention_is_own_facet(self):
+        facets = split_facets("Persistence through scheduled tasks on hosts; T1053.005.")
+
+        assert facets == ["Persistence through scheduled tasks on hosts", "T1053.005"]
+
+    def test_max_facets(self):
+        description = " ".join(f"Behaviour number {i} observed on the network." for i in range(10))
+
+        assert len(split_facets(description, max_facets=3)) == 3
+
+    def test_duplicates_removed(self):
+        facets = split_facets("Beacons to C2 over HTTPS port 443. Beacons to C2 over HTTPS port 443.")
+
+        assert facets == ["Beacons to C2 over HTTPS port 443"]
+
+class TestFacetQueries:
+    def test_single_behaviour_is_one_query(self):
+        description = "Spear phishing emails with macro-enabled documents"
+
+        assert facet_queries(description) == [description]
+
+    def test_full_description_comes_first(self):
+        queries = facet_queries(DESCRIPTION)
+
+        assert queries[0] == DESCRIPTION
+        assert len(queries) == 4
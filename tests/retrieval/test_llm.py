@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+import pytest
+from apt.retrieval.llm import LLMClientManager, get_llm_manager, ollama_kwargs
+
+class TestOllamaKwargs:
+    def test_sets_keep_alive_and_pool_limits(self):
+        kwargs = ollama_kwargs(keep_alive="1h", max_connections=4)
+
+        assert kwargs["keep_alive"] == "1h"
+        assert kwargs["client_kwargs"]["limits"].max_keepalive_connections == 4
+
+class TestLLMClientManager:
+    @pytest.fixture
+    def mock_ollama(self, mocker):
+        return mocker.patch("apt.retrieval.llm.OllamaLLM", side_effect=lambda **kwargs: MagicMock(**kwargs))
+
+    def test_get_reuses_client(self, mock_ollama):
+        manager = LLMClientManager()
+
+        assert manager.get("gemma3n:e4b") is manager.get("gemma3n:e4b")
+        assert mock_ollama.call_count == 1
+
+    def test_get_separates_models(self, mock_ollama):
+        manager = LLMClientManager()
+
+        assert manager.get("gemma3n:e4b") is not manager.get("llama3.2")
+
+    def test_get_passes_keep_alive(self, mock_ollama):
+        LLMClientManager(keep_alive="2h").get("gemma3n:e4b")
+
+        assert mock_ollama.call_args.kwargs["keep_alive"] == "2h"
+
+    def test_warm_up_sends_prefix(self, mock_ollama):
+        manager = LLMClientManager(keep_alive="2h")
+
+        manager.warm_up("gemma3n:e4b", prefix="Static instructions")
+
+        generate = manager.get("gemma3n:e4b")._client.generate
+        generate.assert_called_once()
+        assert generate.call_args.kwargs["prompt"] == "Static instructions"
+        assert generate.call_args.kwargs["keep_alive"] == "2h"
+
+    def test_warm_up_failure_is_not_fatal(self, mock_ollama):
+        manager = LLMClientManager()
+        manager.get("gemma3n:e4b")._client.generate.side_effect = ConnectionError("refused")
+
+        manager.warm_up("gemma3n:e4b")
+
+    def test_warm_up_in_background(self, mock_ollama):
+        manager = LLMClientManager()
+
+        thread = manager.warm_up("gemma3n:e4b", background=True)
+        thread.join(timeout=5)
+
+        manager.get("gemma3n:e4b")._client.generate.assert_called_once()
+
+    def test_default_manager_is_shared(self):
+        assert get_llm_manager() is get_llm_manager()
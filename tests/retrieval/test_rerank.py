@@ -0,0 +1,68 @@
+import pytest
+from langchain_core.documents import Document
+from apt.retrieval.rerank import CrossEncoderReranker
+
+class KeywordModel:
+    def __init__(self, keyword):
+        self.keyword = keyword
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(list(pairs))
+        return [float(text.count(self.keyword)) for _, text in pairs]
+
+@pytest.fixture
+def docs():
+    return [
+        Document(page_content="Lazarus banking malware", metadata={"chunk_id": "a:0"}),
+        Document(page_content="APT28 spearphishing and APT28 loaders", metadata={"chunk_id": "b:0"}),
+        Document(page_content="APT28 infrastructure", metadata={"chunk_id": "c:0"}),
+    ]
+
+class TestCrossEncoderReranker:
+    def test_rerank_orders_by_score(self, docs):
+        reranker = CrossEncoderReranker(model=KeywordModel("APT28"))
+
+        reranked = reranker.rerank("APT28?", docs, top_n=2)
+
+        assert [doc.metadata["chunk_id"] for doc in reranked] == ["b:0", "c:0"]
+        assert reranked[0].metadata["rerank_score"] == 2.0
+
+    def test_rerank_scores_in_one_batch(self, docs):
+        model = KeywordModel("APT28")
+        reranker = CrossEncoderReranker(model=model)
+
+        reranker.rerank("APT28?", docs)
+
+        assert len(model.calls) == 1
+        assert len(model.calls[0]) == 3
+
+    def test_scores_cached_per_query_and_chunk(self, docs):
+        model = KeywordModel("APT28")
+        reranker = CrossEncoderReranker(model=model)
+
+        reranker.rerank("APT28?", docs[:2])
+        reranker.rerank("APT28?", docs)
+
+        assert len(model.calls[1]) == 1
+        assert reranker.cache_info()["hits"] == 2
+
+    def test_cache_bounded(self, docs):
+        reranker = CrossEncoderReranker(model=KeywordModel("APT28"), cache_size=2)
+
+        reranker.rerank("APT28?", docs)
+
+        assert reranker.cache_info()["size"] == 2
+
+    def test_does_not_mutate_input(self, docs):
+        reranker = CrossEncoderReranker(model=KeywordModel("APT28"))
+
+        reranker.rerank("APT28?", docs)
+
+        assert "rerank_score" not in docs[1].metadata
+
+    def test_empty_candidates(self):
+        model = KeywordModel("APT28")
+
+        assert CrossEncoderReranker(model=model).rerank("APT28?", []) == []
+        assert model.calls == []
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from apt.retrieval.chain import RAGChain
+from apt.retrieval.scheduler import BATCH, INTERACTIVE, LLMScheduler, QueueTimeoutError
+
+class TestLLMScheduler:
+    def test_limits_concurrency(self):
+        scheduler = LLMScheduler(max_concurrency=2)
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            async with scheduler.aslot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.02)
+                running -= 1
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+
+        assert peak == 2
+        assert scheduler.active == 0
+        assert scheduler.stats()[INTERACTIVE]["admitted"] == 6
+
+    def test_interactive_jumps_batch_queue(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        order = []
+
+        async def call(name, priority, delay=0.0):
+            await asyncio.sleep(delay)
+            async with scheduler.aslot(priority):
+                order.append(name)
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(
+                call("batch-0", BATCH),
+                call("batch-1", BATCH, 0.005),
+                call("batch-2", BATCH, 0.005),
+                call("interactive", INTERACTIVE, 0.01),
+            )
+
+        asyncio.run(run())
+
+        assert order == ["batch-0", "interactive", "batch-1", "batch-2"]
+
+    def test_sync_and_async_callers_share_slots(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with scheduler.slot(BATCH):
+                acquired.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait(5)
+
+        async def run():
+            waiting = asyncio.ensure_future(scheduler.aacquire(INTERACTIVE))
+            await asyncio.sleep(0.02)
+            assert not waiting.done()
+            assert scheduler.stats()[INTERACTIVE]["queued"] == 1
+
+            release.set()
+            await asyncio.wait_for(waiting, timeout=5)
+            scheduler.release()
+
+        asyncio.run(run())
+        thread.join()
+
+        assert scheduler.active == 0
+
+    def test_sheds_after_deadline(self):
+        scheduler = LLMScheduler(max_concurrency=1, deadlines={INTERACTIVE: 0.02})
+        scheduler.acquire(BATCH)
+
+        with pytest.raises(QueueTimeoutError):
+            scheduler.acquire(INTERACTIVE)
+
+        scheduler.release()
+        stats = scheduler.stats()
+        assert stats["active"] == 0
+        assert stats["queued"] == 0
+        assert stats[INTERACTIVE]["shed"] == 1
+
+    def test_async_sheds_after_deadline(self):
+        scheduler = LLMScheduler(max_concurrency=1, deadlines={BATCH: 0.02})
+
+        async def run():
+            async with scheduler.aslot(INTERACTIVE):
+                with pytest.raises(QueueTimeoutError):
+                    await scheduler.aacquire(BATCH)
+
+        asyncio.run(run())
+
+        assert scheduler.active == 0
+        assert scheduler.stats()[BATCH]["shed"] == 1
+
+    def test_sheds_on_admission_when_estimate_exceeds_deadline(self):
+        scheduler = LLMScheduler(max_concurrency=1, deadlines={INTERACTIVE: 1.0})
+        scheduler.acquire()
+        scheduler.release(service_s=5.0)
+        scheduler.acquire()
+
+        start = time.perf_counter()
+        with pytest.raises(QueueTimeoutError, match="too deep"):
+            scheduler.acquire()
+
+        assert time.perf_counter() - start < 0.5
+        scheduler.release()
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+
+        async def run():
+            await scheduler.aacquire()
+            waiting = asyncio.ensure_future(scheduler.aacquire())
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            scheduler.release()
+
+        asyncio.run(run())
+
+        assert scheduler.active == 0
+        assert scheduler.stats()["queued"] == 0
+
+    def test_unknown_priority_raises_error(self):
+        with pytest.raises(ValueError, match="Unknown priority"):
+            LLMScheduler().acquire("urgent")
+
+    def test_invalid_concurrency_raises_error(self):
+        with pytest.raises(ValueError, match="positive"):
+            LLMScheduler(max_concurrency=0)
+
+class TestRAGChainScheduling:
+    def test_llm_calls_go_through_scheduler(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        retriever = RunnableLambda(lambda query: [Document(page_content="APT28", metadata={"filename": "a.pdf"})])
+
+        async def agenerate(prompt):
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        chain = RAGChain(retriever, llm=RunnableLambda(lambda prompt: "answer", afunc=agenerate), scheduler=scheduler)
+
+        async def run():
+            return await asyncio.gather(
+                chain.aquery("Batch question", priority=BATCH),
+                chain.aquery("Interactive question"),
+            )
+
+        results = asyncio.run(run())
+        chain.query("Sync question")
+
+        stats = scheduler.stats()
+        assert stats[BATCH]["admitted"] == 1
+        assert stats[INTERACTIVE]["admitted"] == 2
+        assert results[1]["timings"]["queue_ms"] > 0
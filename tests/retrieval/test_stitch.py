@@ -0,0 +1,102 @@
+from langchain_core.documents import Document
+from apt.ingest.chunker import DocumentChunker
+from apt.retrieval.stitch import expand_to_parents, stitch_adjacent_chunks, text_overlap
+from apt.store.parents import build_parent_store
+
+def make_report(num_sentences=300):
+    text = " ".join(f"Sentence {i} describes APT28 activity in detail." for i in range(num_sentences))
+    doc = Document(page_content=text, metadata={"source": "/data/apt28.pdf", "filename": "apt28.pdf"})
+    return text, DocumentChunker(chunk_size=500, chunk_overlap=100).chunk_documents([doc])
+
+class TestTextOverlap:
+    def test_finds_longest_suffix_prefix(self):
+        assert text_overlap("abc def ghi", "def ghi jkl") == 7
+
+    def test_no_overlap(self):
+        assert text_overlap("abc", "xyz") == 0
+
+class TestStitchAdjacentChunks:
+    def test_merges_overlapping_chunks(self):
+        text, chunks = make_report()
+
+        stitched = stitch_adjacent_chunks([chunks[3], chunks[4], chunks[5]])
+
+        assert len(stitched) == 1
+        passage = stitched[0]
+        start = passage.metadata["start_index"]
+        assert passage.page_content == text[start:start + len(passage.page_content)]
+        assert passage.metadata["merged_chunk_ids"] == [c.metadata["chunk_id"] for c in chunks[3:6]]
+        assert len(passage.page_content) < sum(len(c.page_content) for c in chunks[3:6])
+
+    def test_keeps_non_adjacent_chunks_separate(self):
+        _, chunks = make_report()
+
+        stitched = stitch_adjacent_chunks([chunks[1], chunks[7]])
+
+        assert len(stitched) == 2
+        assert "merged_chunk_ids" not in stitched[0].metadata
+
+    def test_passage_takes_best_rank(self):
+        _, chunks = make_report()
+        other = Document(page_content="Lazarus content", metadata={"filename": "lazarus.pdf"})
+
+        stitched = stitch_adjacent_chunks([other, chunks[5], chunks[4]])
+
+        assert stitched[0] is other
+        assert stitched[1].metadata["merged_chunk_ids"] == [chunks[4].metadata["chunk_id"], chunks[5].metadata["chunk_id"]]
+
+    def test_falls_back_to_text_overlap_without_offsets(self):
+        _, chunks = make_report()
+        for chunk in chunks:
+            chunk.metadata.pop("start_index")
+
+        stitched = stitch_adjacent_chunks([chunks[2], chunks[3]])
+
+        assert len(stitched) == 1
+        assert stitched[0].page_content.startswith(chunks[2].page_content)
+        assert stitched[0].page_content.endswith(chunks[3].page_content)
+
+    def test_different_pages_not_merged(self):
+        left = Document(page_content="abc def", metadata={"source": "r.pdf", "page": 1, "start_index": 0})
+        right = Document(page_content="def ghi", metadata={"source": "r.pdf", "page": 2, "start_index": 4})
+
+        assert len(stitch_adjacent_chunks([left, right])) == 2
+
+    def test_keeps_best_score(self):
+        _, chunks = make_report()
+        chunks[3].metadata["rrf_score"] = 0.02
+        chunks[4].metadata["rrf_score"] = 0.05
+
+        stitched = stitch_adjacent_chunks([chunks[3], chunks[4]])
+
+        assert stitched[0].metadata["rrf_score"] == 0.05
+
+class TestExpandToParents:
+    def test_children_collapse_into_ranked_parents(self, tmp_path):
+        text = " ".join(f"Sentence {i} describes APT28 activity in detail." for i in range(200))
+        doc = Document(page_content=text, metadata={"source": "/data/apt28.pdf", "filename": "apt28.pdf"})
+        children, parents = DocumentChunker(
+            chunk_size=200, chunk_overlap=0, parent_chunk_size=1000
+        ).chunk_with_parents([doc])
+        store = build_parent_store(parents, tmp_path / "parents.sqlite")
+
+        last = children[-1]
+        first, second = [c for c in children if c.metadata["parent_id"] == parents[0].metadata["parent_id"]][:2]
+        first.metadata["similarity"] = 0.4
+        second.metadata["similarity"] = 0.9
+
+        expanded = expand_to_parents([last, first, second], store)
+
+        assert [d.id for d in expanded] == [last.metadata["parent_id"], parents[0].metadata["parent_id"]]
+        assert expanded[1].page_content == parents[0].page_content
+        assert expanded[1].metadata["child_chunk_ids"] == [first.metadata["chunk_id"], second.metadata["chunk_id"]]
+        assert expanded[1].metadata["similarity"] == 0.9
+
+    def test_chunks_without_parent_pass_through(self, tmp_path):
+        store = build_parent_store([], tmp_path / "parents.sqlite")
+        docs = [
+            Document(page_content="no parent", metadata={"chunk_id": "a:0"}),
+            Document(page_content="missing parent", metadata={"chunk_id": "a:1", "parent_id": "a:p9"}),
+        ]
+
+        assert expand_to_parents(docs, store) == docs
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.runnables import RunnableLambda
+from langchain_core.vectorstores import InMemoryVectorStore
+from apt.retrieval.chain import RAGChain
+from apt.retrieval.scheduler import BATCH, LLMScheduler
+from apt.service import EmbeddingBatcher, QueryService, create_app
+
+DOCS = [
+    Document(page_content="APT28 used spear phishing", metadata={"filename": "a.pdf", "year": 2023, "chunk_id": "a:0"}),
+    Document(page_content="APT29 used cloud services", metadata={"filename": "b.pdf", "year": 2024, "chunk_id": "b:0"}),
+]
+
+class FakeChromaManager:
+    def __init__(self):
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.searches = []
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        self.searches.append({"k": k, "filter": filter})
+        return DOCS[:k]
+
+@pytest.fixture
+def service():
+    chroma_manager = FakeChromaManager()
+    vectorstore = InMemoryVectorStore.from_documents(DOCS, chroma_manager.embeddings)
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+    rag_chain = RAGChain(retriever, llm=RunnableLambda(lambda prompt: "answer"), scheduler=LLMScheduler())
+
+    return QueryService(
+        chroma_manager,
+        rag_chain,
+        llm=RunnableLambda(lambda prompt: "attribution"),
+        batcher=EmbeddingBatcher(chroma_manager.embeddings, window_ms=1),
+    )
+
+def call(service, requests):
+    async def run():
+        async with TestClient(TestServer(create_app(service))) as client:
+            responses = []
+            for method, path, body in requests:
+                response = await client.request(method, path, json=body)
+                responses.append((response.status, await response.json()))
+            return responses
+
+    return asyncio.run(run())
+
+class TestQueryService:
+    def test_health(self, service):
+        [(status, body)] = call(service, [("GET", "/health", None)])
+
+        assert status == 200
+        assert body == {"status": "ok"}
+
+    def test_query(self, service):
+        [(status, body)] = call(service, [("POST", "/query", {"question": "Who is APT28?"})])
+
+        assert status == 200
+        assert body["answer"] == "answer"
+        assert sorted(source["filename"] for source in body["sources"]) == ["a.pdf", "b.pdf"]
+        assert body["cached"] is False
+
+    def test_missing_question_returns_400(self, service):
+        [(status, body)] = call(service, [("POST", "/query", {})])
+
+        assert status == 400
+        assert "question" in body["error"]
+
+    def test_filter_route_requires_filter(self, service):
+        [(status, body)] = call(service, [("POST", "/query/filter", {"question": "Who is APT28?"})])
+
+        assert status == 400
+        assert "filter" in body["error"]
+
+    def test_unknown_priority_returns_400(self, service):
+        [(status, body)] = call(service, [("POST", "/query", {"question": "Who is APT28?", "priority": "urgent"})])
+
+        assert status == 400
+        assert "priority" in body["error"]
+
+    def test_shed_request_returns_503(self, service):
+        service.rag_chain.scheduler = LLMScheduler(max_concurrency=1, deadlines={BATCH: 0.01})
+        service.rag_chain.scheduler.acquire()
+
+        [(status, body)] = call(service, [("POST", "/query", {"question": "Who is APT28?", "priority": "batch"})])
+
+        assert status == 503
+        assert "batch" in body["error"]
+
+    def test_search_skips_llm(self, service):
+        [(status, body)] = call(service, [("POST", "/search", {"query": "spear phishing", "k": 1, "filter": {"year": 2023}})])
+
+        assert status == 200
+        assert body["results"][0]["content"] == "APT28 used spear phishing"
+        assert service.chroma_manager.searches == [{"k": 1, "filter": {"year": 2023}}]
+
+    def test_attribute(self, service):
+        [(status, body)] = call(service, [("POST", "/attribute", {"description": "Spear phishing with macros"})])
+
+        assert status == 200
+        assert body["attribution"] == "attribution"
+        assert body["usage"]["prompt_tokens"] > 0
+        assert body["queue_ms"] >= 0 and body["llm_ms"] >= 0
+
+    def test_metrics_report_latency_and_batches(self, service):
+        responses = call(service, [
+            ("POST", "/query", {"question": "Who is APT28?"}),
+            ("POST", "/query", {}),
+            ("GET", "/metrics", None),
+        ])
+
+        status, metrics = responses[-1]
+        assert status == 200
+        assert metrics["latency"]["POST /query"]["count"] == 2
+        assert metrics["latency"]["POST /query"]["errors"] == 1
+        assert metrics["embedding_batches"]["texts"] == 1
+        assert metrics["llm_queue"]["interactive"]["admitted"] >= 1
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from apt.service.batcher import EmbeddingBatcher
+from apt.service.metrics import LatencyTracker
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    batch_sizes: list = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        return super().embed_documents(texts)
+
+class FailingEmbedding(DeterministicFakeEmbedding):
+    def embed_documents(self, texts):
+        raise RuntimeError("model unavailable")
+
+class TestEmbeddingBatcher:
+    def test_concurrent_requests_share_a_batch(self):
+        embeddings = CountingEmbedding(size=8, batch_sizes=[])
+        batcher = EmbeddingBatcher(embeddings, window_ms=20, max_batch_size=32)
+
+        async def run():
+            return await asyncio.gather(*(batcher.embed(f"question {i}") for i in range(5)))
+
+        vectors = asyncio.run(run())
+
+        assert embeddings.batch_sizes == [5]
+        assert vectors == embeddings.embed_documents([f"question {i}" for i in range(5)])
+        assert batcher.stats()["mean_batch_size"] == 5
+
+    def test_full_batch_flushes_early(self):
+        embeddings = CountingEmbedding(size=8, batch_sizes=[])
+        batcher = EmbeddingBatcher(embeddings, window_ms=10_000, max_batch_size=2)
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.embed(f"question {i}") for i in range(4))),
+                timeout=5,
+            )
+
+        vectors = asyncio.run(run())
+
+        assert len(vectors) == 4
+        assert embeddings.batch_sizes == [2, 2]
+
+    def test_errors_reach_every_caller(self):
+        batcher = EmbeddingBatcher(FailingEmbedding(size=8), window_ms=1)
+
+        async def run():
+            return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_in_flight_batches_are_referenced_until_done(self):
+        batcher = EmbeddingBatcher(CountingEmbedding(size=8, batch_sizes=[]), window_ms=1000)
+
+        async def run():
+            request = asyncio.ensure_future(batcher.embed("question"))
+            await asyncio.sleep(0)
+            batcher._flush()
+            in_flight = len(batcher._tasks)
+            await batcher.close()
+            return in_flight, request.done(), len(batcher._tasks)
+
+        in_flight, done, remaining = asyncio.run(run())
+
+        assert in_flight == 1
+        assert done
+        assert remaining == 0
+
+    def test_invalid_batch_size_raises_error(self):
+        with pytest.raises(ValueError, match="positive"):
+            EmbeddingBatcher(DeterministicFakeEmbedding(size=8), max_batch_size=0)
+
+class TestLatencyTracker:
+    def test_percentiles_per_route(self):
+        tracker = LatencyTracker()
+        for latency in range(1, 101):
+            tracker.record("POST /query", float(latency))
+        tracker.record("GET /health", 1.0, error=True)
+
+        snapshot = tracker.snapshot()
+
+        assert snapshot["POST /query"]["count"] == 100
+        assert snapshot["POST /query"]["p50_ms"] == pytest.approx(50.5)
+        assert snapshot["POST /query"]["max_ms"] == 100
+        assert snapshot["GET /health"]["errors"] == 1
+
+    def test_window_keeps_recent_samples(self):
+        tracker = LatencyTracker(window=10)
+        for latency in range(100):
+            tracker.record("POST /query", float(latency))
+
+        snapshot = tracker.snapshot()["POST /query"]
+
+        assert snapshot["count"] == 100
+        assert snapshot["p50_ms"] >= 90
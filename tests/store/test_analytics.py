@@ -0,0 +1,75 @@
+import pytest
+from langchain_core.documents import Document
+from apt.store.analytics import AnalyticsStore, build_analytics_store
+
+def chunk(chunk_id, filename, year, **metadata):
+    return Document(page_content="x" * 100, metadata={"chunk_id": chunk_id, "filename": filename, "year": year, **metadata})
+
+@pytest.fixture
+def store(tmp_path):
+    chunks = [
+        chunk("a:0", "a.pdf", 2019, apt_groups_mentioned="LAZARUS", techniques_mentioned="T1059.001, T1566"),
+        chunk("a:1", "a.pdf", 2019, techniques_mentioned="T1105", iocs="bad.com"),
+        chunk("b:0", "b.pdf", 2019, apt_groups_mentioned="APT28", techniques_mentioned="T1566.001"),
+        chunk("c:0", "c.pdf", 2021, apt_groups_mentioned="Lazarus", techniques_mentioned="T1059", duplicate_sources="d.pdf"),
+    ]
+    pages = [
+        Document(page_content="", metadata={"filename": "a.pdf", "year": 2019, "page": 0, "total_pages": 12}),
+        Document(page_content="", metadata={"filename": "d.pdf", "year": 2022, "page": 3}),
+    ]
+    return build_analytics_store(chunks, tmp_path / "analytics.sqlite", pages=pages)
+
+class TestAnalyticsStore:
+    def test_report_count(self, store):
+        assert store.report_count() == 4
+        assert store.report_count(year=2019, technique="T1059") == 1
+        assert store.report_count(technique="t1566") == 2
+        assert store.report_count(group="lazarus") == 3
+        assert store.report_count(group="Lazarus", year=2022) == 1
+        assert store.report_count(ioc="BAD.com") == 1
+        assert store.report_count(ioc="bad[.]com") == 1
+
+    def test_reports(self, store):
+        reports = store.reports(group="LAZARUS")
+
+        assert [r["filename"] for r in reports] == ["a.pdf", "c.pdf", "d.pdf"]
+        assert reports[0]["page_count"] == 12 and reports[0]["chunk_count"] == 2
+        assert reports[2]["page_count"] == 4 and reports[2]["chunk_count"] == 0
+
+    def test_co_occurring_by_report(self, store):
+        rows = store.co_occurring("group", "Lazarus", "technique")
+
+        assert rows[0] == ("T1059", 3)
+        assert ("T1105", 1) in rows
+        assert ("T1566.001", 1) not in rows
+
+    def test_co_occurring_by_chunk(self, store):
+        rows = dict(store.co_occurring("group", "Lazarus", "technique", level="chunk"))
+
+        assert rows["T1059"] == 2
+        assert "T1105" not in rows
+
+    def test_top_values(self, store):
+        assert store.top_values("group", limit=1) == [("LAZARUS", 3)]
+        assert store.top_values("technique", year=2019, limit=2) == [("T1566", 2), ("T1059", 1)]
+
+    def test_trend(self, store):
+        assert store.trend("group", "LAZARUS") == [(2019, 1), (2021, 1), (2022, 1)]
+
+    def test_summary(self, store):
+        summary = store.summary()
+
+        assert summary["reports"] == 4
+        assert summary["chunks"] == 4
+        assert summary["iocs"] == 1
+
+    def test_unknown_field(self, store):
+        with pytest.raises(ValueError):
+            store.top_values("actor")
+        with pytest.raises(ValueError):
+            store.co_occurring("group", "APT28", "technique", level="page")
+
+    def test_reopen(self, store, tmp_path):
+        store.close()
+
+        assert AnalyticsStore(tmp_path / "analytics.sqlite").report_count(group="APT28") == 1
@@ -0,0 +1,78 @@
+import pytest
+from langchain_core.documents import Document
+from apt.store.bm25 import BM25Index, build_bm25_index, tokenize
+
+class TestTokenize:
+    def test_keeps_technique_ids(self):
+        tokens = tokenize("Observed T1566.001 spearphishing")
+        assert "t1566.001" in tokens
+        assert "t1566" in tokens
+
+    def test_keeps_domains_and_hashes(self):
+        tokens = tokenize("C2 at evil-domain.com, sample d41d8cd98f00b204e9800998ecf8427e")
+        assert "evil-domain.com" in tokens
+        assert "d41d8cd98f00b204e9800998ecf8427e" in tokens
+
+    def test_drops_stopwords(self):
+        tokens = tokenize("the group and the malware")
+        assert "the" not in tokens
+        assert "and" not in tokens
+
+class TestBM25Index:
+    @pytest.fixture
+    def documents(self):
+        return [
+            Document(page_content="APT28 used T1566.001 spearphishing attachments", metadata={"chunk_id": "a:0"}),
+            Document(page_content="Lazarus deployed a custom backdoor", metadata={"chunk_id": "b:0"}),
+            Document(page_content="Backdoor beacons to evil-domain.com over HTTPS", metadata={"chunk_id": "c:0"}),
+        ]
+
+    def test_search_exact_token(self, documents):
+        index = build_bm25_index(documents)
+
+        results = index.search("T1566.001", k=3)
+
+        assert results[0][0] == "a:0"
+
+    def test_search_ranks_by_score(self, documents):
+        index = build_bm25_index(documents)
+
+        results = index.search("backdoor evil-domain.com", k=3)
+
+        assert [doc_id for doc_id, _ in results][:2] == ["c:0", "b:0"]
+        assert results[0][1] >= results[1][1]
+
+    def test_search_no_match(self, documents):
+        index = build_bm25_index(documents)
+        assert index.search("kimsuky", k=3) == []
+
+    def test_search_empty_index(self):
+        assert BM25Index().search("anything") == []
+
+    def test_readding_document_replaces_it(self, documents):
+        index = build_bm25_index(documents)
+
+        index.add_documents([Document(page_content="Kimsuky phishing lures", metadata={"chunk_id": "a:0"})])
+
+        assert len(index) == 3
+        assert index.search("T1566.001", k=3) == []
+        assert index.search("kimsuky", k=1)[0][0] == "a:0"
+        assert index.average_length == pytest.approx(sum(index.doc_lengths) / 3)
+
+    def test_save_and_load(self, documents, tmp_path):
+        path = tmp_path / "bm25.pkl"
+        index = build_bm25_index(documents, path=path)
+
+        loaded = BM25Index.load(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.search("lazarus", k=1) == index.search("lazarus", k=1)
+
+    def test_add_after_load(self, documents, tmp_path):
+        path = tmp_path / "bm25.pkl"
+        build_bm25_index(documents[:2], path=path)
+
+        loaded = BM25Index.load(path)
+        loaded.add_documents(documents[2:])
+
+        assert loaded.search("evil-domain.com", k=1)[0][0] == "c:0"
@@ -1,7 +1,7 @@
 import pytest
 from pathlib import Path
 from langchain_core.documents import Document
-from apt.store.chroma import ChromaManager
+from apt.store.chroma import ChromaManager, select_year_shards
 
 class TestChromaManager:
     def test_init(self, tmp_data_dir):
@@ -78,6 +78,86 @@ class TestChromaManager:
 
         assert isinstance(results, list)
 
+    def test_scored_similarity_search(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        results = manager.scored_similarity_search(manager.embeddings.embed_query("APT28"), k=2)
+
+        similarities = [doc.metadata["similarity"] for doc in results]
+        assert len(results) == 2
+        assert similarities == sorted(similarities, reverse=True)
+
+    def test_two_stage_search(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_documents)
+        manager.build_report_index()
+
+        results, stats = manager.two_stage_search_with_stats("APT28", k=3, reports=2, max_per_report=1)
+
+        assert len(stats["reports"]) == 2
+        assert {doc.metadata["filename"] for doc in results} <= set(stats["reports"])
+        assert len({doc.metadata["filename"] for doc in results}) == len(results)
+
+    def test_two_stage_search_with_year_bounds(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_documents)
+        manager.build_report_index()
+
+        year_range = {"$and": [{"year": {"$gte": 2024}}, {"year": {"$lte": 2024}}]}
+        _, stats = manager.two_stage_search_with_stats("APT28", k=3, reports=3, filter=year_range)
+
+        assert stats["reports"] == ["lazarus_report.pdf"]
+
+    def test_lookup_iocs(self, tmp_data_dir, sample_documents):
+        from apt.store.ioc_index import build_ioc_index
+
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        sample_documents[0].metadata["iocs"] = "bad.com"
+        manager.create_vectorstore(sample_documents)
+        build_ioc_index(sample_documents, path=tmp_data_dir / "ioc_index.json")
+        manager.load_ioc_index(tmp_data_dir / "ioc_index.json")
+
+        [result] = manager.lookup_iocs("beacon to bad[.]com", with_documents=True)
+
+        [report] = result["reports"]
+        assert report["filename"] == sample_documents[0].metadata["filename"]
+        assert report["documents"][0].metadata["iocs"] == "bad.com"
+
+    def test_similarity_search_batch(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        results = manager.similarity_search_batch(["APT28", "spearphishing"], k=1)
+
+        assert len(results) == 2
+        assert results[0][0].id == manager.similarity_search("APT28", k=1)[0].id
+
+    def test_similarity_search_batch_per_query_filters(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_documents)
+
+        results = manager.similarity_search_batch(
+            ["APT", "APT"], k=5, filters=[{"year": 2024}, None]
+        )
+
+        assert [doc.metadata["year"] for doc in results[0]] == [2024]
+        assert len(results[1]) == 3
+
+    def test_similarity_search_batch_filter_count_mismatch_raises_error(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        with pytest.raises(ValueError, match="Number of filters"):
+            manager.similarity_search_batch(["a", "b"], filters=[None])
+
     def test_similarity_search_without_init_raises_error(self, tmp_data_dir):
         persist_dir = tmp_data_dir / "test_chroma"
         manager = ChromaManager(persist_directory=persist_dir)
@@ -110,6 +190,173 @@ class TestChromaManager:
         with pytest.raises(ValueError, match="Vectorstore not initialized"):
             manager.get_retriever()
 
+    def test_create_vectorstore_uses_chunk_ids(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        ids = [doc.metadata["chunk_id"] for doc in sample_chunks]
+        docs = manager.get_documents_by_ids(ids)
+
+        assert [doc.id for doc in docs] == ids
+
+    def test_hybrid_search(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.build_bm25_index(sample_chunks)
+
+        results, stats = manager.hybrid_search_with_stats("spearphishing", k=2)
+
+        assert len(results) <= 2
+        assert all("rrf_score" in doc.metadata for doc in results)
+        assert stats["bm25"]["results"] >= 1
+        assert "latency_ms" in stats["dense"]
+
+    def test_readding_chunks_updates_bm25(self, tmp_data_dir, sample_chunks):
+        from apt.store.bm25 import BM25Index
+
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.build_bm25_index(sample_chunks)
+
+        sample_chunks[1].page_content = "The group relies on watering hole attacks."
+        manager.add_documents(sample_chunks)
+
+        saved = BM25Index.load(manager.bm25_path)
+        assert len(saved) == len(sample_chunks)
+        assert saved.search("watering", k=1)[0][0] == "apt28:1"
+        assert saved.search("spearphishing", k=1) == []
+
+    def test_multi_query_search(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        queries = ["APT28 spearphishing", "T1566.001", "APT28 spearphishing"]
+        results, stats = manager.multi_query_search_with_stats(queries, k=2)
+
+        assert len(results) <= 2
+        assert len({doc.metadata["chunk_id"] for doc in results}) == len(results)
+        assert all("rrf_score" in doc.metadata for doc in results)
+        assert [facet["query"] for facet in stats["queries"]] == queries
+        assert all(facet["latency_ms"] >= 0 for facet in stats["queries"])
+
+    def test_build_and_rank_actor_profiles(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+
+        profiles = manager.build_actor_profiles(min_chunks=1)
+        ranking = ChromaManager(persist_directory=persist_dir).rank_actors("APT28 spearphishing", top_n=1)
+
+        assert manager.profiles_path.exists()
+        assert "APT28" in profiles.actors
+        assert len(ranking) == 1
+
+    def test_load_bm25_index(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.build_bm25_index(sample_chunks)
+
+        new_manager = ChromaManager(persist_directory=persist_dir)
+        index = new_manager.load_bm25_index()
+
+        assert len(index) == len(sample_chunks)
+
+    def test_load_bm25_index_missing_raises_error(self, tmp_data_dir):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+
+        with pytest.raises(ValueError, match="BM25 index not found"):
+            manager.load_bm25_index()
+
+    def test_get_hybrid_retriever(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.build_bm25_index(sample_chunks)
+
+        retriever = manager.get_retriever(hybrid=True)
+        docs = retriever.invoke("APT28")
+
+        assert retriever.vectorstore is manager.vectorstore
+        assert all(isinstance(doc, Document) for doc in docs)
+
+    def test_similarity_search_with_metadata_index(self, tmp_data_dir, sample_chunks):
+        from apt.store.metadata_index import build_metadata_index
+
+        persist_dir = tmp_data_dir / "test_chroma"
+        index_path = tmp_data_dir / "metadata_index.json"
+        build_metadata_index(sample_chunks, path=index_path)
+
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.load_metadata_index(index_path)
+
+        results = manager.similarity_search("threat group", k=5, filter={"apt_groups_mentioned": "APT28"})
+
+        assert [doc.metadata["chunk_id"] for doc in results] == ["apt28:0"]
+
+    def test_similarity_search_metadata_index_no_match(self, tmp_data_dir, sample_chunks):
+        from apt.store.metadata_index import build_metadata_index
+
+        persist_dir = tmp_data_dir / "test_chroma"
+        index_path = tmp_data_dir / "metadata_index.json"
+        build_metadata_index(sample_chunks, path=index_path)
+
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks)
+        manager.load_metadata_index(index_path)
+
+        assert manager.similarity_search("x", filter={"apt_groups_mentioned": "KIMSUKY"}) == []
+
+    def test_create_sharded_vectorstore(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_sharded_vectorstore(sample_documents)
+
+        new_manager = ChromaManager(persist_directory=persist_dir)
+        new_manager.load_shards()
+
+        assert new_manager.get_shard_stats() == {"2023": 2, "2024": 1}
+
+    def test_sharded_similarity_search_scoped_to_year(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_sharded_vectorstore(sample_documents)
+
+        results = manager.sharded_similarity_search("malware", k=5, filter={"year": 2024})
+
+        assert [doc.metadata["year"] for doc in results] == [2024]
+
+    def test_sharded_similarity_search_merges_top_k(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_sharded_vectorstore(sample_documents)
+
+        results = manager.sharded_similarity_search("APT", k=2)
+
+        assert len(results) == 2
+
+    def test_rebuild_shard(self, tmp_data_dir, sample_documents):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_sharded_vectorstore(sample_documents)
+
+        manager.rebuild_shard(2023, sample_documents[:1])
+
+        assert manager.get_shard_stats() == {"2023": 1, "2024": 1}
+
+    def test_load_shards_missing_raises_error(self, tmp_data_dir):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+
+        with pytest.raises(ValueError, match="No shards found"):
+            manager.load_shards()
+
     def test_get_collection_stats(self, tmp_data_dir, sample_chunks):
         persist_dir = tmp_data_dir / "test_chroma"
         manager = ChromaManager(persist_directory=persist_dir)
@@ -122,9 +369,62 @@ class TestChromaManager:
         assert "persist_directory" in stats
         assert stats["document_count"] > 0
 
+    def test_hnsw_settings_persisted(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        hnsw = {"space": "cosine", "M": 32, "construction_ef": 200, "search_ef": 64}
+        manager = ChromaManager(persist_directory=persist_dir, hnsw=hnsw)
+        manager.create_vectorstore(sample_chunks)
+
+        new_manager = ChromaManager(persist_directory=persist_dir)
+        new_manager.load_vectorstore()
+
+        assert new_manager.get_collection_stats()["hnsw"] == hnsw
+
+    def test_invalid_hnsw_space_raises_error(self, tmp_data_dir):
+        with pytest.raises(ValueError, match="Unsupported HNSW space"):
+            ChromaManager(persist_directory=tmp_data_dir / "test_chroma", hnsw={"space": "dot"})
+
+    def test_collection_version_changes_on_add(self, tmp_data_dir, sample_chunks):
+        persist_dir = tmp_data_dir / "test_chroma"
+        manager = ChromaManager(persist_directory=persist_dir)
+        manager.create_vectorstore(sample_chunks[:1])
+
+        before = manager.get_collection_version()
+        manager.add_documents(sample_chunks[1:])
+
+        assert manager.get_collection_version() != before
+
     def test_get_collection_stats_without_init_raises_error(self, tmp_data_dir):
         persist_dir = tmp_data_dir / "test_chroma"
         manager = ChromaManager(persist_directory=persist_dir)
 
         with pytest.raises(ValueError, match="Vectorstore not initialized"):
             manager.get_collection_stats()
+
+class TestSelectYearShards:
+    def test_no_constraint_selects_all(self):
+        assert select_year_shards(["2022", "2023", "unknown"]) == ["2022", "2023", "unknown"]
+
+    def test_explicit_years(self):
+        assert select_year_shards(["2022", "2023"], years=[2023]) == ["2023"]
+
+    def test_year_equality_filter(self):
+        assert select_year_shards(["2022", "2023", "unknown"], filter={"year": 2022}) == ["2022"]
+
+    def test_year_range_filter(self):
+        shards = ["2019", "2020", "2021", "2022", "unknown"]
+        selected = select_year_shards(shards, filter={"year": {"$gte": 2020, "$lt": 2022}})
+
+        assert selected == ["2020", "2021"]
+
+    def test_year_in_and_clause(self):
+        shards = ["2022", "2023"]
+        selected = select_year_shards(shards, filter={"$and": [{"year": {"$in": [2023]}}, {"filename": "a.pdf"}]})
+
+        assert selected == ["2023"]
+
+    def test_year_bounds_in_separate_clauses(self):
+        shards = ["2014", "2015", "2017", "2018", "2020", "unknown"]
+        selected = select_year_shards(shards, filter={"$and": [{"year": {"$gte": 2015}}, {"year": {"$lte": 2018}}]})
+
+        assert selected == ["2015", "2017", "2018"]
@@ -0,0 +1,24 @@
+import pytest
+from apt.store.fusion import reciprocal_rank_fusion
+
+class TestReciprocalRankFusion:
+    def test_agreement_ranks_first(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+
+        assert fused[0][0] == "b"
+        assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
+
+    def test_scores_use_rank_constant(self):
+        fused = reciprocal_rank_fusion([["a"]], k=10)
+        assert fused[0][1] == pytest.approx(1 / 11)
+
+    def test_weights(self):
+        fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+        assert fused[0][0] == "b"
+
+    def test_weight_count_mismatch_raises_error(self):
+        with pytest.raises(ValueError, match="Number of weights"):
+            reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0])
+
+    def test_empty_rankings(self):
+        assert reciprocal_rank_fusion([[], []]) == []
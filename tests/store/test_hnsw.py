@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from apt.store.hnsw import distance_to_similarity, estimate_index_bytes, exact_top_k, hnsw_metadata, hnsw_params, recall_at_k
+
+class TestHNSWMetadata:
+    def test_maps_params_to_chroma_keys(self):
+        metadata = hnsw_metadata(space="cosine", M=32, construction_ef=200, search_ef=64)
+
+        assert metadata == {
+            "hnsw:space": "cosine",
+            "hnsw:M": 32,
+            "hnsw:construction_ef": 200,
+            "hnsw:search_ef": 64,
+        }
+
+    def test_omits_unset_params(self):
+        assert hnsw_metadata(M=16) == {"hnsw:M": 16}
+        assert hnsw_metadata() == {}
+
+    def test_invalid_space_raises_error(self):
+        with pytest.raises(ValueError, match="Unsupported HNSW space"):
+            hnsw_metadata(space="manhattan")
+
+    def test_non_positive_value_raises_error(self):
+        with pytest.raises(ValueError, match="must be positive"):
+            hnsw_metadata(search_ef=0)
+
+    def test_round_trip(self):
+        params = {"space": "ip", "M": 8, "construction_ef": 100, "search_ef": 10}
+        metadata = {**hnsw_metadata(**params), "other": "value"}
+
+        assert hnsw_params(metadata) == params
+
+class TestExactTopK:
+    @pytest.fixture
+    def corpus(self):
+        return np.array([[1.0, 0.0], [0.0, 1.0], [10.0, 0.0], [-1.0, 0.0]], dtype=np.float32)
+
+    def test_l2(self, corpus):
+        result = exact_top_k(corpus, np.array([[0.9, 0.0]]), k=2, space="l2")
+        assert result.tolist() == [[0, 1]]
+
+    def test_cosine_ignores_magnitude(self, corpus):
+        result = exact_top_k(corpus, np.array([[1.0, 0.01]]), k=2, space="cosine")
+        assert set(result[0].tolist()) == {0, 2}
+
+    def test_inner_product_prefers_magnitude(self, corpus):
+        result = exact_top_k(corpus, np.array([[1.0, 0.0]]), k=1, space="ip")
+        assert result.tolist() == [[2]]
+
+    def test_k_larger_than_corpus(self, corpus):
+        result = exact_top_k(corpus, np.array([[1.0, 0.0]]), k=10, space="l2")
+        assert result.shape == (1, 4)
+
+    def test_invalid_space_raises_error(self, corpus):
+        with pytest.raises(ValueError, match="Unsupported HNSW space"):
+            exact_top_k(corpus, corpus, k=1, space="hamming")
+
+class TestRecallAtK:
+    def test_perfect_recall(self):
+        assert recall_at_k([["a", "b"]], [["b", "a"]]) == 1.0
+
+    def test_partial_recall(self):
+        assert recall_at_k([["a", "x"], ["c", "d"]], [["a", "b"], ["c", "d"]]) == 0.75
+
+    def test_empty(self):
+        assert recall_at_k([], []) == 0.0
+
+class TestDistanceToSimilarity:
+    def test_cosine(self):
+        np.testing.assert_allclose(distance_to_similarity([0.0, 0.25, 1.0], "cosine"), [1.0, 0.75, 0.0])
+
+    def test_l2_is_monotone(self):
+        similarities = distance_to_similarity([0.0, 0.5, 2.0], "l2")
+
+        assert similarities[0] == 1.0
+        assert list(similarities) == sorted(similarities, reverse=True)
+
+    def test_invalid_space_raises_error(self):
+        with pytest.raises(ValueError, match="Unsupported HNSW space"):
+            distance_to_similarity([0.1], "manhattan")
+
+class TestEstimateIndexBytes:
+    def test_vectors_and_links(self):
+        assert estimate_index_bytes(1000, 768) == 1000 * (768 * 4 + 32 * 4)
+        assert estimate_index_bytes(10, 8, M=4) == 10 * (32 + 32)
@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+from apt.store.ioc_index import IOCIndex, build_ioc_index
+
+def chunks():
+    return [
+        Document(page_content="", metadata={"chunk_id": "a:0", "filename": "a.pdf", "year": 2021, "iocs": "10.0.0.1, bad.com"}),
+        Document(page_content="", metadata={"chunk_id": "a:3", "filename": "a.pdf", "year": 2021, "iocs": "bad.com"}),
+        Document(page_content="", metadata={"chunk_id": "b:1", "filename": "b.pdf", "year": 2023, "iocs": "bad.com"}),
+        Document(page_content="", metadata={"chunk_id": "c:0", "filename": "c.pdf"}),
+    ]
+
+class TestIOCIndex:
+    def test_lookup_groups_chunks_by_report(self):
+        index = build_ioc_index(chunks())
+
+        [result] = index.lookup(["bad[.]com"])
+
+        assert len(index) == 2
+        assert result["ioc"] == "bad.com"
+        assert result["type"] == "domain"
+        assert result["reports"] == [
+            {"filename": "a.pdf", "year": 2021, "chunk_ids": ["a:0", "a:3"]},
+            {"filename": "b.pdf", "year": 2023, "chunk_ids": ["b:1"]},
+        ]
+
+    def test_lookup_miss(self):
+        [result] = build_ioc_index(chunks()).lookup(["8.8.8.8"])
+
+        assert result == {"ioc": "8.8.8.8", "type": "ipv4", "reports": []}
+
+    def test_lookup_text(self):
+        results = build_ioc_index(chunks()).lookup_text("Seen: 10.0.0[.]1 talking to hxxp://bad[.]com")
+
+        matched = {result["ioc"]: [r["filename"] for r in result["reports"]] for result in results}
+        assert matched == {"10.0.0.1": ["a.pdf"], "bad.com": ["a.pdf", "b.pdf"], "http://bad.com": []}
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "ioc_index.json"
+        index = build_ioc_index(chunks(), path=path)
+
+        loaded = IOCIndex.load(path)
+
+        assert loaded.lookup(["bad.com", "10.0.0.1"]) == index.lookup(["bad.com", "10.0.0.1"])
+
+    def test_deduplicated_copies_credited(self):
+        index = build_ioc_index([
+            Document(page_content="", metadata={
+                "chunk_id": "a:0", "filename": "a.pdf", "year": 2019, "iocs": "bad.com",
+                "duplicate_sources": "b.pdf, c.pdf", "duplicate_years": "2021, ",
+            }),
+        ])
+
+        [result] = index.lookup(["bad.com"])
+
+        assert [r["filename"] for r in result["reports"]] == ["a.pdf", "b.pdf", "c.pdf"]
+        assert [r["year"] for r in result["reports"]] == [2019, 2021, None]
+        assert all(r["chunk_ids"] == ["a:0"] for r in result["reports"])
@@ -0,0 +1,81 @@
+import pytest
+from langchain_core.documents import Document
+from apt.store.metadata_index import MetadataIndex, build_metadata_index, candidate_where
+
+class TestMetadataIndex:
+    @pytest.fixture
+    def documents(self):
+        return [
+            Document(page_content="a", metadata={
+                "chunk_id": "a:0", "year": 2023,
+                "apt_groups_mentioned": "APT28, APT29", "techniques_mentioned": "T1566.001",
+            }),
+            Document(page_content="b", metadata={
+                "chunk_id": "b:0", "year": 2024,
+                "apt_groups_mentioned": "LAZARUS", "techniques_mentioned": "T1059, T1566",
+            }),
+            Document(page_content="c", metadata={"chunk_id": "c:0", "year": 2023}),
+        ]
+
+    def test_postings(self, documents):
+        index = build_metadata_index(documents)
+
+        assert index.lookup("apt_groups_mentioned", ["APT28"]) == {"a:0"}
+        assert index.lookup("year", [2023]) == {"a:0", "c:0"}
+        assert index.num_chunks == 3
+
+    def test_group_lookup_normalized(self, documents):
+        index = build_metadata_index(documents)
+        assert index.lookup("apt_groups_mentioned", ["apt-28"]) == {"a:0"}
+
+    def test_subtechnique_counts_as_parent(self, documents):
+        index = build_metadata_index(documents)
+        assert index.lookup("techniques_mentioned", ["T1566"]) == {"a:0", "b:0"}
+
+    def test_candidates_intersect_fields(self, documents):
+        index = build_metadata_index(documents)
+
+        assert index.candidates(techniques=["T1566"], years=[2024]) == {"b:0"}
+        assert index.candidates() is None
+
+    def test_resolve_filter_splits_residual(self, documents):
+        index = build_metadata_index(documents)
+
+        candidates, residual = index.resolve_filter({
+            "$and": [{"apt_groups_mentioned": {"$in": ["APT28", "LAZARUS"]}}, {"filename": "x.pdf"}]
+        })
+
+        assert candidates == {"a:0", "b:0"}
+        assert residual == {"filename": "x.pdf"}
+
+    def test_resolve_filter_range_left_to_chroma(self, documents):
+        index = build_metadata_index(documents)
+
+        candidates, residual = index.resolve_filter({"year": {"$gte": 2020}})
+
+        assert candidates is None
+        assert residual == {"year": {"$gte": 2020}}
+
+    def test_resolve_filter_no_match(self, documents):
+        index = build_metadata_index(documents)
+
+        candidates, _ = index.resolve_filter({"apt_groups_mentioned": "KIMSUKY"})
+
+        assert candidates == set()
+
+    def test_save_and_load(self, documents, tmp_path):
+        path = tmp_path / "metadata_index.json"
+        build_metadata_index(documents, path=path)
+
+        loaded = MetadataIndex.load(path)
+
+        assert loaded.lookup("apt_groups_mentioned", ["LAZARUS"]) == {"b:0"}
+        assert loaded.values("year") == ["2023", "2024"]
+
+class TestCandidateWhere:
+    def test_combines_with_residual(self):
+        where = candidate_where({"b", "a"}, {"filename": "x.pdf"})
+        assert where == {"$and": [{"chunk_id": {"$in": ["a", "b"]}}, {"filename": "x.pdf"}]}
+
+    def test_candidates_only(self):
+        assert candidate_where({"a"}) == {"chunk_id": {"$in": ["a"]}}
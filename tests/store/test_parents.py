@@ -0,0 +1,35 @@
+from langchain_core.documents import Document
+from apt.store.parents import ParentStore, build_parent_store
+
+def parent(parent_id, text, **metadata):
+    return Document(page_content=text, metadata={"parent_id": parent_id, "filename": "a.pdf", **metadata})
+
+class TestParentStore:
+    def test_add_and_get(self, tmp_path):
+        store = ParentStore(tmp_path / "parents.sqlite")
+        store.add([parent("h:p0", "First section", page=1), parent("h:p1", "Second section")])
+
+        found = store.get(["h:p1", "h:p0", "h:p9"])
+
+        assert len(store) == 2
+        assert set(found) == {"h:p0", "h:p1"}
+        assert found["h:p0"].page_content == "First section"
+        assert found["h:p0"].metadata["page"] == 1
+        assert found["h:p1"].id == "h:p1"
+
+    def test_get_empty(self, tmp_path):
+        assert ParentStore(tmp_path / "parents.sqlite").get([]) == {}
+
+    def test_build_replaces_existing(self, tmp_path):
+        path = tmp_path / "parents.sqlite"
+        build_parent_store([parent("h:p0", "old")], path).close()
+        store = build_parent_store([parent("h:p1", "new")], path)
+
+        assert len(store) == 1
+        assert list(store.get(["h:p0", "h:p1"])) == ["h:p1"]
+
+    def test_reopen(self, tmp_path):
+        path = tmp_path / "parents.sqlite"
+        build_parent_store([parent("h:p0", "kept")], path).close()
+
+        assert ParentStore(path).get(["h:p0"])["h:p0"].page_content == "kept"
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from apt.store.profiles import ActorProfileIndex, build_actor_profiles
+
+def actor_chunks():
+    rng = np.random.default_rng(0)
+    directions = {"APT28": np.eye(8)[0], "LAZARUS": np.eye(8)[1], "TURLA": np.eye(8)[2]}
+
+    chunk_ids, embeddings, metadatas = [], [], []
+    for actor, direction in directions.items():
+        for i in range(6):
+            chunk_ids.append(f"{actor.lower()}.pdf:{i}")
+            embeddings.append(direction + rng.normal(scale=0.1, size=8))
+            metadatas.append({"apt_groups_mentioned": actor})
+
+    chunk_ids.append("shared.pdf:0")
+    embeddings.append(np.eye(8)[0] + np.eye(8)[1])
+    metadatas.append({"apt_groups_mentioned": "APT28,Lazarus"})
+
+    chunk_ids.append("rare.pdf:0")
+    embeddings.append(np.eye(8)[3])
+    metadatas.append({"apt_groups_mentioned": "APT41"})
+
+    chunk_ids.append("none.pdf:0")
+    embeddings.append(np.eye(8)[4])
+    metadatas.append(None)
+
+    return chunk_ids, np.asarray(embeddings), metadatas
+
+class TestActorProfileIndex:
+    def test_build_groups_by_normalized_actor(self):
+        index = build_actor_profiles(*actor_chunks(), min_chunks=3)
+
+        assert index.actors == ["APT28", "LAZARUS", "TURLA"]
+        assert index.chunk_counts.tolist() == [7, 7, 6]
+        assert index.centroids.shape == (3, 8)
+        np.testing.assert_allclose(np.linalg.norm(index.centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_medoids_are_member_chunks(self):
+        chunk_ids, embeddings, metadatas = actor_chunks()
+        index = build_actor_profiles(chunk_ids, embeddings, metadatas, n_medoids=2)
+
+        assert len(index.medoid_chunk_ids) == len(index.medoid_actors) <= 6
+        for actor, chunk_id in zip(index.medoid_actors, index.medoid_chunk_ids):
+            position = chunk_ids.index(chunk_id)
+            assert index.actors[actor] in metadatas[position]["apt_groups_mentioned"].upper()
+
+    def test_rank_orders_by_similarity(self):
+        index = build_actor_profiles(*actor_chunks())
+
+        ranking = index.rank(np.eye(8)[1], top_n=2)
+
+        assert [candidate["actor"] for candidate in ranking] == ["LAZARUS", "APT28"]
+        assert ranking[0]["score"] > ranking[1]["score"]
+        assert ranking[0]["closest_chunk_id"].startswith(("lazarus", "shared"))
+
+    def test_rank_empty_index(self):
+        assert ActorProfileIndex().rank(np.ones(8)) == []
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "profiles.npz"
+        index = build_actor_profiles(*actor_chunks(), path=path)
+
+        loaded = ActorProfileIndex.load(path)
+
+        assert loaded.actors == index.actors
+        assert loaded.medoid_chunk_ids == index.medoid_chunk_ids
+        assert loaded.rank(np.eye(8)[2]) == index.rank(np.eye(8)[2])
+
+    @pytest.mark.parametrize("min_chunks,expected", [(1, 4), (7, 2)])
+    def test_min_chunks(self, min_chunks, expected):
+        index = build_actor_profiles(*actor_chunks(), min_chunks=min_chunks)
+
+        assert len(index) == expected
@@ -0,0 +1,42 @@
+import numpy as np
+from apt.store.reports import ReportAggregator
+
+class TestReportAggregator:
+    def test_one_normalized_vector_per_report(self):
+        aggregator = ReportAggregator()
+        aggregator.add(
+            [[2.0, 0.0], [0.0, 1.0], [0.0, 3.0]],
+            [{"filename": "a.pdf"}, {"filename": "a.pdf"}, {"filename": "b.pdf"}],
+            ["a0", "a1", "b0"],
+        )
+
+        ids, embeddings, metadatas, _ = aggregator.records()
+
+        assert ids == ["a.pdf", "b.pdf"]
+        np.testing.assert_allclose(embeddings[0], [np.sqrt(0.5), np.sqrt(0.5)], rtol=1e-5)
+        np.testing.assert_allclose(embeddings[1], [0.0, 1.0])
+        assert [metadata["chunks"] for metadata in metadatas] == [2, 1]
+
+    def test_lead_chunk_and_metadata(self):
+        aggregator = ReportAggregator(preview_chars=5)
+        aggregator.add(
+            [[1.0, 0.0], [1.0, 0.0]],
+            [
+                {"filename": "a.pdf", "page": 3, "year": 2023, "apt_groups_mentioned": "Lazarus"},
+                {"filename": "a.pdf", "page": 1, "apt_groups_mentioned": "APT28,Lazarus"},
+            ],
+            ["later text", "opening text"],
+        )
+
+        _, _, metadatas, documents = aggregator.records()
+
+        assert documents == ["openi"]
+        assert metadatas[0]["year"] == 2023
+        assert metadatas[0]["apt_groups_mentioned"] == "APT28,LAZARUS"
+
+    def test_skips_chunks_without_filename(self):
+        aggregator = ReportAggregator()
+        aggregator.add([[1.0]], [None], ["orphan"])
+
+        assert len(aggregator) == 0
+        assert aggregator.records() == ([], [], [], [])